@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import QApplication
 from visualizador.config import SERIAL_PORT_ESP32, SERIAL_PORT_ARDUINO, BAUD_RATE
 from visualizador.adc_service import ADCService
 from visualizador.ui_service import UIService
+from visualizador.signal_processing_service import SignalProcessingService
 
 def main():
     print("=" * 70)
@@ -22,18 +23,21 @@ def main():
     print("  Boton aVR  - Derivacion aVR")
     print("-" * 70)
     print("VISUALIZACION:")
-    print("  • Senal ECG ADC Raw")
+    print("  • Senal ECG filtrada (linea base, notch, pasabanda)")
     print("=" * 70)
     print()
 
     # Initialize services
     adc_service = ADCService()
+    processing_service = SignalProcessingService()
     ui_service = UIService()
 
     # Connect services
-    adc_service.set_services(None, ui_service)
+    processing_service.set_services(ui_service, adc_service)
+    adc_service.set_services(processing_service, ui_service)
 
     # Start services
+    processing_service.start()
     adc_service.start()
     ui_service.start(adc_service)
 
@@ -42,17 +46,54 @@ def main():
 
         print("Servicios iniciados:")
         print("   -> ADC Service: ESP32 y Arduino")
+        print("   -> Signal Processing Service: Filtrado por bloques")
         print("   -> UI Service: Interfaz gráfica\n")
 
         def print_stats():
             while adc_service.running:
                 time.sleep(10)
-                valid = adc_service.esp32_reader.valid_packets if hasattr(adc_service.esp32_reader, 'valid_packets') else 0
-                invalid = adc_service.esp32_reader.invalid_packets if hasattr(adc_service.esp32_reader, 'invalid_packets') else 0
-                if valid > 0:
-                    error_rate = (invalid / (valid + invalid)) * 100
-                    print(f"ESP32: {valid} paquetes validos, "
-                          f"{invalid} invalidos ({error_rate:.2f}% error)")
+                for esp32_reader in adc_service.esp32_readers:
+                    valid = esp32_reader.valid_packets if hasattr(esp32_reader, 'valid_packets') else 0
+                    invalid = esp32_reader.invalid_packets if hasattr(esp32_reader, 'invalid_packets') else 0
+                    if valid > 0:
+                        error_rate = (invalid / (valid + invalid)) * 100
+                        print(f"ESP32 {esp32_reader.port}: {valid} paquetes validos, "
+                              f"{invalid} invalidos ({error_rate:.2f}% error), "
+                              f"{esp32_reader.lost_samples} muestras perdidas")
+                    link = getattr(esp32_reader, 'link', None)
+                    if link and link.reconnects:
+                        print(f"ESP32 {esp32_reader.port}: {link.reconnects} reconexiones, "
+                              f"{link.downtime_s:.1f} s sin conexion")
+                backlog = ui_service.backlog
+                print(f"UI: {backlog['samples']} muestras pendientes, {backlog['dropped_samples']} descartadas, "
+                      f"ultimo drenado {ui_service.last_drain_ms:.1f} ms")
+                for subscriber in adc_service.data_bus.stats():
+                    print(f"Bus {subscriber['name']}: retraso {subscriber['lag']}, "
+                          f"{subscriber['dropped']} bloques perdidos")
+                stage_us = ", ".join(f"{name} {us:.2f} us" for name, us in processing_service.stage_stats().items())
+                print(f"Procesamiento: {processing_service.samples_processed} muestras ({stage_us}/muestra), "
+                      f"{processing_service.dropped_blocks} bloques descartados")
+                if processing_service.detector:
+                    beats = sum(detector.beats for detector in processing_service.lead_detectors)
+                    print(f"Detector R: {beats} latidos")
+                sync = adc_service.sync_trigger.latency_stats()
+                if 'r_to_command' in sync:
+                    print(f"Disparo sincronizado: {sync['fired']} enviados, {sync['skipped']} omitidos, "
+                          f"R->comando p50 {sync['r_to_command']['p50']:.1f} ms, "
+                          f"p99 {sync['r_to_command']['p99']:.1f} ms")
+                clock = adc_service.sample_clock
+                print(f"Reloj ESP32: deriva {clock.drift_ppm:.0f} ppm, "
+                      f"residuo {clock.last_residual_ms:.2f} ms")
+                if adc_service.acquisition_process:
+                    print(f"Proceso de adquisicion: {adc_service.acquisition_process.overflows} muestras descartadas")
+                    continue
+                for name, reader in (("ESP32", adc_service.esp32_reader), ("Arduino", adc_service.arduino_reader)):
+                    stats = reader.read_stats.snapshot()
+                    print(f"{name}: {stats['wakeups_per_s']:.1f} lecturas/s, "
+                          f"{stats['bytes_per_wakeup']:.1f} bytes/lectura")
+                parser = adc_service.arduino_reader.parser
+                print(f"Arduino: {parser.lines_parsed} lineas parseadas, "
+                      f"{parser.lines_malformed} malformadas")
 
         stats_thread = threading.Thread(target=print_stats, daemon=True)
         stats_thread.start()
@@ -73,6 +114,7 @@ def main():
     finally:
         print("\nCerrando servicios...")
         adc_service.stop()
+        processing_service.stop()
         ui_service.stop()
         print("Aplicacion cerrada correctamente")
 
@@ -11,7 +11,12 @@ from .config import *
 from .data_manager import DataManager
 from .plot_utils import setup_plot, update_plot
 from .serial_readers import SerialReaderESP32, SerialReaderArduino
+from .frame_decoder import FrameDecoder
+from .stream_demux import StreamDemultiplexer
+from .events import LeadChangeEvent, RPeakEvent, DischargeEvent, EnergyEvent, QualityEvent, ChannelEvent
+from .event_bus import EventBus
 from .data_recorder import DataRecorder
+from .filters import BaselineEMA
 
 __all__ = [
     "DataManager",
@@ -19,5 +24,15 @@ __all__ = [
     "update_plot",
     "SerialReaderESP32",
     "SerialReaderArduino",
+    "FrameDecoder",
+    "StreamDemultiplexer",
+    "LeadChangeEvent",
+    "RPeakEvent",
+    "DischargeEvent",
+    "EnergyEvent",
+    "QualityEvent",
+    "ChannelEvent",
+    "EventBus",
     "DataRecorder",
+    "BaselineEMA",
 ]
\ No newline at end of file
@@ -0,0 +1,183 @@
+import multiprocessing
+import queue
+import time
+from .config import BAUD_RATE, SAMPLE_RATE, SHARED_RING_SECONDS
+from .shared_ring import SharedSampleRing
+
+STATUS_INTERVAL_S = 0.5
+
+
+class _RingSink:
+    """Stands in for ADCService inside the acquisition process"""
+
+    def __init__(self, rings, event_queue):
+        self.rings = rings
+        self.event_queue = event_queue
+
+    def on_esp32_samples(self, voltages, first_index=None, t0=None, channel=0):
+        ring = self.rings[channel]
+        ring.write(voltages, first_index)
+        # The ring is visible at once, queued events only once the feeder thread sends them:
+        # tell the consumer how far the samples covered by the events queued so far go
+        self.event_queue.put(('written', channel, ring.written))
+
+    def on_esp32_event(self, event, channel=0):
+        self.event_queue.put(('event', channel, event))
+
+    def on_arduino_data(self, timestamp, voltage, metadata=None):
+        self.event_queue.put(('arduino', timestamp, voltage, metadata))
+
+
+def _acquisition_main(esp32_ports, arduino_port, ring_names, event_queue, command_queue):
+    """Entry point of the acquisition process: serial readers and decoders only"""
+    from .serial_readers import SerialReaderESP32, SerialReaderArduino
+
+    rings = [SharedSampleRing(name=name) for name in ring_names]
+    sink = _RingSink(rings, event_queue)
+    esp32_readers = [SerialReaderESP32(port, BAUD_RATE, channel=channel) for channel, port in enumerate(esp32_ports)]
+    arduino_reader = SerialReaderArduino(arduino_port, BAUD_RATE)
+    for reader in esp32_readers:
+        reader.start(sink)
+    arduino_reader.start(sink)
+
+    last_status = 0.0
+    try:
+        while True:
+            try:
+                command = command_queue.get(timeout=0.05)
+                if command is None:
+                    break
+                command, target = command
+                if target == "esp32":
+                    esp32_readers[0].send_lead_command(command)
+                elif target == "arduino":
+                    arduino_reader.send_command(command)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if now - last_status >= STATUS_INTERVAL_S:
+                last_status = now
+                event_queue.put(('status', {
+                    'esp32': [(r.connected, r.valid_packets, r.invalid_packets, r.lost_samples) for r in esp32_readers],
+                    'arduino': arduino_reader.connected,
+                }))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for reader in esp32_readers:
+            reader.stop()
+        arduino_reader.stop()
+        for ring in rings:
+            ring.close()
+
+
+class RemoteReader:
+    """Proxy for a serial reader that runs in the acquisition process"""
+
+    def __init__(self, acquisition_process, target, port, channel=0):
+        self.acquisition_process = acquisition_process
+        self.target = target
+        self.port = port
+        self.channel = channel
+        self.connected = False
+        self.valid_packets = 0
+        self.invalid_packets = 0
+        self.lost_samples = 0
+
+    def send_lead_command(self, lead_name):
+        """Envía comando de cambio de derivación al ESP32 (via el proceso de adquisición)"""
+        self.acquisition_process.send_command(lead_name, self.target)
+
+    def send_command(self, command):
+        """Envía comandos al Arduino (via el proceso de adquisición)"""
+        self.acquisition_process.send_command(command, self.target)
+
+    def stop(self):
+        pass
+
+
+class AcquisitionProcess:
+    """Runs serial acquisition and decoding in a separate process
+
+    ESP32 samples come back through one SharedSampleRing per port, so the GUI
+    process only copies whole blocks out of shared memory and the acquisition
+    side never waits on the GIL of the UI. Low-volume traffic (events, Arduino
+    telemetry, connection status) uses a multiprocessing queue.
+    """
+
+    def __init__(self, esp32_ports, arduino_port, sample_rate=SAMPLE_RATE, ring_seconds=SHARED_RING_SECONDS):
+        self.esp32_ports = list(esp32_ports)
+        self.arduino_port = arduino_port
+        capacity = int(sample_rate * ring_seconds)
+        self.rings = [SharedSampleRing(capacity) for _ in self.esp32_ports]
+        self.event_queue = multiprocessing.Queue()
+        self.command_queue = multiprocessing.Queue()
+        self.process = None
+        self.released = [0] * len(self.rings)  # Ring write count up to which the events have been received
+
+        self.esp32_readers = [RemoteReader(self, "esp32", port, channel) for channel, port in enumerate(self.esp32_ports)]
+        self.arduino_reader = RemoteReader(self, "arduino", arduino_port)
+
+    def start(self):
+        self.process = multiprocessing.Process(
+            target=_acquisition_main,
+            args=(self.esp32_ports, self.arduino_port, [ring.name for ring in self.rings],
+                  self.event_queue, self.command_queue),
+            daemon=True
+        )
+        self.process.start()
+        print(f"Acquisition process started (pid {self.process.pid})")
+
+    def stop(self):
+        if self.process and self.process.is_alive():
+            self.command_queue.put(None)
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        for ring in self.rings:
+            ring.close()
+
+    def send_command(self, command, target):
+        self.command_queue.put((command, target))
+
+    @property
+    def overflows(self):
+        """Samples dropped because the consumer fell a full ring behind"""
+        return sum(ring.overflows for ring in self.rings)
+
+    def drain(self, adc_service):
+        """Move everything the acquisition process produced into adc_service
+
+        Events go first, as in the threaded reader: the acquisition side queues
+        a read's events before writing its samples, so lead boundaries are
+        known before the samples they split. Samples reach the ring before the
+        queue's feeder thread delivers those events, so each read is followed
+        by a ('written', channel, count) marker and the ring is only read up to
+        the last marker received; later samples wait for the next drain.
+        """
+        try:
+            while True:
+                message = self.event_queue.get_nowait()
+                kind = message[0]
+                if kind == 'written':
+                    self.released[message[1]] = max(self.released[message[1]], message[2])
+                elif kind == 'event':
+                    adc_service.on_esp32_event(message[2], channel=message[1])
+                elif kind == 'arduino':
+                    adc_service.on_arduino_data(*message[1:])
+                elif kind == 'status':
+                    status = message[1]
+                    for reader, (connected, valid, invalid, lost) in zip(self.esp32_readers, status['esp32']):
+                        reader.connected = connected
+                        reader.valid_packets = valid
+                        reader.invalid_packets = invalid
+                        reader.lost_samples = lost
+                    self.arduino_reader.connected = status['arduino']
+        except queue.Empty:
+            pass
+
+        for channel, ring in enumerate(self.rings):
+            block = ring.read(end=self.released[channel])
+            if len(block.samples):
+                adc_service.on_esp32_samples(block.samples, int(block.indices[0]), channel=channel)
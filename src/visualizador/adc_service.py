@@ -2,8 +2,17 @@ import threading
 import queue
 import time
 from typing import NamedTuple, Optional
+import numpy as np
 from .serial_readers import SerialReaderESP32, SerialReaderArduino
-from .config import SERIAL_PORT_ESP32, SERIAL_PORT_ARDUINO, BAUD_RATE
+from .timebase import SampleClock
+from .multichannel import ChannelMerger
+from .acquisition_process import AcquisitionProcess
+from .async_engine import AsyncSerialEngine
+from .event_bus import EventBus
+from .data_bus import DataBus
+from .sync_trigger import SyncTrigger
+from .events import LeadChangeEvent, RPeakEvent, DischargeEvent, EnergyEvent, QualityEvent, ChannelEvent
+from .config import SERIAL_PORT_ESP32, SERIAL_PORT_ARDUINO, BAUD_RATE, ESP32_PORTS, ACQUISITION_MODE
 
 class ADCData(NamedTuple):
     """Data structure for ADC readings"""
@@ -12,31 +21,74 @@ class ADCData(NamedTuple):
     source: str  # 'esp32' or 'arduino'
     metadata: dict = None  # Additional data like lead changes, energies, etc.
 
+class SampleBlock(NamedTuple):
+    """Data structure for a block of consecutive ADC samples"""
+    timestamp: int  # Timestamp of the first sample (ms)
+    voltages: np.ndarray
+    first_index: int  # Sample count of the first sample in the block
+    source: str
+    metadata: dict = None
+    timestamps: np.ndarray = None  # Per-sample timestamps (ms) from the sample clock
+
 class ADCService:
     """Service responsible for ADC data acquisition from ESP32 and Arduino"""
 
-    def __init__(self):
+    def __init__(self, esp32_ports=None, arduino_port=SERIAL_PORT_ARDUINO):
         self.running = False
         self.thread = None
 
         # Communication queues
-        self.data_queue = queue.Queue(maxsize=10000)  # For ADC data output
+        self.data_bus = DataBus()  # ADC data output, broadcast to any number of subscribers
+        self._data_subscription = None  # Used by get_data()
         self.command_queue = queue.Queue()  # For incoming commands
+        self.event_bus = EventBus()  # Typed lead / R-peak / discharge / energy events
 
         # Service references for communication
         self.signal_processing_service = None
         self.ui_service = None
 
-        # Connection attempt limit
+        # Failed connection attempts logged per port before retrying silently
         self.max_connection_attempts = 5
 
-        # Serial readers
-        self.esp32_reader = SerialReaderESP32(SERIAL_PORT_ESP32, BAUD_RATE, self.max_connection_attempts)
-        self.arduino_reader = SerialReaderArduino(SERIAL_PORT_ARDUINO, BAUD_RATE, self.max_connection_attempts)
+        # Serial readers: one per ESP32 front-end, the first one is the primary channel
+        esp32_ports = esp32_ports or ESP32_PORTS or [SERIAL_PORT_ESP32]
+        self.acquisition_mode = ACQUISITION_MODE
+        self.acquisition_process = None
+        self.async_engine = None
+        if self.acquisition_mode == "async":
+            # All ports served by one asyncio loop thread
+            self.async_engine = AsyncSerialEngine(sink=self)
+            self.esp32_readers = [self.async_engine.add_esp32_port(port, BAUD_RATE, channel)
+                                  for channel, port in enumerate(esp32_ports)]
+            self.arduino_reader = self.async_engine.add_arduino_port(arduino_port, BAUD_RATE)
+        elif self.acquisition_mode == "process":
+            # Readers live in another process; these are proxies for commands and status
+            self.acquisition_process = AcquisitionProcess(esp32_ports, arduino_port)
+            self.esp32_readers = self.acquisition_process.esp32_readers
+            self.arduino_reader = self.acquisition_process.arduino_reader
+        else:
+            self.esp32_readers = [
+                SerialReaderESP32(port, BAUD_RATE, self.max_connection_attempts, channel=channel)
+                for channel, port in enumerate(esp32_ports)
+            ]
+            self.arduino_reader = SerialReaderArduino(arduino_port, BAUD_RATE, self.max_connection_attempts)
+        self.esp32_reader = self.esp32_readers[0]
 
         # Status
         self.esp32_connected = False
         self.arduino_connected = False
+        self.sample_count = 0
+        self.sample_clocks = [SampleClock() for _ in self.esp32_readers]
+        self.sample_clock = self.sample_clocks[0]
+
+        # Multi-port merge into one time-aligned multi-channel stream
+        self.channel_merger = ChannelMerger(len(self.esp32_readers)) if len(self.esp32_readers) > 1 else None
+        if self.channel_merger:
+            print(f"[ESP32] {len(self.esp32_readers)} puertos: el canal 0 se muestra y procesa; todos se publican "
+                  f"combinados en data_bus (MultiChannelBlock) y los eventos de los demas como ChannelEvent")
+
+        # Synchronized discharge: R peaks go straight to the trigger thread, not through command_queue
+        self.sync_trigger = SyncTrigger(self.arduino_reader, self.sample_clock)
 
         print("ADC Data Acquisition Service initialized")
 
@@ -52,6 +104,7 @@ class ADCService:
             self.running = True
             self.thread = threading.Thread(target=self._run, daemon=True)
             self.thread.start()
+            self.sync_trigger.start()
 
             # Try to start serial readers with limited attempts
             self._start_serial_readers()
@@ -59,16 +112,22 @@ class ADCService:
             print("ADC Data Acquisition Service started")
 
     def _start_serial_readers(self):
-        """Start serial readers with limited connection attempts"""
-        # Try ESP32 connection
-        try:
-            print("Starting ESP32 reader...")
-            self.esp32_reader.start(self)
-            print("ESP32 reader started")
-        except Exception as e:
-            print(f"ESP32 reader failed to start: {e}")
-
-        time.sleep(1)
+        """Start serial readers; the reconnect supervisor opens (and reopens) their ports"""
+        if self.acquisition_process:
+            self.acquisition_process.start()
+            return
+        if self.async_engine:
+            self.async_engine.start()
+            return
+
+        # Try ESP32 connections
+        for reader in self.esp32_readers:
+            try:
+                print(f"Starting ESP32 reader on {reader.port}...")
+                reader.start(self)
+                print("ESP32 reader started")
+            except Exception as e:
+                print(f"ESP32 reader failed to start: {e}")
 
         # Try Arduino connection
         try:
@@ -83,9 +142,16 @@ class ADCService:
         self.running = False
         if self.thread:
             self.thread.join(timeout=1.0)
-
-        self.esp32_reader.stop()
-        self.arduino_reader.stop()
+        self.sync_trigger.stop()
+
+        if self.acquisition_process:
+            self.acquisition_process.stop()
+        elif self.async_engine:
+            self.async_engine.stop()
+        else:
+            for reader in self.esp32_readers:
+                reader.stop()
+            self.arduino_reader.stop()
         print("ADC Data Acquisition Service stopped")
 
     def send_command(self, command: str, target: str = "esp32"):
@@ -93,11 +159,14 @@ class ADCService:
         self.command_queue.put((command, target))
 
     def get_data(self, timeout: float = 0.1) -> Optional[ADCData]:
-        """Get next ADC data from queue"""
-        try:
-            return self.data_queue.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        """Get next ADC data (ADCData, SampleBlock or MultiChannelBlock) from the data bus
+
+        Convenience for a single consumer; other consumers should use
+        data_bus.subscribe() to get their own cursor.
+        """
+        if self._data_subscription is None:
+            self._data_subscription = self.data_bus.subscribe("get_data")
+        return self._data_subscription.get(timeout)
 
     def _run(self):
         """Main service loop"""
@@ -106,11 +175,15 @@ class ADCService:
                 # Process commands
                 self._process_commands()
 
+                if self.acquisition_process:
+                    # Pull samples and events from the acquisition process
+                    self.acquisition_process.drain(self)
+
                 # Update connection status
-                self.esp32_connected = self.esp32_reader.running and self.esp32_reader.ser and self.esp32_reader.ser.is_open
-                self.arduino_connected = self.arduino_reader.running and self.arduino_reader.ser and self.arduino_reader.ser.is_open
+                self.esp32_connected = self.esp32_reader.connected
+                self.arduino_connected = self.arduino_reader.connected
 
-                time.sleep(0.01)  # Small delay
+                time.sleep(0.002 if self.acquisition_process else 0.01)
 
             except Exception as e:
                 print(f"ADC Service error: {e}")
@@ -129,44 +202,96 @@ class ADCService:
             pass
 
     # Callback methods for serial readers to send data
-    def on_esp32_data(self, voltage: float, metadata: dict = None):
-        """Callback for ESP32 data"""
-        data = ADCData(
-            timestamp=int(time.time() * 1000),
-            voltage=voltage,
+    def on_esp32_samples(self, voltages: np.ndarray, first_index: Optional[int] = None, t0: Optional[int] = None,
+                         channel: int = 0):
+        """Callback for a block of ESP32 samples (one hand-off per read instead of per sample)"""
+        if len(voltages) == 0:
+            return
+
+        if first_index is None:
+            first_index = self.sample_count
+        clock = self.sample_clocks[channel]
+        if t0 is None:
+            # Per-sample times from the sample counter, corrected for host drift
+            resyncs = clock.resyncs
+            timestamps = clock.timestamps(first_index, len(voltages))
+            if self.channel_merger and clock.resyncs != resyncs:
+                self.channel_merger.reset_channel(channel)
+        else:
+            timestamps = t0 + np.arange(len(voltages)) * clock.period_ms
+
+        if self.channel_merger:
+            merged = self.channel_merger.add(channel, first_index, voltages, timestamps[0])
+            if merged is not None:
+                self._put_data(merged)
+
+        # Only the primary channel feeds the single-trace pipeline below
+        if channel != 0:
+            return
+
+        block = SampleBlock(
+            timestamp=int(timestamps[0]),
+            voltages=voltages,
+            first_index=first_index,
             source='esp32',
-            metadata=metadata or {}
+            metadata={},
+            timestamps=timestamps
         )
+        self.sample_count = first_index + len(voltages)
 
         # Send to signal processing service if available, otherwise send directly to UI
         if self.signal_processing_service:
-            self.signal_processing_service.process_data(data)
+            self.signal_processing_service.process_block(block)
         elif self.ui_service:
-            # Create processed data directly
-            from .ui_service import ProcessedData
-            processed = ProcessedData(
-                timestamp=data.timestamp,
-                raw_voltage=data.voltage,
-                sample_count=self.sample_count,
-                metadata=data.metadata
+            from .ui_service import ProcessedBlock
+            processed = ProcessedBlock(
+                timestamp=block.timestamp,
+                raw_voltage=block.voltages,
+                first_sample=block.first_index,
+                metadata=block.metadata,
+                timestamps=block.timestamps
             )
-            self.ui_service.add_processed_data(processed)
-            self.sample_count += 1
+            self.ui_service.add_processed_block(processed)
+
+        # Publish for external consumers
+        self._put_data(block)
+
+    def on_esp32_event(self, event, channel: int = 0):
+        """Callback for typed ESP32 text events (no voltage sample attached)
+
+        Lead, R-peak and trigger state follow the primary front-end; events of
+        the other channels are published as ChannelEvents, stamped with their
+        own sample clock.
+        """
+        primary = channel == 0
+        if isinstance(event, LeadChangeEvent):
+            if primary and self.signal_processing_service:
+                self.signal_processing_service.lead_changed(event.sample_index, event.lead_index)
+            metadata = {'lead_change': {'index': event.lead_index, 'name': event.lead_name}}
+        elif isinstance(event, RPeakEvent):
+            if primary:
+                self.sync_trigger.on_r_peak(event)  # First, before any bookkeeping
+            metadata = {'r_peak': True}
+        elif isinstance(event, DischargeEvent):
+            metadata = {'disparo': event.text}
+        elif isinstance(event, QualityEvent):
+            metadata = {'quality': {'lead': event.lead_index, 'issues': list(event.issues)}}
+        else:
+            return
+        metadata['sample_index'] = event.sample_index
+        if not primary:
+            metadata['channel'] = channel
+            event = ChannelEvent(channel, event)
 
-        # Send to UI service for metadata
-        if self.ui_service:
-            self.ui_service.add_adc_data(data)
+        data = ADCData(
+            timestamp=int(self.sample_clocks[channel].time_of(metadata['sample_index'])),
+            voltage=0.0,
+            source='esp32',
+            metadata=metadata
+        )
 
-        # Keep in our own queue for external access
-        try:
-            self.data_queue.put_nowait(data)
-        except queue.Full:
-            # Remove oldest data if queue is full
-            try:
-                self.data_queue.get_nowait()
-                self.data_queue.put_nowait(data)
-            except queue.Empty:
-                pass
+        self.event_bus.publish(event, data.timestamp)
+        self._put_data(data)
 
     def on_arduino_data(self, timestamp: int, voltage: float, metadata: dict = None):
         """Callback for Arduino data"""
@@ -177,16 +302,22 @@ class ADCService:
             metadata=metadata or {}
         )
 
-        # Send to UI service (Arduino data goes directly to UI)
-        if self.ui_service:
-            self.ui_service.add_adc_data(data)
-
-        # Keep in our own queue for external access
-        try:
-            self.data_queue.put_nowait(data)
-        except queue.Full:
-            try:
-                self.data_queue.get_nowait()
-                self.data_queue.put_nowait(data)
-            except queue.Empty:
-                pass
\ No newline at end of file
+        # Energy updates go to the event bus (the UI drains it every tick)
+        energia = data.metadata.get('energia')
+        if energia:
+            self.event_bus.publish(EnergyEvent(
+                timestamp=energia.get('timestamp', timestamp),
+                vcap=energia['vcap'],
+                corriente=energia['corriente'],
+                e_f1=energia['e_f1'],
+                e_f2=energia['e_f2'],
+                e_total=energia['e_total'],
+                estado=energia['estado']
+            ), timestamp)
+
+        # Publish for external consumers
+        self._put_data(data)
+
+    def _put_data(self, data):
+        """Publish data for external consumers (never blocks; slow subscribers drop their oldest)"""
+        self.data_bus.publish(data)
@@ -0,0 +1,298 @@
+import asyncio
+import threading
+import time
+from typing import NamedTuple
+import numpy as np
+import serial
+from .config import BAUD_RATE, DEBUG_MODE, SAMPLE_RATE
+from .stream_demux import StreamDemultiplexer
+from .telemetry_parser import TelemetryLineParser
+from .serial_io import ReadStats
+from .reconnect import ConnectionState
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class SampleChunk(NamedTuple):
+    """Block of decoded samples from one ESP32 port of the engine"""
+    channel: int
+    first_index: int
+    voltages: np.ndarray
+
+
+class AsyncPortReader:
+    """One serial port served by AsyncSerialEngine (ESP32 frames or Arduino telemetry)
+
+    Offers the same interface as SerialReaderESP32/SerialReaderArduino towards
+    the UI and ADCService (commands, packet counters, read stats).
+    """
+
+    def __init__(self, engine, port, baud_rate, kind, channel=0):
+        self.engine = engine
+        self.port = port
+        self.baud_rate = baud_rate
+        self.kind = kind  # "esp32" or "arduino"
+        self.channel = channel
+        self.ser = None
+        self.running = False
+        self.read_stats = ReadStats()
+        self.demux = StreamDemultiplexer() if kind == "esp32" else None
+        self.decoder = self.demux.decoder if self.demux else None
+        self.parser = TelemetryLineParser() if kind == "arduino" else None
+        self.link = ConnectionState(self.tag, port, SAMPLE_RATE if kind == "esp32" else 0)
+
+        # Filled by the fd callback, consumed by the decoding coroutine
+        self.buffer = bytearray()
+        self.data_ready = None
+        self.lost = None  # Error that closed the port
+        self.write_lock = threading.Lock()  # Loop-side commands and the sync trigger write from different threads
+
+    @property
+    def valid_packets(self):
+        return self.decoder.valid_packets if self.decoder else 0
+
+    @property
+    def invalid_packets(self):
+        return self.decoder.invalid_packets if self.decoder else 0
+
+    @property
+    def lost_samples(self):
+        decoded = self.decoder.lost_samples if self.decoder else 0
+        return decoded + self.link.lost_samples
+
+    @property
+    def connected(self):
+        return self.running and self.link.connected
+
+    @property
+    def tag(self):
+        return "ESP32" if self.kind == "esp32" else "ARDUINO"
+
+    def send_lead_command(self, lead_name):
+        """Envía comando de cambio de derivación al ESP32"""
+        self.engine.write(self, f"LEAD_{lead_name}\n".encode())
+
+    def send_command(self, command):
+        """Envía comandos al Arduino"""
+        self.engine.write(self, f"{command}\n".encode())
+
+    def write_now(self, data):
+        """Escribe bytes en el puerto desde el hilo que llama, sin pasar por el event loop (disparo sincronizado)"""
+        ser = self.ser
+        if self.running and ser and ser.is_open:
+            try:
+                with self.write_lock:
+                    ser.write(data)
+                return True
+            except Exception as e:
+                print(f"[{self.tag}] ❌ Error enviando comando: {e}")
+        return False
+
+    def stop(self):
+        pass  # The engine owns the port lifetime
+
+    # --- Event loop side ---
+
+    def _write(self, data):
+        if self.ser and self.ser.is_open:
+            try:
+                with self.write_lock:
+                    self.ser.write(data)
+                print(f"[{self.tag}] Comando enviado: {data.decode().strip()}")
+            except Exception as e:
+                print(f"[{self.tag}] ❌ Error enviando comando: {e}")
+
+    def _on_readable(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (OSError, serial.SerialException) as e:
+            self.lost = e
+            data = b""
+        self.read_stats.record(len(data))
+        self.buffer += data
+        self.data_ready.set()
+
+    async def _open(self, loop):
+        while self.engine.running:
+            try:
+                self.ser = serial.Serial(self.port, self.baud_rate, timeout=0)
+                self.ser.reset_input_buffer()
+                self.ser.reset_output_buffer()
+                if self.demux:
+                    self.demux.reset()
+                else:
+                    self.parser.reset()
+                loop.add_reader(self.ser.fileno(), self._on_readable)
+                self.running = True
+                self.link.established()
+                return True
+            except Exception as e:
+                self.link.failed(e)
+                if self.ser:
+                    self.ser.close()
+                # Exponential backoff, without blocking the other ports of the loop
+                await asyncio.sleep(max(self.link.next_attempt - time.monotonic(), 0.0))
+        return False
+
+    def _close(self, loop):
+        self.running = False
+        if self.lost:
+            self.link.lost(self.lost)
+            self.lost = None
+        if self.ser:
+            try:
+                loop.remove_reader(self.ser.fileno())
+            except Exception:
+                pass
+            self.ser.close()
+
+    async def run(self):
+        """Open the port and decode everything it delivers until the engine stops"""
+        loop = asyncio.get_running_loop()
+        self.data_ready = asyncio.Event()
+        while self.engine.running:
+            if not await self._open(loop):
+                break
+            self.lost = None
+            while self.engine.running and not self.lost:
+                await self.data_ready.wait()
+                self.data_ready.clear()
+                if not self.buffer:
+                    continue
+                chunk = bytes(self.buffer)
+                self.buffer.clear()
+                try:
+                    self._process(chunk)
+                except Exception as e:
+                    if DEBUG_MODE:
+                        print(f"[{self.tag}] ❌ Error en lectura: {e}")
+            self._close(loop)
+
+    def _process(self, chunk):
+        if self.demux:
+            first_index = self.demux.sample_count
+            voltages, events = self.demux.feed(chunk)
+            # Events first: lead boundaries must be known before their samples arrive
+            for event in events:
+                self.engine.publish_event(self, event)
+            self.engine.publish_block(self, first_index, voltages)
+        else:
+            for row in self.parser.feed(chunk):
+                self.engine.publish_event(self, row)
+
+
+class AsyncSerialEngine:
+    """Serves many serial ports from one asyncio event loop in a single thread
+
+    Each port's file descriptor is registered with loop.add_reader(); the
+    callback only appends bytes to the port buffer, and one coroutine per port
+    decodes frames (or parses Arduino lines) as data arrives. Results go to the
+    sink (normally ADCService) and to any consumer of the async iterators
+    blocks() / events(). Requires an event loop with add_reader (POSIX).
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.ports = []
+        self.loop = None
+        self.thread = None
+        self.running = False
+        self._block_subscribers = []
+        self._event_subscribers = []
+
+    def add_esp32_port(self, port, baud_rate=BAUD_RATE, channel=None) -> AsyncPortReader:
+        if channel is None:
+            channel = sum(1 for reader in self.ports if reader.kind == "esp32")
+        reader = AsyncPortReader(self, port, baud_rate, "esp32", channel)
+        self.ports.append(reader)
+        return reader
+
+    def add_arduino_port(self, port, baud_rate=BAUD_RATE) -> AsyncPortReader:
+        reader = AsyncPortReader(self, port, baud_rate, "arduino")
+        self.ports.append(reader)
+        return reader
+
+    def start(self):
+        """Run the event loop in one background thread"""
+        self.running = True
+        self.loop = asyncio.new_event_loop()
+        self._stopped = asyncio.Event()
+        self.thread = threading.Thread(target=self._thread_main, daemon=True)
+        self.thread.start()
+
+    def _thread_main(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self.loop.close()
+
+    async def _main(self):
+        port_tasks = [asyncio.create_task(reader.run()) for reader in self.ports]  # Referenced until the end
+        await self._stopped.wait()
+        # Port tasks and any consumer scheduled with run_coroutine() end before the loop closes
+        tasks = (asyncio.all_tasks() | set(port_tasks)) - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for reader in self.ports:
+            reader._close(self.loop)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.loop.call_soon_threadsafe(self._stopped.set)
+        self.thread.join(timeout=2.0)
+
+    def write(self, reader, data):
+        """Thread-safe write to one port (done on the event loop)"""
+        if self.loop and self.running:
+            self.loop.call_soon_threadsafe(reader._write, data)
+
+    # --- Output ---
+
+    def publish_block(self, reader, first_index, voltages):
+        if len(voltages) == 0:
+            return
+        if self.sink:
+            self.sink.on_esp32_samples(voltages, first_index, channel=reader.channel)
+        if self._block_subscribers:
+            self._publish(self._block_subscribers, SampleChunk(reader.channel, first_index, voltages))
+
+    def publish_event(self, reader, event):
+        if self.sink:
+            if reader.kind == "esp32":
+                self.sink.on_esp32_event(event, channel=reader.channel)
+            else:
+                self.sink.on_arduino_data(event.timestamp, event.vcap, event.metadata())
+        if self._event_subscribers:
+            self._publish(self._event_subscribers, (reader.port, event))
+
+    @staticmethod
+    def _publish(subscribers, item):
+        for subscriber in subscribers:
+            if subscriber.full():
+                subscriber.get_nowait()  # Drop oldest for slow consumers
+            subscriber.put_nowait(item)
+
+    async def _iterate(self, subscribers):
+        subscriber = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        subscribers.append(subscriber)
+        try:
+            while True:
+                yield await subscriber.get()
+        finally:
+            subscribers.remove(subscriber)
+
+    def blocks(self):
+        """Async iterator of SampleChunk from every ESP32 port (use inside the engine loop)"""
+        return self._iterate(self._block_subscribers)
+
+    def events(self):
+        """Async iterator of (port, event) with ESP32 events and Arduino EnergyRow"""
+        return self._iterate(self._event_subscribers)
+
+    def run_coroutine(self, coro):
+        """Schedule a coroutine (e.g. a blocks()/events() consumer) on the engine loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
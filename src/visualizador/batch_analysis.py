@@ -0,0 +1,404 @@
+"""Offline analysis of recordings/ecg_samples_*.csv with the live processing chain
+
+Analyse a day of recordings on every core with
+``python -m visualizador.batch_analysis recordings --workers 8``.
+"""
+import argparse
+import csv
+import glob
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+import numpy as np
+from .signal_processing_service import build_stage
+from .r_peak_detector import RPeakDetector
+from .hrv import HeartRateStats
+from .signal_quality import SignalQualityIndex, CLIP_MARGIN_V
+from .telemetry_parser import TelemetryLineParser
+from .frame_decoder import ADC_VREF
+from .data_recorder import RECORDINGS_DIR
+from .config import (SAMPLE_RATE, FILTER_CHAIN, R_REFRACTORY_MS, ANALYSIS_CHUNK_SAMPLES,
+                     ANALYSIS_SEGMENT_SECONDS, ANALYSIS_WARMUP_SECONDS, LEADS)
+
+ECG_COLUMNS = 4  # Muestra,Timestamp_ms,Voltaje_V,Derivacion (recordings without Derivacion are all lead 0)
+PROBE_LINES = 1000  # Lines read to estimate the line length and the sample rate
+TAIL_SECONDS = 3.0  # Read past a segment's end so the detector reports its last beats (searchback)
+ENERGY_READ_BYTES = 1 << 20
+
+
+class Segment(NamedTuple):
+    """Byte range of a recording analysed by one worker"""
+    path: str
+    warmup_start: int  # Run the chain from here, results discarded
+    start: int  # First line owned by the segment starts at or after this offset
+    end: int  # ... and the last one before this one
+    tail_end: int  # Keep running to here to flush the detector
+    sample_rate: int
+    chunk_bytes: int
+    columns: int  # CSV columns of the recording
+
+
+class SegmentResult(NamedTuple):
+    path: str
+    start: int
+    samples: int
+    first_index: int  # -1 if the segment had no samples
+    last_index: int
+    peaks: np.ndarray  # R-peak sample indices owned by the segment
+    missing: int  # Samples missing from the index sequence
+    gaps: int
+    clipped: int
+    quality_windows: int  # SignalQualityIndex windows checked
+    poor_windows: int  # ... with at least one issue
+    cpu_s: float
+
+
+class RecordingSummary(NamedTuple):
+    """Per-file result written to the summary CSV"""
+    file: str
+    samples: int
+    duration_s: float
+    beats: int
+    heart_rate: float  # bpm, from the mean RR
+    sdnn_ms: float
+    rmssd_ms: float
+    pnn50: float
+    rejected_rr: int
+    discharges: int  # -1 without a matching ecg_data_*.csv
+    energy_j: float
+    missing_samples: int
+    gaps: int
+    clipped_pct: float
+    poor_quality_pct: float  # Signal quality windows with an issue (flatline, clipping, noise, baseline jump)
+
+
+def parse_samples(data: bytes, columns=ECG_COLUMNS):
+    """(sample indices, voltages, lead indices) of the ECG CSV lines in data, with one vectorized conversion"""
+    try:
+        values = np.array(data.rstrip(b"\n").replace(b"\n", b",").split(b","), dtype=np.float64)
+        values = values.reshape(-1, columns)
+    except ValueError:
+        # Fallback: line by line, skipping the malformed ones (e.g. a truncated last line)
+        rows = []
+        for line in data.split(b"\n"):
+            parts = line.split(b",")
+            if len(parts) == columns:
+                try:
+                    rows.append([float(p) for p in parts])
+                except ValueError:
+                    pass
+        values = np.array(rows, dtype=np.float64).reshape(-1, columns)
+    leads = values[:, 3].astype(np.int64) if columns > 3 else np.zeros(len(values), dtype=np.int64)
+    return values[:, 0].astype(np.int64), values[:, 2], leads
+
+
+def _seek_line(f, offset):
+    """Position f at the first line starting at or after offset"""
+    f.seek(max(offset - 1, 0))
+    if offset > 0:
+        f.readline()
+
+
+def _read_chunks(f, end, chunk_bytes, columns):
+    """Parsed chunks of the lines starting before byte offset end, about chunk_bytes at a time"""
+    while f.tell() < end:
+        data = f.read(min(chunk_bytes, end - f.tell()))
+        if not data:
+            return
+        if not data.endswith(b"\n"):
+            data += f.readline()
+        yield parse_samples(data, columns)
+
+
+def probe_recording(path):
+    """(header end offset, CSV columns, bytes per line, sample rate estimated from the timestamps)"""
+    with open(path, 'rb') as f:
+        columns = min(f.readline().count(b",") + 1, ECG_COLUMNS)
+        header_end = f.tell()
+        lines = [line for line in (f.readline() for _ in range(PROBE_LINES)) if line.endswith(b"\n")]
+    if not lines:
+        return header_end, columns, 1.0, SAMPLE_RATE
+    bytes_per_line = sum(len(line) for line in lines) / len(lines)
+    indices, _, _ = parse_samples(b"".join(lines), columns)
+    timestamps = np.array([float(line.split(b",")[1]) for line in lines]) if len(indices) == len(lines) else []
+    sample_rate = SAMPLE_RATE
+    if len(indices) > 1 and len(timestamps):
+        steps = np.diff(indices)
+        ms_per_sample = np.diff(timestamps)[steps > 0] / steps[steps > 0]
+        if len(ms_per_sample) and np.median(ms_per_sample) > 0:
+            sample_rate = int(round(1000.0 / np.median(ms_per_sample)))
+    return header_end, columns, bytes_per_line, sample_rate
+
+
+def plan_segments(path, sample_rate=None, segment_seconds=ANALYSIS_SEGMENT_SECONDS,
+                  warmup_seconds=ANALYSIS_WARMUP_SECONDS, chunk_samples=ANALYSIS_CHUNK_SAMPLES):
+    """Split a recording into Segments of about segment_seconds (offsets from the probed line length)"""
+    header_end, columns, bytes_per_line, probed_rate = probe_recording(path)
+    sample_rate = sample_rate or probed_rate
+    size = os.path.getsize(path)
+    samples_to_bytes = sample_rate * bytes_per_line
+    segment_bytes = max(int(segment_seconds * samples_to_bytes), 1)
+    warmup_bytes = int(warmup_seconds * samples_to_bytes)
+    tail_bytes = int(TAIL_SECONDS * samples_to_bytes)
+    chunk_bytes = max(int(chunk_samples * bytes_per_line), 1)
+    segments = []
+    for start in range(header_end, size, segment_bytes):
+        end = min(start + segment_bytes, size)
+        segments.append(Segment(path, max(start - warmup_bytes, header_end), start, end,
+                                min(end + tail_bytes, size), sample_rate, chunk_bytes, columns))
+    return segments
+
+
+class _Pipeline:
+    """SignalQualityIndex, processing chain and RPeakDetector per lead, as in SignalProcessingService
+
+    Chunks are split where the recorded lead changes and each run goes
+    through its lead's state. Like the live service, gaps in the sample
+    index are counted but do not reset any state.
+    """
+
+    def __init__(self, sample_rate, chain):
+        self.lead_stages = [[build_stage(name, sample_rate) for name in chain] for _ in LEADS]
+        self.lead_detectors = [RPeakDetector(sample_rate) for _ in LEADS]
+        self.lead_quality = [SignalQualityIndex(sample_rate, i) for i in range(len(LEADS))]
+        self.next_index = None
+        self.missing = 0
+        self.gaps = 0
+
+    @property
+    def quality_windows(self):
+        return sum(quality.windows for quality in self.lead_quality)
+
+    @property
+    def poor_windows(self):
+        return sum(quality.poor for quality in self.lead_quality)
+
+    def reset_counters(self):
+        self.missing = self.gaps = 0
+        for quality in self.lead_quality:
+            quality.windows = quality.poor = 0
+
+    def process(self, indices, voltages, leads):
+        """Filter a chunk and return the sample indices of the R peaks reported in it"""
+        if not len(indices):
+            return []
+        steps = np.diff(indices)
+        if self.next_index is not None and indices[0] != self.next_index:
+            self.gaps += 1
+            self.missing += max(int(indices[0]) - self.next_index, 0)
+        self.gaps += int(np.count_nonzero(steps != 1))
+        self.missing += int(np.sum(steps[steps > 1] - 1))
+        self.next_index = int(indices[-1]) + 1
+
+        peaks = []
+        breaks = np.flatnonzero(np.diff(leads) != 0) + 1
+        for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(indices)]):
+            lead = int(leads[start])
+            if not 0 <= lead < len(LEADS):
+                continue
+            first = int(indices[start])
+            x = voltages[start:end]
+            self.lead_quality[lead].process(x, first)
+            for stage in self.lead_stages[lead]:
+                x = stage.process(x)
+            peaks.extend(event.sample_index for event in self.lead_detectors[lead].process(x, first))
+        return peaks
+
+
+def analyze_segment(segment: Segment, chain=None) -> SegmentResult:
+    """Run the processing chain and the R-peak detector over one segment (worker entry point)"""
+    started = time.process_time()
+    pipeline = _Pipeline(segment.sample_rate, chain or FILTER_CHAIN)
+    peaks = []
+    samples = clipped = 0
+    first_index = last_index = -1
+    with open(segment.path, 'rb') as f:
+        _seek_line(f, segment.warmup_start)
+        for indices, voltages, leads in _read_chunks(f, segment.start, segment.chunk_bytes, segment.columns):
+            pipeline.process(indices, voltages, leads)
+        pipeline.reset_counters()
+
+        for indices, voltages, leads in _read_chunks(f, segment.end, segment.chunk_bytes, segment.columns):
+            if not len(indices):
+                continue
+            if first_index < 0:
+                first_index = int(indices[0])
+            last_index = int(indices[-1])
+            samples += len(indices)
+            clipped += int(np.count_nonzero((voltages <= CLIP_MARGIN_V) | (voltages >= ADC_VREF - CLIP_MARGIN_V)))
+            peaks.extend(pipeline.process(indices, voltages, leads))
+        quality_windows, poor_windows = pipeline.quality_windows, pipeline.poor_windows
+        missing, gaps = pipeline.missing, pipeline.gaps
+
+        for indices, voltages, leads in _read_chunks(f, segment.tail_end, segment.chunk_bytes, segment.columns):
+            peaks.extend(pipeline.process(indices, voltages, leads))
+
+    peaks = np.array(peaks, dtype=np.int64)
+    peaks = peaks[(peaks >= first_index) & (peaks <= last_index)]
+    return SegmentResult(segment.path, segment.start, samples, first_index, last_index, peaks,
+                         missing, gaps, clipped, quality_windows, poor_windows,
+                         time.process_time() - started)
+
+
+def energy_path(path):
+    """ecg_data_*.csv recorded together with an ecg_samples_*.csv (None if there is none)"""
+    directory, name = os.path.split(path)
+    candidate = os.path.join(directory, name.replace("ecg_samples_", "ecg_data_", 1))
+    return candidate if candidate != path and os.path.exists(candidate) else None
+
+
+def count_discharges(path):
+    """(discharges, delivered energy J) in an energy CSV: one per entry into the DESCARGA states"""
+    parser = TelemetryLineParser()
+    discharges = 0
+    energy = 0.0
+    peak = None  # Highest e_total of the discharge in progress
+    with open(path, 'rb') as f:
+        f.readline()  # Header
+        while True:
+            data = f.read(ENERGY_READ_BYTES)
+            rows = parser.feed(data if data else b"\n")
+            for row in rows:
+                if row.estado.startswith("DESCARGA"):
+                    if peak is None:
+                        discharges += 1
+                        peak = 0.0
+                    peak = max(peak, row.e_total)
+                elif peak is not None:
+                    energy += peak
+                    peak = None
+            if not data:
+                break
+    if peak is not None:
+        energy += peak
+    return discharges, energy
+
+
+def summarize(path, results, sample_rate, discharges=(-1, float('nan'))) -> RecordingSummary:
+    """Merge the SegmentResults of one recording into its RecordingSummary"""
+    results = sorted((r for r in results if r.samples), key=lambda r: r.start)
+    nan = float('nan')
+    name = os.path.basename(path)
+    if not results:
+        return RecordingSummary(name, 0, 0.0, 0, nan, nan, nan, nan, 0, discharges[0], discharges[1], 0, 0, nan,
+                                nan)
+
+    peaks = np.sort(np.concatenate([r.peaks for r in results]))
+    if len(peaks) > 1:
+        # A beat right at a segment boundary may be reported by both segments
+        refractory = R_REFRACTORY_MS * sample_rate / 1000
+        peaks = peaks[np.r_[True, np.diff(peaks) > refractory]]
+    stats = HeartRateStats(sample_rate, window_beats=max(len(peaks), 1))
+    for r_index in peaks.tolist():
+        stats.add_peak(r_index)
+    hrv = stats.summary()
+
+    samples = sum(r.samples for r in results)
+    duration_s = (results[-1].last_index - results[0].first_index + 1) / sample_rate
+    missing = sum(r.missing for r in results)
+    gaps = sum(r.gaps for r in results)
+    clipped_pct = 100.0 * sum(r.clipped for r in results) / samples
+    quality_windows = sum(r.quality_windows for r in results)
+    poor_pct = 100.0 * sum(r.poor_windows for r in results) / quality_windows if quality_windows else nan
+    return RecordingSummary(name, samples, duration_s, len(peaks), 60000.0 / hrv.mean_rr_ms, hrv.sdnn_ms,
+                            hrv.rmssd_ms, hrv.pnn50, stats.rejected, discharges[0], discharges[1], missing, gaps,
+                            clipped_pct, poor_pct)
+
+
+def find_recordings(paths):
+    """ecg_samples_*.csv files given directly or found in the given directories"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "ecg_samples_*.csv"))))
+        elif os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def analyze(paths, workers=None, sample_rate=None, chain=None, segment_seconds=ANALYSIS_SEGMENT_SECONDS):
+    """Analyse every recording in paths on a process pool; returns (summaries, throughput dict)"""
+    files = find_recordings(paths)
+    plans = {path: plan_segments(path, sample_rate, segment_seconds) for path in files}
+    tasks = sum(len(segments) for segments in plans.values())
+    workers = max(1, min(workers or os.cpu_count() or 1, tasks or 1))
+
+    results = {path: [] for path in files}
+    discharges = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_segment, segment, chain): path
+                   for path, segments in plans.items() for segment in segments}
+        energy_futures = {path: pool.submit(count_discharges, energy_path(path))
+                          for path in files if energy_path(path)}
+        for future in as_completed(futures):
+            results[futures[future]].append(future.result())
+        for path, future in energy_futures.items():
+            discharges[path] = future.result()
+    wall_s = time.perf_counter() - started
+
+    summaries = []
+    for path in files:
+        rate = plans[path][0].sample_rate if plans[path] else (sample_rate or SAMPLE_RATE)
+        summaries.append(summarize(path, results[path], rate, discharges.get(path, (-1, float('nan')))))
+    samples = sum(s.samples for s in summaries)
+    cpu_s = sum(r.cpu_s for file_results in results.values() for r in file_results)
+    throughput = {
+        'files': len(files),
+        'segments': tasks,
+        'workers': workers,
+        'samples': samples,
+        'wall_s': wall_s,
+        'cpu_s': cpu_s,
+        'samples_per_s': samples / wall_s if wall_s > 0 else 0.0,
+        'samples_per_core_s': samples / cpu_s if cpu_s > 0 else 0.0,
+    }
+    return summaries, throughput
+
+
+def write_summaries(summaries, output):
+    """One CSV row per recording"""
+    with open(output, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(RecordingSummary._fields)
+        for summary in summaries:
+            writer.writerow(["" if isinstance(v, float) and math.isnan(v) else
+                             f"{v:.3f}" if isinstance(v, float) else v for v in summary])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis fuera de linea de las grabaciones de ECG")
+    parser.add_argument("paths", nargs="*", default=[RECORDINGS_DIR],
+                        help="Archivos ecg_samples_*.csv o carpetas que los contienen")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, uno por nucleo)")
+    parser.add_argument("--rate", type=int, default=None,
+                        help="Muestras/s (por defecto se estima con los timestamps de cada archivo)")
+    parser.add_argument("--segment-seconds", type=float, default=ANALYSIS_SEGMENT_SECONDS,
+                        help="Duracion de los segmentos que se reparten entre procesos")
+    parser.add_argument("--output", default=os.path.join(RECORDINGS_DIR, "analysis_summary.csv"),
+                        help="CSV con un resumen por archivo")
+    args = parser.parse_args(argv)
+
+    summaries, throughput = analyze(args.paths, args.workers, args.rate, segment_seconds=args.segment_seconds)
+    if not summaries:
+        print("No se encontraron grabaciones ecg_samples_*.csv")
+        return
+    write_summaries(summaries, args.output)
+
+    for s in summaries:
+        discharges = f"{s.discharges} descargas ({s.energy_j:.1f} J)" if s.discharges >= 0 else "sin archivo de energia"
+        print(f"{s.file}: {s.duration_s / 60:.1f} min, {s.beats} latidos, FC {s.heart_rate:.1f} lpm, "
+              f"SDNN {s.sdnn_ms:.1f} ms, {discharges}, {s.missing_samples} muestras perdidas, "
+              f"{s.clipped_pct:.2f}% saturado, {s.poor_quality_pct:.1f}% con mala calidad")
+    print("=" * 70)
+    print(f"{throughput['files']} archivos, {throughput['segments']} segmentos, {throughput['workers']} procesos, "
+          f"{throughput['samples']} muestras en {throughput['wall_s']:.1f} s")
+    print(f"Rendimiento: {throughput['samples_per_s'] / 1000:.0f} kmuestras/s en total, "
+          f"{throughput['samples_per_core_s'] / 1000:.0f} kmuestras/s por nucleo")
+    print(f"Resumen guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
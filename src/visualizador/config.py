@@ -1,30 +1,137 @@
 # Configuration file for ECG Monitor Application
+import os
 
-# Serial port configurations
-SERIAL_PORT_ESP32 = "COM8"
-SERIAL_PORT_ARDUINO = "COM1"
+# Serial port configurations (environment variables override, e.g. to point at the simulator)
+SERIAL_PORT_ESP32 = os.environ.get("VISUALIZADOR_PORT_ESP32", "COM8")
+SERIAL_PORT_ARDUINO = os.environ.get("VISUALIZADOR_PORT_ARDUINO", "COM1")
 BAUD_RATE = 115200
 
+# ESP32 front-ends to acquire from simultaneously (comma-separated in VISUALIZADOR_PORTS_ESP32).
+# The first one is the primary channel shown in the UI; all are merged into one multi-channel stream.
+ESP32_PORTS = [port.strip() for port in os.environ.get("VISUALIZADOR_PORTS_ESP32", SERIAL_PORT_ESP32).split(",") if port.strip()]
+MERGE_BUFFER_SECONDS = 1.0
+
+# Acquisition mode: "thread" runs one reader thread per port, "async" serves all ports from one
+# asyncio loop thread (POSIX), "process" runs the readers in a separate process that hands samples
+# over through a shared-memory ring of SHARED_RING_SECONDS
+ACQUISITION_MODE = os.environ.get("VISUALIZADOR_ACQUISITION_MODE", "thread")
+SHARED_RING_SECONDS = 10
+
+# Samples the UI can fall behind before the oldest are dropped (lock-free ring between acquisition and UI)
+UI_RING_SECONDS = 5
+
+# UI update tick: wall-clock budget for draining incoming data, and plot history length
+UI_DRAIN_BUDGET_MS = 8
+DISPLAY_BUFFER_SIZE = 10000
+
+# Also record every raw ECG sample to recordings/ecg_samples_*.csv (VISUALIZADOR_RECORD_SAMPLES=1; off by
+# default: the rows are written on the UI thread, outside UI_DRAIN_BUDGET_MS). Energy telemetry is always recorded
+RECORD_ECG_SAMPLES = os.environ.get("VISUALIZADOR_RECORD_SAMPLES", "0") == "1"
+
+# Display decimation: the plot gets at most DISPLAY_POINTS_PER_PIXEL points per pixel of width,
+# through a polyphase anti-aliasing decimator with DECIMATOR_TAPS_PER_PHASE taps per output phase
+DISPLAY_POINTS_PER_PIXEL = 2
+DECIMATOR_TAPS_PER_PHASE = 8
+
+# Serial read mode: "blocking" waits on the port with a timeout, "poll" checks in_waiting and sleeps
+SERIAL_READ_MODE = "blocking"
+ESP32_READ_LATENCY_MS = 5
+ESP32_MIN_CHUNK_BYTES = 256
+ARDUINO_READ_LATENCY_MS = 20
+ARDUINO_MIN_CHUNK_BYTES = 256
+
+# Reconnection: exponential backoff between attempts, and hot-plug watch of HOTPLUG_DIR
+# (the port is retried right away when a device appears there or the port path reappears)
+RECONNECT_INITIAL_S = 0.05
+RECONNECT_MAX_S = 2.0
+HOTPLUG_DIR = "/dev/serial/by-id"
+HOTPLUG_POLL_MS = 20
+
+# ESP32 frame protocol: "legacy" (4-byte frame per sample), "block" (multi-sample frame with
+# sequence counter and CRC16) or "auto" (switch to block frames as soon as one is seen).
+# Lost samples up to MAX_GAP_FILL_SAMPLES are filled with the last value to keep indices aligned.
+FRAME_PROTOCOL = os.environ.get("VISUALIZADOR_FRAME_PROTOCOL", "auto")
+MAX_GAP_FILL_SAMPLES = 4096
+
 # Debug mode
 DEBUG_MODE = False
 
 # Sampling and display configurations
-SAMPLE_RATE = 2000
+SAMPLE_RATE = int(os.environ.get("VISUALIZADOR_SAMPLE_RATE", 2000))
 WINDOW_SIZE = 1500
 Y_MIN = -0.5
 Y_MAX = 2
 refresh_interval = 25
 buffer_size = 3000
 
+# Signal processing chain, applied in order: "baseline" (EMA removal), "median" (moving-median
+# baseline removal, MEDIAN_BASELINE_MS windows in cascade), "notch" (mains), "bandpass"
+FILTER_CHAIN = ["baseline", "notch", "bandpass"]
+BASELINE_ALPHA = 0.995
+MEDIAN_BASELINE_MS = (200, 600)
+NOTCH_HZ = float(os.environ.get("VISUALIZADOR_MAINS_HZ", 50.0))  # 60 Hz mains: VISUALIZADOR_MAINS_HZ=60
+NOTCH_Q = 30.0
+BANDPASS_LOW_HZ = 0.5
+BANDPASS_HIGH_HZ = 40.0
+BANDPASS_ORDER = 2
+PROCESSING_QUEUE_BLOCKS = 1000
+
 # Peak detection parameters
 MIN_PEAK_HEIGHT = 0.05
 MIN_PEAK_DISTANCE = 50
 PEAK_WIDTH_MIN = 3
 PEAK_PROMINENCE = 0.02
 
+# Host-side R-peak detector (Pan-Tompkins on the processed signal), run by SignalProcessingService
+HOST_PEAK_DETECTION = True
+QRS_BAND_HZ = (5.0, 15.0)
+QRS_WINDOW_MS = 150  # Moving-window integration length
+R_REFRACTORY_MS = 200  # No second beat closer than this (or MIN_PEAK_DISTANCE samples)
+
+# Heart rate / HRV statistics: rolling window of RR intervals, HR averaged over the last few,
+# intervals outside RR_MIN_MS..RR_MAX_MS are treated as artifacts
+HRV_WINDOW_BEATS = 300
+HR_AVERAGE_BEATS = 8
+RR_MIN_MS = 250
+RR_MAX_MS = 2000
+
 # Post-R marker configuration
 POST_R_DELAY_MS = 20
 POST_R_DELAY_SAMPLES = int((POST_R_DELAY_MS / 1000) * SAMPLE_RATE)
 
+# Synchronized discharge: once armed, SYNC_FIRE_COMMAND is written to the Arduino POST_R_DELAY_SAMPLES
+# after the next R peak from SYNC_R_SOURCE ("esp32" firmware markers or "host" detector) by a
+# dedicated trigger thread. A shot that could not go out within SYNC_MAX_R_TO_FIRE_MS of the R peak is
+# skipped (kept armed for the next beat) so it never lands on the T wave. Host-detected R peaks arrive
+# ~50 ms (p99 ~70 ms) after the R wave, past POST_R_DELAY_MS, so the trigger refuses to arm with "host".
+SYNC_FIRE_COMMAND = "SYNC_FIRE"
+SYNC_R_SOURCE = "esp32"
+SYNC_MAX_R_TO_FIRE_MS = 60
+SYNC_TRIGGER_PRIORITY = 50  # SCHED_FIFO priority of the trigger thread where the OS allows it
+SYNC_SPIN_MS = 1.0  # Busy-wait the last part of the delay instead of sleeping
+SYNC_HISTORY = 1000  # Triggers kept for the latency distribution
+# GIL switch interval (s) set while the trigger runs so it wakes on time; None keeps the interpreter
+# default. It applies to the whole process (GUI and acquisition threads) and is restored on stop
+SYNC_SWITCH_INTERVAL_S = None
+
 # Lead configurations
-LEADS = ["DI", "DII", "DIII", "aVR"]
\ No newline at end of file
+LEADS = ["DI", "DII", "DIII", "aVR"]
+# Offline analysis of recordings (python -m visualizador.batch_analysis): files are split into
+# segments of ANALYSIS_SEGMENT_SECONDS analysed in parallel, each read in chunks of
+# ANALYSIS_CHUNK_SAMPLES; a segment first runs the chain over the ANALYSIS_WARMUP_SECONDS before it
+# so filters and detector thresholds have settled at its first sample
+ANALYSIS_CHUNK_SAMPLES = 65536
+ANALYSIS_SEGMENT_SECONDS = 600
+ANALYSIS_WARMUP_SECONDS = 10
+
+# Signal quality index: every SQI_HOP_MS the last SQI_WINDOW_MS of raw samples of the lead are checked
+# for a flat line (peak-to-peak below SQI_FLATLINE_V), samples at the 0/4095 ADC rails (more than
+# SQI_CLIP_FRACTION of the window), high-frequency noise (robust RMS of the sample-to-sample
+# difference above SQI_NOISE_V) and baseline jumps (median of the last hop vs the first one)
+SIGNAL_QUALITY = True
+SQI_WINDOW_MS = 1000
+SQI_HOP_MS = 250
+SQI_FLATLINE_V = 0.01
+SQI_CLIP_FRACTION = 0.01
+SQI_NOISE_V = 0.02
+SQI_BASELINE_JUMP_V = 0.4
@@ -0,0 +1,112 @@
+import itertools
+import threading
+import time
+
+DATA_BUS_CAPACITY = 4096  # Blocks kept for subscribers
+
+
+class DataSubscription:
+    """One consumer's read cursor over a DataBus
+
+    Items are the published objects themselves (SampleBlock, ADCData,
+    MultiChannelBlock...), shared by every subscriber without copying; treat
+    them as read-only.
+    """
+
+    def __init__(self, bus, name=None, kinds=None):
+        self.bus = bus
+        self.name = name
+        self.kinds = tuple(kinds) if kinds else None  # Only deliver these types
+        self.cursor = bus.published  # Sequence number of the next item to read
+        self.dropped = 0  # Items overwritten before this subscriber read them
+        self.received = 0
+        self.ready = threading.Event()
+
+    @property
+    def lag(self) -> int:
+        """Items published but not yet read by this subscriber"""
+        return max(self.bus.published - self.cursor, 0)
+
+    def poll(self, max_items=None):
+        """Return the pending items (oldest first) without waiting"""
+        self.ready.clear()
+        slots = self.bus.slots
+        capacity = self.bus.capacity
+        items = []
+        while max_items is None or len(items) < max_items:
+            slot = slots[self.cursor % capacity]
+            if slot is None or slot[0] < self.cursor:
+                break  # Not published yet
+            seq, item = slot
+            if seq > self.cursor:
+                # Lapped: skip to the oldest item that can still be in the buffer
+                oldest = seq - capacity + 1
+                self.dropped += oldest - self.cursor
+                self.cursor = oldest
+                continue
+            self.cursor += 1
+            if self.kinds is None or isinstance(item, self.kinds):
+                items.append(item)
+        self.received += len(items)
+        return items
+
+    def get(self, timeout=None):
+        """Return the next item, waiting up to timeout seconds (None if nothing arrived)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            items = self.poll(1)
+            if items:
+                return items[0]
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self.ready.wait(remaining)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def stats(self) -> dict:
+        return {'name': self.name, 'lag': self.lag, 'dropped': self.dropped, 'received': self.received}
+
+
+class DataBus:
+    """Broadcast bus: every published block is shared by all subscribers
+
+    Producers claim a sequence number and store (seq, item) in a fixed ring of
+    slots; no lock is taken and nobody waits for consumers. Each subscriber
+    reads with its own cursor, so a slow subscriber only loses its own oldest
+    items (counted in its `dropped`) and never delays acquisition or the other
+    subscribers.
+    """
+
+    def __init__(self, capacity=DATA_BUS_CAPACITY):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.published = 0
+        self.subscriptions = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()  # Only guards (un)subscribe
+
+    def subscribe(self, name=None, kinds=None) -> DataSubscription:
+        """New subscriber that receives items published from now on (optionally only of the given types)"""
+        subscription = DataSubscription(self, name, kinds)
+        with self._lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def publish(self, item):
+        seq = next(self._sequence)
+        self.slots[seq % self.capacity] = (seq, item)
+        if seq >= self.published:
+            self.published = seq + 1
+        for subscription in self.subscriptions:
+            if not subscription.ready.is_set():
+                subscription.ready.set()
+
+    def stats(self):
+        """Lag and dropped counts of every subscriber"""
+        return [subscription.stats() for subscription in self.subscriptions]
@@ -1,8 +1,12 @@
 import csv
 import os
+from collections import deque
 from datetime import datetime
+import numpy as np
+from .config import SAMPLE_RATE, RECORD_ECG_SAMPLES
 
 RECORDINGS_DIR = "recordings"
+ECG_ROW_FORMAT = "%d,%.3f,%.5f,%d\n"
 
 def ensure_recordings_dir():
     """Ensure recordings directory exists"""
@@ -46,17 +50,53 @@ def write_csv_row(csv_writer, csv_file, timestamp, vcap, corriente, e_f1, e_f2,
         ])
         csv_file.flush()
 
+def init_ecg_csv():
+    """Inicializa archivo CSV de muestras ECG"""
+    ensure_recordings_dir()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ecg_filename = os.path.join(RECORDINGS_DIR, f"ecg_samples_{timestamp}.csv")
+
+    ecg_file = open(ecg_filename, 'w', newline='')
+    ecg_file.write("Muestra,Timestamp_ms,Voltaje_V,Derivacion\n")
+    ecg_file.flush()
+
+    print(f"Archivo CSV de muestras creado: {ecg_filename}")
+    return ecg_filename, ecg_file
+
+def write_ecg_block(ecg_file, first_index, timestamps, voltages, leads=0):
+    """Escribe un bloque de muestras ECG en CSV
+
+    timestamps puede ser un arreglo por muestra o el timestamp de la primera muestra;
+    leads, el índice de derivación de cada muestra o uno para todo el bloque.
+    """
+    if ecg_file and len(voltages):
+        n = len(voltages)
+        indices = np.arange(first_index, first_index + n)
+        if np.ndim(timestamps) == 0:
+            timestamps = timestamps + np.arange(n) * (1000.0 / SAMPLE_RATE)
+        rows = np.column_stack((indices, timestamps, voltages, np.broadcast_to(leads, (n,))))
+        # Whole block in one formatting call (np.savetxt formats row by row in Python)
+        ecg_file.write(ECG_ROW_FORMAT * n % tuple(rows.ravel().tolist()))
+        ecg_file.flush()
+
 class DataRecorder:
-    def __init__(self):
+    def __init__(self, record_samples=RECORD_ECG_SAMPLES):
         self.csv_filename = None
         self.csv_file = None
         self.csv_writer = None
+        self.ecg_filename = None
+        self.ecg_file = None
+        self.record_samples = record_samples  # Raw ECG samples too, not only energy telemetry
         self.is_recording = True  # Start recording by default
+        self.lead_index = 0  # Lead of the next sample to write
+        self.lead_changes = deque()  # (sample_index, lead_index) not reached by the samples yet
 
     def start_recording(self):
         """Start or resume recording"""
         if not self.csv_file:
             self.csv_filename, self.csv_file, self.csv_writer = init_csv()
+        if self.record_samples and not self.ecg_file:
+            self.ecg_filename, self.ecg_file = init_ecg_csv()
         self.is_recording = True
 
     def stop_recording(self):
@@ -68,8 +108,31 @@ class DataRecorder:
         if self.is_recording and self.csv_writer and self.csv_file:
             write_csv_row(self.csv_writer, self.csv_file, timestamp, vcap, corriente, e_f1, e_f2, e_total, estado)
 
+    def lead_changed(self, sample_index, lead_index):
+        """Samples from sample_index on belong to lead_index"""
+        self.lead_changes.append((sample_index, lead_index))
+
+    def _leads_of(self, first_index, n):
+        """Lead index of each sample of a block, applying the changes it reaches"""
+        leads = self.lead_index
+        while self.lead_changes and self.lead_changes[0][0] < first_index + n:
+            sample_index, self.lead_index = self.lead_changes.popleft()
+            if np.ndim(leads) == 0:
+                leads = np.full(n, leads, dtype=np.int64)
+            leads[max(sample_index - first_index, 0):] = self.lead_index
+        return leads
+
+    def write_samples(self, first_index, timestamps, voltages):
+        """Write a block of ECG samples if recording is active"""
+        leads = self._leads_of(first_index, len(voltages))
+        if self.is_recording and self.ecg_file:
+            write_ecg_block(self.ecg_file, first_index, timestamps, voltages, leads)
+
     def close(self):
         """Close the CSV file"""
         if self.csv_file:
             self.csv_file.close()
-            print(f"Archivo CSV guardado: {self.csv_filename}")
\ No newline at end of file
+            print(f"Archivo CSV guardado: {self.csv_filename}")
+        if self.ecg_file:
+            self.ecg_file.close()
+            print(f"Archivo CSV guardado: {self.ecg_filename}")
\ No newline at end of file
@@ -0,0 +1,55 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+from .config import DISPLAY_POINTS_PER_PIXEL, DECIMATOR_TAPS_PER_PHASE
+
+
+def choose_decimation(window_samples: int, pixel_width: int, points_per_pixel=DISPLAY_POINTS_PER_PIXEL) -> int:
+    """Largest factor that still leaves points_per_pixel points per pixel across the window"""
+    return max(1, int(window_samples) // max(int(pixel_width) * points_per_pixel, 1))
+
+
+class PolyphaseDecimator:
+    """Streaming anti-aliased decimation by an integer factor
+
+    Kaiser-windowed FIR low-pass at the output Nyquist (the design
+    resample_poly uses), evaluated only at the kept outputs, so the cost is
+    DECIMATOR_TAPS_PER_PHASE multiply-adds per input sample whatever the
+    factor. The last taps-1 inputs are carried between blocks. Outputs fall
+    on sample indices that are multiples of the factor and are re-indexed by
+    the filter delay, so they line up with the input on a sample axis.
+    """
+
+    def __init__(self, factor: int, taps_per_phase=DECIMATOR_TAPS_PER_PHASE):
+        self.factor = factor
+        if factor > 1:
+            length = factor * taps_per_phase + 1
+            self.taps = signal.firwin(length, 1.0 / factor, window=('kaiser', 5.0))[::-1].copy()
+        else:
+            self.taps = np.ones(1)
+        self.delay = (len(self.taps) - 1) // 2
+        self.reset()
+
+    def reset(self):
+        self.history = None
+        self.next_index = None
+
+    def process(self, x: np.ndarray, first_index: int):
+        """Decimate a block starting at sample first_index; returns (values, sample_indices)"""
+        n = len(x)
+        if n == 0 or self.factor == 1:
+            return x, np.arange(first_index, first_index + n, dtype=np.int64)
+        if first_index != self.next_index:
+            # Start (or restart after a gap) in steady state on the first sample
+            self.history = np.full(len(self.taps) - 1, float(x[0]))
+        self.next_index = first_index + n
+
+        extended = np.concatenate((self.history, x))
+        self.history = extended[n:]
+        out_indices = np.arange(first_index + (-first_index) % self.factor, first_index + n, self.factor,
+                                dtype=np.int64)
+        if len(out_indices) == 0:
+            return np.empty(0), out_indices
+        # Window q ends at sample first_index + q
+        windows = sliding_window_view(extended, len(self.taps))[out_indices - first_index]
+        return windows @ self.taps, out_indices - self.delay
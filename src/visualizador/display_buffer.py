@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class DisplayBuffer:
+    """Preallocated history of the samples shown in the plot
+
+    Every sample is stored twice, at position p and p + capacity, so the most
+    recent N samples are always one contiguous slice: extend() is a few slice
+    assignments and latest() returns views without copying or wrapping.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        self.capacity = capacity
+        self.values = np.zeros(2 * capacity, dtype=dtype)
+        self.indices = np.zeros(2 * capacity, dtype=np.int64)
+        self.count = 0  # Samples ever added
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    def drop_newest(self, n: int):
+        """Forget the newest n samples"""
+        self.count -= min(n, len(self))
+
+    def extend(self, values: np.ndarray, indices: np.ndarray, gain: float = 1.0):
+        """Append a block, multiplying the values by gain on the way in"""
+        n = len(values)
+        if n == 0:
+            return
+        if n > self.capacity:
+            values = values[-self.capacity:]
+            indices = indices[-self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+
+        pos = self.count % self.capacity
+        first = min(n, self.capacity - pos)
+        for base in (0, self.capacity):
+            np.multiply(values[:first], gain, out=self.values[base + pos:base + pos + first])
+            self.indices[base + pos:base + pos + first] = indices[:first]
+            if first < n:
+                np.multiply(values[first:], gain, out=self.values[base:base + n - first])
+                self.indices[base:base + n - first] = indices[first:]
+        self.count += n
+
+    def latest(self, n: int = None):
+        """Views of the newest n samples (all stored ones by default): (values, indices)"""
+        n = len(self) if n is None else min(n, len(self))
+        end = self.count % self.capacity + self.capacity
+        return self.values[end - n:end], self.indices[end - n:end]
@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+
+EVENT_BUFFER_SIZE = 1000
+
+
+class EventSubscription:
+    """One consumer's view of an EventBus: a bounded FIFO of (timestamp_ms, event)"""
+
+    def __init__(self, maxlen=EVENT_BUFFER_SIZE):
+        self.events = deque(maxlen=maxlen)
+        self.dropped = 0  # Events lost because this consumer fell maxlen behind
+
+    def __len__(self):
+        return len(self.events)
+
+    def drain(self):
+        """Return every pending (timestamp_ms, event) pair, oldest first"""
+        items = []
+        popleft = self.events.popleft
+        try:
+            for _ in range(len(self.events)):
+                items.append(popleft())
+        except IndexError:
+            pass
+        return items
+
+
+class EventBus:
+    """Low-volume typed event channel, separate from the bulk sample path
+
+    Carries LeadChangeEvent, RPeakEvent, DischargeEvent and EnergyEvent (and
+    any other typed event) with a host timestamp. Producers on any thread
+    append to every subscription; deque appends and pops are atomic, so
+    neither side takes a lock. Each subscriber drains its own FIFO completely
+    every time, so status updates are never queued behind waveform samples.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self.lock = threading.Lock()  # Only guards (un)subscribe
+        self.published = 0
+
+    def subscribe(self, maxlen=EVENT_BUFFER_SIZE) -> EventSubscription:
+        subscription = EventSubscription(maxlen)
+        with self.lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def publish(self, event, timestamp_ms):
+        self.published += 1
+        for subscription in self.subscriptions:
+            if len(subscription.events) == subscription.events.maxlen:
+                subscription.dropped += 1
+            subscription.events.append((timestamp_ms, event))
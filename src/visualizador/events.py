@@ -0,0 +1,46 @@
+from typing import NamedTuple
+
+
+class LeadChangeEvent(NamedTuple):
+    """ESP32 confirmed a lead (derivación) change"""
+    sample_index: int  # Index of the first sample acquired on the new lead
+    lead_index: int
+    lead_name: str
+
+
+class RPeakEvent(NamedTuple):
+    """R-peak reported by the ESP32 firmware or found by the host detector"""
+    sample_index: int
+    latency_samples: int = 0  # Samples acquired after the peak before it was detected (host only)
+    source: str = "esp32"  # "esp32" (firmware R_PEAK marker) or "host" (RPeakDetector)
+
+
+class DischargeEvent(NamedTuple):
+    """Discharge (disparo) reported by the ESP32 firmware"""
+    sample_index: int
+    text: str
+
+
+class EnergyEvent(NamedTuple):
+    """Energy telemetry update from the Arduino"""
+    timestamp: int  # Arduino millis()
+    vcap: float
+    corriente: float
+    e_f1: float
+    e_f2: float
+    e_total: float
+    estado: str
+
+
+class ChannelEvent(NamedTuple):
+    """Event of a non-primary ESP32 front-end (multi-port acquisition)"""
+    channel: int  # Index in ESP32_PORTS
+    event: tuple  # LeadChangeEvent, RPeakEvent or DischargeEvent, with that channel's sample index
+
+
+class QualityEvent(NamedTuple):
+    """Signal quality of a lead changed (SignalQualityIndex)"""
+    sample_index: int  # Last sample of the window that changed it
+    lead_index: int
+    issues: tuple = ()  # "flatline", "clipping", "noise", "baseline_jump"; empty when the signal is usable
+    noise_v: float = 0.0  # High-frequency noise estimate of that window (V RMS)
@@ -0,0 +1,68 @@
+import numpy as np
+from scipy import signal
+
+
+class SosFilter:
+    """Stateful IIR filter in second-order sections
+
+    The filter state (zi) is kept between calls, so a stream can be filtered
+    block by block with the same result as filtering it in one piece.
+    """
+
+    def __init__(self, sos: np.ndarray, name: str = "sos"):
+        self.sos = sos
+        self.name = name
+        self.zi = None
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if len(x) == 0:
+            return np.asarray(x, dtype=np.float64)
+        if self.zi is None:
+            # Start in steady state for the first sample to avoid a startup transient
+            self.zi = signal.sosfilt_zi(self.sos) * x[0]
+        y, self.zi = signal.sosfilt(self.sos, x, zi=self.zi)
+        return y
+
+    def reset(self):
+        self.zi = None
+
+
+def bandpass_filter(sample_rate, low_hz, high_hz, order=2) -> SosFilter:
+    """Butterworth band-pass"""
+    sos = signal.butter(order, [low_hz, high_hz], btype='bandpass', fs=sample_rate, output='sos')
+    return SosFilter(sos, "bandpass")
+
+
+def notch_filter(sample_rate, freq_hz, quality=30.0) -> SosFilter:
+    """Narrow band-stop at the mains frequency"""
+    b, a = signal.iirnotch(freq_hz, quality, fs=sample_rate)
+    return SosFilter(signal.tf2sos(b, a), "notch")
+
+
+class BaselineEMA:
+    """Exponential moving average filter for baseline drift removal"""
+
+    def __init__(self, alpha=0.995):
+        self.alpha = alpha
+        self.name = "baseline"
+        self.baseline = None
+
+    def process_sample(self, voltage):
+        """One sample: returns (filtered_voltage, baseline)"""
+        if self.baseline is None:
+            self.baseline = voltage
+        self.baseline = self.alpha * self.baseline + (1 - self.alpha) * voltage
+        return voltage - self.baseline, self.baseline
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """A block at once (same recursion, run by lfilter with carried state)"""
+        if len(x) == 0:
+            return np.asarray(x, dtype=np.float64)
+        if self.baseline is None:
+            self.baseline = float(x[0])
+        baseline, zi = signal.lfilter([1 - self.alpha], [1, -self.alpha], x, zi=[self.alpha * self.baseline])
+        self.baseline = float(baseline[-1])
+        return x - baseline
+
+    def reset(self):
+        self.baseline = None
@@ -0,0 +1,178 @@
+from typing import NamedTuple
+import numpy as np
+from .config import FRAME_PROTOCOL, MAX_GAP_FILL_SAMPLES
+from .block_frame import scan_block_frames
+
+FRAME_START = 0xAA
+FRAME_SIZE = 4
+ADC_VREF = 3.3
+ADC_MAX_CODE = 4095.0
+
+PROTOCOL_LEGACY = "legacy"
+PROTOCOL_BLOCK = "block"
+PROTOCOL_AUTO = "auto"
+
+
+class FrameScan(NamedTuple):
+    """Result of decoding one buffer"""
+    voltages: np.ndarray
+    starts: np.ndarray  # Byte offset of every accepted frame
+    ends: np.ndarray  # Byte offset just past every accepted frame
+    sample_offsets: np.ndarray  # Samples emitted before each frame (one extra entry: total)
+    consumed: int  # Leading bytes that can be discarded
+    seqs: np.ndarray = None  # Device sample counter (mod 2**16) of every accepted block frame
+
+
+class FrameDecoder:
+    """Block decoder for the ESP32 binary stream
+
+    Understands the legacy 4-byte frame (0xAA, LSB, MSB, XOR checksum) and the
+    multi-sample block frame with sequence counter and CRC16 (see block_frame).
+    In "auto" mode the decoder switches to the block protocol for good as soon
+    as it sees a CRC-valid block frame.
+    """
+
+    def __init__(self, protocol: str = FRAME_PROTOCOL):
+        self.protocol = protocol
+        self.pending = b""  # Incomplete frame bytes carried to the next read
+        self.valid_packets = 0
+        self.invalid_packets = 0
+        self.lost_samples = 0  # Detected through block frame sequence gaps
+        self.expected_seq = None
+        self.last_voltage = 0.0
+
+    @property
+    def active_protocol(self) -> str:
+        return PROTOCOL_LEGACY if self.protocol == PROTOCOL_AUTO else self.protocol
+
+    def scan(self, buf: np.ndarray):
+        """Find valid legacy frame starts in a uint8 buffer
+
+        Returns (starts, consumed): the start offset of every accepted frame and
+        the number of leading bytes that can be discarded.
+        """
+        limit = len(buf) - (FRAME_SIZE - 1)
+        if limit <= 0:
+            return np.empty(0, dtype=np.int64), self._keep_tail(buf, 0)
+
+        head = buf[:limit]
+        is_start = head == FRAME_START
+        checksum_ok = (head ^ buf[1:limit + 1] ^ buf[2:limit + 2]) == buf[3:limit + 3]
+        starts = np.flatnonzero(is_start & checksum_ok)
+
+        # A data byte can look like a valid frame start inside another frame;
+        # resolve the (rare) overlaps greedily, like the old sequential scan.
+        if len(starts) > 1 and np.any(np.diff(starts) < FRAME_SIZE):
+            accepted = []
+            next_free = -1
+            for start in starts.tolist():
+                if start >= next_free:
+                    accepted.append(start)
+                    next_free = start + FRAME_SIZE
+            starts = np.array(accepted, dtype=np.int64)
+
+        # Every 0xAA not covered by an accepted frame was a corrupted packet
+        sync_bytes = np.flatnonzero(is_start)
+        if len(starts):
+            owner = np.searchsorted(starts, sync_bytes, side='right') - 1
+            covered = (owner >= 0) & (sync_bytes - starts[np.maximum(owner, 0)] < FRAME_SIZE)
+            self.invalid_packets += int(len(sync_bytes) - np.count_nonzero(covered))
+            consumed = max(int(starts[-1]) + FRAME_SIZE, limit)
+        else:
+            self.invalid_packets += len(sync_bytes)
+            consumed = limit
+
+        self.valid_packets += len(starts)
+        return starts, self._keep_tail(buf, consumed)
+
+    @staticmethod
+    def _keep_tail(buf: np.ndarray, consumed: int) -> int:
+        """Consumed bytes once the tail is kept only from its first sync byte (a frame can't start elsewhere)"""
+        sync = np.flatnonzero(buf[consumed:] == FRAME_START)
+        return consumed + int(sync[0]) if len(sync) else len(buf)
+
+    @staticmethod
+    def to_voltage(buf: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """Convert the 12-bit codes of the given legacy frames to volts"""
+        codes = (buf[starts + 2].astype(np.uint16) << 8) | buf[starts + 1]
+        return codes * (ADC_VREF / ADC_MAX_CODE)
+
+    def decode_buffer(self, buf: np.ndarray) -> FrameScan:
+        """Decode every complete frame in buf with the active (or detected) protocol"""
+        if self.protocol != PROTOCOL_LEGACY:
+            scan = self._decode_block(buf)
+            if len(scan.starts) or self.protocol == PROTOCOL_BLOCK:
+                if self.protocol == PROTOCOL_AUTO:
+                    print("[ESP32] Protocolo de bloques detectado")
+                    self.protocol = PROTOCOL_BLOCK
+                return scan
+            # Still auto: keep a block frame that is not complete yet for the next read
+            buf = buf[:scan.consumed]
+
+        starts, consumed = self.scan(buf)
+        voltages = self.to_voltage(buf, starts)
+        if len(voltages):
+            self.last_voltage = float(voltages[-1])
+        return FrameScan(
+            voltages=voltages,
+            starts=starts,
+            ends=starts + FRAME_SIZE,
+            sample_offsets=np.arange(len(starts) + 1),
+            consumed=consumed
+        )
+
+    def _decode_block(self, buf: np.ndarray) -> FrameScan:
+        starts, counts, seqs, codes, consumed, crc_errors = scan_block_frames(buf)
+        self.invalid_packets += crc_errors
+        self.valid_packets += len(starts)
+        if not len(starts):
+            empty = np.empty(0, dtype=np.int64)
+            return FrameScan(np.empty(0), empty, empty, np.zeros(1, dtype=np.int64), consumed, empty)
+
+        # Sequence gaps between consecutive frames (first one against the previous read)
+        expected = np.empty(len(seqs), dtype=np.int64)
+        expected[0] = seqs[0] if self.expected_seq is None else self.expected_seq
+        expected[1:] = (seqs[:-1] + counts[:-1]) & 0xFFFF
+        gaps = (seqs - expected) & 0xFFFF
+        gaps[gaps >= 0x8000] = 0  # Going backwards means the device restarted
+        self.expected_seq = int((seqs[-1] + counts[-1]) & 0xFFFF)
+        self.lost_samples += int(gaps.sum())
+
+        volts = [frame_codes * (ADC_VREF / ADC_MAX_CODE) for frame_codes in codes]
+        fills = np.minimum(gaps, MAX_GAP_FILL_SAMPLES)
+        if fills.any():
+            # Hold the last value over lost samples so sample indices stay in step with device time
+            pieces = []
+            last = self.last_voltage
+            for fill, frame_volts in zip(fills.tolist(), volts):
+                if fill:
+                    pieces.append(np.full(fill, last))
+                pieces.append(frame_volts)
+                last = frame_volts[-1]
+            volts = pieces
+
+        voltages = np.concatenate(volts)
+        self.last_voltage = float(voltages[-1])
+        sample_offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+        np.cumsum(fills + counts, out=sample_offsets[1:])
+        sample_offsets[:-1] += fills  # Events before a frame come after its gap fill
+        return FrameScan(
+            voltages=voltages,
+            starts=starts,
+            ends=starts + counts * 3 // 2 + 7,
+            sample_offsets=sample_offsets,
+            consumed=consumed,
+            seqs=seqs
+        )
+
+    def decode(self, raw_bytes: bytes) -> np.ndarray:
+        """Decode every complete frame in raw_bytes (plus carried bytes) to volts"""
+        data = self.pending + bytes(raw_bytes)
+        scan = self.decode_buffer(np.frombuffer(data, dtype=np.uint8))
+        self.pending = data[scan.consumed:]
+        return scan.voltages
+
+    def reset(self):
+        """Drop any partial frame (e.g. after a reconnect)"""
+        self.pending = b""
+        self.expected_seq = None
@@ -0,0 +1,125 @@
+from typing import NamedTuple
+import math
+import numpy as np
+from .config import SAMPLE_RATE, HRV_WINDOW_BEATS, HR_AVERAGE_BEATS, RR_MIN_MS, RR_MAX_MS
+
+
+class HRVSummary(NamedTuple):
+    """Heart rate and variability over the rolling window (NaN until there are enough beats)"""
+    heart_rate: float  # bpm, over the last HR_AVERAGE_BEATS intervals
+    mean_rr_ms: float
+    sdnn_ms: float
+    rmssd_ms: float
+    pnn50: float  # % of successive differences above 50 ms
+    intervals: int  # RR intervals in the window
+    beats: int  # R peaks seen since the start
+
+
+class _RollingSum:
+    """Fixed-size ring of values with running sum and sum of squares
+
+    Each push is O(1). The sums are recomputed from the ring once per
+    capacity pushes, so float rounding cannot accumulate over long sessions.
+    """
+
+    def __init__(self, capacity):
+        self.values = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0  # Values ever pushed
+        self.total = 0.0
+        self.squares = 0.0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def push(self, value):
+        pos = self.count % self.capacity
+        if self.count >= self.capacity:
+            old = self.values[pos]
+            self.total -= old
+            self.squares -= old * old
+        self.values[pos] = value
+        self.total += value
+        self.squares += value * value
+        self.count += 1
+        if pos == self.capacity - 1:
+            self.total = float(self.values.sum())
+            self.squares = float(np.dot(self.values, self.values))
+
+    def latest(self, n):
+        """The last n values pushed (n is clipped to the ones stored)"""
+        n = min(n, len(self))
+        return self.values[(self.count - 1 - np.arange(n)) % self.capacity]
+
+    def clear(self):
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+
+class HeartRateStats:
+    """Rolling HR/HRV statistics fed one R peak at a time
+
+    RR intervals live in a fixed ring of HRV_WINDOW_BEATS with running sums,
+    so every beat costs O(1) and reading the summary never rescans the
+    history. Intervals outside RR_MIN_MS..RR_MAX_MS (missed or extra beats,
+    gaps) are skipped and break the chain of successive differences.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, window_beats=HRV_WINDOW_BEATS):
+        self.sample_rate = sample_rate
+        self.rr = _RollingSum(window_beats)
+        self.successive = _RollingSum(window_beats)  # Differences between consecutive valid RRs
+        self.nn50 = np.zeros(window_beats, dtype=bool)
+        self.nn50_count = 0
+        self.beats = 0
+        self.rejected = 0
+        self.last_r = None
+        self.last_rr = None  # Previous valid RR (ms) if it is contiguous with the next one
+
+    def reset(self):
+        self.rr.clear()
+        self.successive.clear()
+        self.nn50_count = 0
+        self.beats = 0
+        self.rejected = 0
+        self.last_r = None
+        self.last_rr = None
+
+    def add_peak(self, sample_index: int):
+        """Account for one R peak given by its sample index"""
+        self.beats += 1
+        if self.last_r is None or sample_index <= self.last_r:
+            self.last_r = sample_index
+            return
+        rr_ms = (sample_index - self.last_r) * 1000.0 / self.sample_rate
+        self.last_r = sample_index
+        if not RR_MIN_MS <= rr_ms <= RR_MAX_MS:
+            self.rejected += 1
+            self.last_rr = None
+            return
+
+        self.rr.push(rr_ms)
+
+        if self.last_rr is not None:
+            difference = rr_ms - self.last_rr
+            pos = self.successive.count % self.successive.capacity
+            if self.successive.count >= self.successive.capacity:
+                self.nn50_count -= int(self.nn50[pos])
+            self.nn50[pos] = abs(difference) > 50.0
+            self.nn50_count += int(self.nn50[pos])
+            self.successive.push(difference)
+        self.last_rr = rr_ms
+
+    def summary(self) -> HRVSummary:
+        nan = float('nan')
+        n = len(self.rr)
+        if n == 0:
+            return HRVSummary(nan, nan, nan, nan, nan, 0, self.beats)
+        mean = float(self.rr.total) / n
+        heart_rate = 60000.0 / float(self.rr.latest(HR_AVERAGE_BEATS).mean())
+        sdnn = math.sqrt(max(self.rr.squares - n * mean * mean, 0.0) / (n - 1)) if n > 1 else nan
+        d = len(self.successive)
+        rmssd = math.sqrt(max(self.successive.squares, 0.0) / d) if d else nan
+        pnn50 = 100.0 * self.nn50_count / d if d else nan
+        return HRVSummary(heart_rate, mean, sdnn, rmssd, pnn50, n, self.beats)
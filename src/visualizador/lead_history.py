@@ -0,0 +1,119 @@
+from collections import deque
+import numpy as np
+from .display_buffer import DisplayBuffer
+from .decimator import PolyphaseDecimator
+from .config import LEADS, DISPLAY_BUFFER_SIZE
+
+
+class LeadHistory:
+    """Display history kept per lead, split at the LEAD_CHANGE sample boundaries
+
+    One DisplayBuffer per entry in LEADS. Incoming samples go to the buffer of
+    the lead they were acquired on (`acquired`), switching exactly at the
+    sample index reported by LEAD_CHANGE, so a buffer never mixes leads.
+    Showing a lead (`shown`) only selects its buffer: switching back to a
+    lead puts its recent history on screen at once, without copying.
+
+    With a decimation factor above 1 every lead also streams its samples
+    through a PolyphaseDecimator into a second buffer at the display rate,
+    which is what the plot draws.
+    """
+
+    def __init__(self, leads=LEADS, capacity=DISPLAY_BUFFER_SIZE):
+        self.leads = list(leads)
+        self.capacity = capacity
+        self.buffers = [DisplayBuffer(capacity) for _ in self.leads]
+        self.acquired = 0  # Lead of the incoming samples
+        self.shown = 0  # Lead on screen
+        self.boundaries = deque()  # (sample_index, lead_index) changes the stream has not reached yet
+        self.factor = 1
+        self.decimators = [PolyphaseDecimator(1) for _ in self.leads]
+        self.decimated = [DisplayBuffer(capacity) for _ in self.leads]
+
+    @property
+    def current(self) -> DisplayBuffer:
+        """Full-rate buffer of the lead on screen"""
+        return self.buffers[self.shown]
+
+    def show(self, lead_index: int):
+        if 0 <= lead_index < len(self.buffers):
+            self.shown = lead_index
+
+    def clear(self):
+        for buffer, decimated, decimator in zip(self.buffers, self.decimated, self.decimators):
+            buffer.clear()
+            decimated.clear()
+            decimator.reset()
+        self.boundaries.clear()
+
+    def latest_display(self, window_samples: int):
+        """Display-rate (values, sample indices) covering the newest window_samples of the shown lead"""
+        if self.factor == 1:
+            return self.buffers[self.shown].latest(window_samples)
+        return self.decimated[self.shown].latest(-(-window_samples // self.factor))
+
+    def set_decimation(self, factor: int):
+        """Change the display decimation, re-decimating the stored history of every lead"""
+        factor = max(1, int(factor))
+        if factor == self.factor:
+            return
+        self.factor = factor
+        for lead_index in range(len(self.buffers)):
+            self.decimators[lead_index] = PolyphaseDecimator(factor)
+            self._redecimate(lead_index)
+
+    def _redecimate(self, lead_index: int):
+        """Rebuild a lead's display-rate buffer from its full-rate history"""
+        self.decimated[lead_index].clear()
+        self.decimators[lead_index].reset()
+        if self.factor == 1:
+            return
+        values, indices = self.buffers[lead_index].latest()
+        # One call per contiguous run, so the decimator restarts at every gap
+        breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+        for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(values)]):
+            self._decimate(lead_index, values[start:end], indices[start:end])
+
+    def _decimate(self, lead_index, values, indices, gain=1.0):
+        if len(values):
+            y, y_indices = self.decimators[lead_index].process(values, int(indices[0]))
+            self.decimated[lead_index].extend(y, y_indices, gain)
+
+    def _append(self, lead_index, values, indices, gain):
+        self.buffers[lead_index].extend(values, indices, gain)
+        if self.factor > 1:
+            self._decimate(lead_index, values, indices, gain)
+
+    def lead_changed(self, sample_index: int, lead_index: int):
+        """Samples from sample_index on belong to lead_index"""
+        if not 0 <= lead_index < len(self.buffers):
+            return
+        buffer = self.buffers[self.acquired]
+        values, indices = buffer.latest()
+        if self.boundaries or not len(indices) or indices[-1] < sample_index:
+            self.boundaries.append((sample_index, lead_index))
+            return
+
+        # The change was reported after some of its samples were stored: move that tail over
+        start = int(np.searchsorted(indices, sample_index))
+        tail_values = values[start:].copy()
+        tail_indices = indices[start:].copy()
+        buffer.drop_newest(len(tail_values))
+        self.buffers[lead_index].extend(tail_values, tail_indices)
+        if self.factor > 1:
+            self._redecimate(self.acquired)
+            self._redecimate(lead_index)
+        self.acquired = lead_index
+
+    def extend(self, values: np.ndarray, indices: np.ndarray, gain: float = 1.0):
+        """Append a block of samples, splitting it at pending lead changes"""
+        while self.boundaries and len(values):
+            sample_index, lead_index = self.boundaries[0]
+            split = int(np.searchsorted(indices, sample_index))
+            if split == len(indices):
+                break  # Change not reached yet
+            self._append(self.acquired, values[:split], indices[:split], gain)
+            values, indices = values[split:], indices[split:]
+            self.acquired = lead_index
+            self.boundaries.popleft()
+        self._append(self.acquired, values, indices, gain)
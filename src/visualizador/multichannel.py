@@ -0,0 +1,100 @@
+import threading
+from typing import NamedTuple, Optional
+import numpy as np
+from .config import SAMPLE_RATE, MERGE_BUFFER_SECONDS
+
+
+class MultiChannelBlock(NamedTuple):
+    """Data structure for a time-aligned block of samples from several ports"""
+    timestamp: int  # Timestamp of the first row (ms)
+    samples: np.ndarray  # Shape (n, channels), NaN where a channel had no data
+    first_index: int  # Index of the first row on the merged timeline
+    timestamps: np.ndarray = None  # Per-row timestamps (ms)
+
+
+class ChannelMerger:
+    """Time-aligns sample blocks from several acquisition ports into multi-channel blocks
+
+    Each channel keeps its own ring of float32 samples sized from the sample rate.
+    The first block of a channel fixes its offset on the merged timeline from its
+    sample clock time; afterwards blocks are placed by sample index only. Rows are
+    emitted as soon as every channel has delivered them, or filled with NaN once a
+    channel lags by more than the ring capacity (e.g. a disconnected port).
+    """
+
+    def __init__(self, num_channels: int, sample_rate: float = SAMPLE_RATE,
+                 buffer_seconds: float = MERGE_BUFFER_SECONDS):
+        self.num_channels = num_channels
+        self.period_ms = 1000.0 / sample_rate
+        self.capacity = max(1, int(sample_rate * buffer_seconds))
+        self.buffers = np.full((num_channels, self.capacity), np.nan, dtype=np.float32)
+        self.offsets = [None] * num_channels  # Local sample index -> merged index
+        self.ends = [None] * num_channels  # Next merged index expected per channel
+        self.dropped_samples = [0] * num_channels
+        self.origin_ms = None  # Time of merged index 0
+        self.emitted = None  # Merged index of the next row to emit
+        self.lock = threading.Lock()
+
+    def reset_channel(self, channel: int):
+        """Re-align a channel on its next block (e.g. after a reconnect)"""
+        with self.lock:
+            self.offsets[channel] = None
+
+    def add(self, channel: int, first_index: int, voltages: np.ndarray, t_first_ms: float) -> Optional[MultiChannelBlock]:
+        """Store a block of one channel; returns the rows that became complete (or None)"""
+        with self.lock:
+            if self.origin_ms is None:
+                self.origin_ms = t_first_ms - first_index * self.period_ms
+            if self.offsets[channel] is None:
+                merged_first = round((t_first_ms - self.origin_ms) / self.period_ms)
+                self.offsets[channel] = merged_first - first_index
+            first = first_index + self.offsets[channel]
+            end = first + len(voltages)
+            if self.emitted is None:
+                self.emitted = first
+
+            merged = []
+            # Never hold more than one ring of pending rows: flush lagging channels as NaN
+            if end - self.emitted > self.capacity:
+                merged.append(self._emit(end - self.capacity))
+
+            # Skip samples that are already emitted or duplicate what this channel sent
+            start = max(first, self.emitted, self.ends[channel] if self.ends[channel] is not None else first)
+            if start > first:
+                self.dropped_samples[channel] += min(start - first, len(voltages))
+            if start < end:
+                positions = np.arange(start, end) % self.capacity
+                self.buffers[channel, positions] = voltages[start - first:]
+            self.ends[channel] = max(end, self.ends[channel] or end)
+
+            if all(e is not None for e in self.ends):
+                ready = min(self.ends)
+                if ready > self.emitted:
+                    merged.append(self._emit(ready))
+
+            merged = [block for block in merged if block is not None]
+            if not merged:
+                return None
+            if len(merged) == 1:
+                return merged[0]
+            samples = np.concatenate([block.samples for block in merged])
+            timestamps = np.concatenate([block.timestamps for block in merged])
+            return merged[0]._replace(samples=samples, timestamps=timestamps)
+
+    def _emit(self, until: int) -> Optional[MultiChannelBlock]:
+        """Cut rows [emitted, until) out of the rings"""
+        if until <= self.emitted:
+            return None
+        first = self.emitted
+        positions = np.arange(first, until) % self.capacity
+        samples = self.buffers[:, positions].T.copy()
+        self.buffers[:, positions] = np.nan
+        self.emitted = until
+
+        timestamps = self.origin_ms + np.arange(first, until) * self.period_ms
+        return MultiChannelBlock(
+            timestamp=int(timestamps[0]),
+            samples=samples,
+            first_index=first,
+            timestamps=timestamps
+        )
@@ -1,3 +1,4 @@
+import numpy as np
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtCore
 from .config import SAMPLE_RATE
@@ -76,31 +77,30 @@ def setup_plot(ui_service):
 
 def update_plot(ui_service, plot_widget, line_raw, status_text):
     """Actualiza la visualización del ADC raw usando PyQtGraph"""
-    if len(ui_service.voltage_buffer) == 0:
+    if len(ui_service.display) == 0:
         return
 
-    y_raw = list(ui_service.voltage_buffer)
-    x_data = list(ui_service.time_buffer)
     window_size = ui_service.plot_window_size
     time_axis = ui_service.plot_time_axis
     y_min = ui_service.plot_y_min
     y_max = ui_service.plot_y_max
 
-    # Ventana visible
-    if len(y_raw) > window_size:
-        start_idx = len(y_raw) - window_size
-        y_raw_visible = y_raw[start_idx:]
-        x_visible = x_data[start_idx:]
-    else:
-        y_raw_visible = y_raw
-        x_visible = x_data
+    # Ventana visible a la tasa de pantalla (diezmado segun el ancho del grafico), sin copias
+    ui_service.update_decimation(plot_widget.width())
+    step = ui_service.lead_history.factor
+    y_raw_visible, x_visible = ui_service.lead_history.latest_display(window_size)
+
+    # No unir la linea a traves de los huecos (historia anterior de la derivacion)
+    connect = 'all'
+    if len(x_visible) > 1 and x_visible[-1] - x_visible[0] != (len(x_visible) - 1) * step:
+        connect = np.append(np.diff(x_visible) == step, False).astype(np.int32)
 
     # Convert to time axis if enabled
     if time_axis:
-        x_visible = [x / SAMPLE_RATE for x in x_visible]
+        x_visible = x_visible / SAMPLE_RATE
 
     # Update plot data
-    line_raw.setData(x_visible, y_raw_visible)
+    line_raw.setData(x_visible, y_raw_visible, connect=connect)
 
     # Update axis limits
     plot_widget.setYRange(y_min, y_max)
@@ -117,6 +117,9 @@ def update_plot(ui_service, plot_widget, line_raw, status_text):
     esp32_status = "ESP32 OK" if ui_service.esp32_connected else "ESP32 ERR"
     arduino_status = "ARD OK" if ui_service.arduino_connected else "ARD ERR"
 
+    backlog = ui_service.backlog['samples']
     status_text.setText(
-        f"{esp32_status} | {arduino_status} | Muestras: {len(y_raw)}"
+        f"{esp32_status} | {arduino_status} | Muestras: {len(ui_service.display)}"
+        + (f" | 1:{step}" if step > 1 else "")
+        + (f" | Pendientes: {backlog}" if backlog else "")
     )
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""Incremental Pan-Tompkins R-peak detector
+
+Benchmark it against the synthetic ECG with
+``python -m visualizador.r_peak_detector --rate 2000 --seconds 300``.
+"""
+import argparse
+import time
+from collections import deque
+import numpy as np
+from scipy import signal
+from .filters import SosFilter
+from .display_buffer import DisplayBuffer
+from .events import RPeakEvent
+from .config import (SAMPLE_RATE, MIN_PEAK_HEIGHT, MIN_PEAK_DISTANCE, PEAK_WIDTH_MIN, PEAK_PROMINENCE,
+                     QRS_BAND_HZ, QRS_WINDOW_MS, R_REFRACTORY_MS)
+
+MAX_CHUNK_SAMPLES = 4096  # Longer blocks are processed in chunks of this size
+LEARNING_SECONDS = 2.0  # Signal used to set the initial thresholds
+HISTORY_SECONDS = 3.0  # Processed signal kept to locate R peaks (also for searchback)
+RR_AVERAGE_BEATS = 8
+
+
+class RPeakDetector:
+    """Pan-Tompkins R-peak detector over a stream of sample blocks
+
+    The QRS band-pass, derivative, squaring and moving-window integration keep
+    their state between blocks; the integration is a running sum, so every
+    sample costs the same whatever the window length. Local maxima of the
+    integrated signal are classified against adaptive signal/noise levels
+    (a few per beat, handled one by one). For each QRS the R sample is located
+    in the input signal, which must be baseline-free (the processing chain
+    output), and checked against MIN_PEAK_HEIGHT, PEAK_PROMINENCE and
+    PEAK_WIDTH_MIN. When no beat is found for 1.66 mean RR intervals, the
+    largest peak above half the threshold is taken (searchback).
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.name = "r_peak"
+        self.window = max(int(QRS_WINDOW_MS * sample_rate / 1000), 1)
+        self.refractory = max(MIN_PEAK_DISTANCE, int(R_REFRACTORY_MS * sample_rate / 1000))
+        self.t_wave_limit = int(0.36 * sample_rate)
+        self.search = self.window + int(0.05 * sample_rate)  # How far before an integration peak its R can be
+        sos = signal.butter(1, QRS_BAND_HZ, btype='bandpass', fs=sample_rate, output='sos')
+        self.qrs_filter = SosFilter(sos, "qrs")
+        self.squares = DisplayBuffer(self.window + MAX_CHUNK_SAMPLES, dtype=np.float64)
+        self.history = DisplayBuffer(int(HISTORY_SECONDS * sample_rate) + MAX_CHUNK_SAMPLES, dtype=np.float64)
+        self.beats = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the signal history and learn the thresholds again"""
+        self.qrs_filter.reset()
+        self.squares.clear()
+        self.history.clear()
+        self.sample_index = 0  # Index of the next sample
+        self.last_band = None
+        self.integral = 0.0  # Running sum of the last `window` squared slopes
+        self.tail = np.zeros(2)  # Last two integrated values, to find peaks across blocks
+        self.learning_left = int(LEARNING_SECONDS * self.sample_rate)
+        self.learning_max = 0.0
+        self.learning_sum = 0.0
+        self.spki = 0.0  # Running signal peak level
+        self.npki = 0.0  # Running noise peak level
+        self.last_r = None
+        self.last_peak = None  # Integration peak index of the last beat
+        self.last_peak_value = 0.0
+        self.candidate = None  # (value, index) of the best sub-threshold peak since the last beat
+        self.rr = deque(maxlen=RR_AVERAGE_BEATS)
+        self.rr_sum = 0
+
+    @property
+    def threshold(self) -> float:
+        return self.npki + 0.25 * (self.spki - self.npki)
+
+    def process(self, x: np.ndarray, first_index: int = None) -> list:
+        """Feed a block; returns the RPeakEvents detected in it (source "host")
+
+        first_index is the sample index of x[0]; when it does not follow the
+        previous block the detector just renumbers, keeping its thresholds.
+        """
+        if first_index is not None:
+            self.sample_index = first_index
+        x = np.asarray(x, dtype=np.float64)
+        events = []
+        for start in range(0, len(x), MAX_CHUNK_SAMPLES):
+            self._process_chunk(x[start:start + MAX_CHUNK_SAMPLES], events)
+        return events
+
+    def _process_chunk(self, x, events):
+        n = len(x)
+        if n == 0:
+            return
+        first = self.sample_index
+        indices = np.arange(first, first + n, dtype=np.int64)
+        self.sample_index = first + n
+        newest = first + n - 1
+        self.history.extend(x, indices)
+
+        band = self.qrs_filter.process(x)
+        slope = np.diff(band, prepend=band[0] if self.last_band is None else self.last_band)
+        self.last_band = band[-1]
+        integrated = self._integrate(slope * slope, indices)
+
+        values = np.concatenate((self.tail, integrated))
+        self.tail = values[-2:]
+        start = 0
+        if self.learning_left > 0:
+            start = min(self.learning_left, n)
+            self._learn(integrated)
+            if self.learning_left > 0:
+                return
+
+        # Local maxima (from the end of learning); values[0] and values[1] are samples first-2 and first-1
+        middle = values[1:-1]
+        peaks = np.flatnonzero((middle > values[:-2]) & (middle >= values[2:]))
+        for p in peaks[peaks >= start]:
+            self._classify(float(middle[p]), first - 1 + int(p), newest, events)
+        self._search_back(newest, events)
+
+    def _integrate(self, squared, indices):
+        """Moving-window integration as a running sum (adds new, subtracts window-old squares)"""
+        n = len(squared)
+        self.squares.extend(squared, indices)
+        recent, _ = self.squares.latest(n + self.window)
+        if len(recent) < n + self.window:
+            recent = np.concatenate((np.zeros(n + self.window - len(recent)), recent))
+        sums = self.integral + np.cumsum(squared - recent[:n])
+        self.integral = float(sums[-1])
+        return sums / self.window
+
+    def _learn(self, integrated):
+        part = integrated[:self.learning_left]
+        self.learning_max = max(self.learning_max, float(part.max()))
+        self.learning_sum += float(part.sum())
+        self.learning_left -= len(part)
+        if self.learning_left == 0:
+            self.spki = self.learning_max / 3
+            self.npki = self.learning_sum / int(LEARNING_SECONDS * self.sample_rate) / 2
+
+    def _classify(self, value, index, newest, events):
+        since = None if self.last_peak is None else index - self.last_peak
+        if since is not None and since < self.refractory:
+            return
+        threshold = self.threshold
+        t_wave = since is not None and since < self.t_wave_limit and value < self.last_peak_value / 2
+        if value > threshold and not t_wave:
+            r = self._locate_r(index)
+            if r is not None:
+                self.spki = 0.125 * value + 0.875 * self.spki
+                self._beat(r, index, value, newest, events)
+                return
+        self.npki = 0.125 * value + 0.875 * self.npki
+        if value > threshold / 2 and (self.candidate is None or value > self.candidate[0]):
+            self.candidate = (value, index)
+
+    def _search_back(self, newest, events):
+        if self.candidate is None or not self.rr:
+            return
+        if newest - self.last_peak < 1.66 * self.rr_sum / len(self.rr):
+            return
+        value, index = self.candidate
+        self.candidate = None
+        r = self._locate_r(index)
+        if r is not None:
+            self.spki = 0.25 * value + 0.75 * self.spki
+            self._beat(r, index, value, newest, events)
+
+    def _locate_r(self, index):
+        """R sample before an integration peak, or None if it fails the peak criteria"""
+        values, indices = self.history.latest()
+        start = np.searchsorted(indices, index - self.search)
+        end = np.searchsorted(indices, index, side='right')
+        if end - start < PEAK_WIDTH_MIN:
+            return None
+        segment = values[start:end]
+        peak = int(np.argmax(np.abs(segment)))
+        if segment[peak] < 0:
+            segment = -segment  # Negative QRS (e.g. aVR)
+        height = segment[peak]
+        prominence = height - segment.min()
+        if height < MIN_PEAK_HEIGHT or prominence < PEAK_PROMINENCE:
+            return None
+        below = np.flatnonzero(segment < height - prominence / 2)
+        left = below[below < peak]
+        right = below[below > peak]
+        width = (right[0] if len(right) else len(segment)) - (left[-1] + 1 if len(left) else 0)
+        if width < PEAK_WIDTH_MIN:
+            return None
+        return int(indices[start + peak])
+
+    def _beat(self, r, index, value, newest, events):
+        if self.last_r is not None:
+            if len(self.rr) == self.rr.maxlen:
+                self.rr_sum -= self.rr[0]
+            self.rr.append(r - self.last_r)
+            self.rr_sum += r - self.last_r
+        self.last_r = r
+        self.last_peak = index
+        self.last_peak_value = value
+        self.candidate = None
+        self.beats += 1
+        events.append(RPeakEvent(r, newest - r, "host"))
+
+
+def benchmark(sample_rate=SAMPLE_RATE, seconds=300.0, block_samples=50, heart_rate_bpm=72.0,
+              noise=0.005, tolerance_ms=50.0, seed=1):
+    """Run the processing chain and the detector over SyntheticECG; returns a dict of results"""
+    from .simulator import SyntheticECG
+    from .signal_processing_service import build_stage
+    from .config import FILTER_CHAIN
+
+    ecg = SyntheticECG(sample_rate, heart_rate_bpm, noise=noise, seed=seed)
+    stages = [build_stage(name, sample_rate) for name in FILTER_CHAIN]
+    detector = RPeakDetector(sample_rate)
+
+    truth, detected, latencies = [], [], []
+    detector_s = 0.0
+    total = int(seconds * sample_rate)
+    for first in range(0, total, block_samples):
+        x, r_indices = ecg.generate(min(block_samples, total - first))
+        truth.extend(r_indices)
+        for stage in stages:
+            x = stage.process(x)
+        started = time.perf_counter()
+        events = detector.process(x, first)
+        detector_s += time.perf_counter() - started
+        for event in events:
+            detected.append(event.sample_index)
+            latencies.append(event.latency_samples)
+
+    # Beats during learning (and the filters' settling) are not scored
+    skip = int((LEARNING_SECONDS + 0.5) * sample_rate)
+    truth = np.array([r for r in truth if r >= skip])
+    detected = np.array([r for r in detected if r >= skip], dtype=np.int64)
+    tolerance = tolerance_ms * sample_rate / 1000
+    errors = []
+    if len(detected):
+        nearest = np.clip(np.searchsorted(detected, truth), 1, len(detected) - 1) if len(detected) > 1 \
+            else np.zeros(len(truth), dtype=np.int64)
+        for r, i in zip(truth, nearest):
+            candidates = detected[max(i - 1, 0):i + 1]
+            error = candidates[np.argmin(np.abs(candidates - r))] - r
+            if abs(error) <= tolerance:
+                errors.append(error)
+    matched = len(errors)
+    latencies = np.array(latencies, dtype=np.float64)
+    to_ms = 1000.0 / sample_rate
+    return {
+        'beats': len(truth),
+        'detected': len(detected),
+        'sensitivity': matched / max(len(truth), 1),
+        'ppv': matched / max(len(detected), 1),
+        'timing_error_ms': float(np.mean(np.abs(errors))) * to_ms if errors else float('nan'),
+        'latency_p50_ms': float(np.percentile(latencies, 50)) * to_ms if len(latencies) else float('nan'),
+        'latency_p99_ms': float(np.percentile(latencies, 99)) * to_ms if len(latencies) else float('nan'),
+        'us_per_sample': detector_s * 1e6 / total,
+        'ksps': total / detector_s / 1000 if detector_s else float('inf'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas del detector de picos R con ECG sintetico")
+    parser.add_argument("--rate", type=int, default=SAMPLE_RATE, help="Muestras/s")
+    parser.add_argument("--seconds", type=float, default=300.0, help="Duracion de la senal")
+    parser.add_argument("--block-samples", type=int, default=50, help="Muestras por bloque")
+    parser.add_argument("--bpm", type=float, default=72.0, help="Frecuencia cardiaca simulada")
+    parser.add_argument("--noise", type=float, default=0.005, help="Ruido gaussiano (V)")
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.rate, args.seconds, args.block_samples, args.bpm, args.noise)
+    print(f"Latidos: {result['beats']}, detectados: {result['detected']}")
+    print(f"Sensibilidad: {result['sensitivity'] * 100:.2f}%, VPP: {result['ppv'] * 100:.2f}%, "
+          f"error medio {result['timing_error_ms']:.2f} ms")
+    print(f"Latencia de deteccion: p50 {result['latency_p50_ms']:.1f} ms, p99 {result['latency_p99_ms']:.1f} ms")
+    print(f"Coste: {result['us_per_sample']:.3f} us/muestra ({result['ksps']:.0f} kmuestras/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from collections import deque
+from .config import RECONNECT_INITIAL_S, RECONNECT_MAX_S, HOTPLUG_DIR, HOTPLUG_POLL_MS
+
+HISTORY_SIZE = 100
+
+
+class ConnectionState:
+    """Connection bookkeeping of one serial reader
+
+    Holds the exponential backoff schedule, an Event the reader thread waits on
+    while the port is closed, and the downtime / lost samples of every reconnect.
+    """
+
+    def __init__(self, tag, port, sample_rate=0, quiet_after=5,
+                 initial_delay=RECONNECT_INITIAL_S, max_delay=RECONNECT_MAX_S):
+        self.tag = tag
+        self.port = port
+        self.sample_rate = sample_rate  # Samples/s lost while down (0: not a sampled stream)
+        self.quiet_after = quiet_after  # Failed attempts reported before retrying silently
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.ready = threading.Event()  # Set while the port is open
+        self.delay = initial_delay
+        self.next_attempt = 0.0
+        self.failures = 0
+        self.lost_at = None
+
+        self.reconnects = 0
+        self.downtime_s = 0.0
+        self.lost_samples = 0  # Estimated from downtime and sample rate
+        self.history = deque(maxlen=HISTORY_SIZE)  # (downtime_s, lost_samples) of each reconnect
+
+    @property
+    def connected(self):
+        return self.ready.is_set()
+
+    def attempt_due(self, now):
+        return not self.ready.is_set() and now >= self.next_attempt
+
+    def retry_now(self):
+        """Skip the backoff (the device just reappeared)"""
+        self.delay = self.initial_delay
+        self.next_attempt = 0.0
+
+    def failed(self, error):
+        self.failures += 1
+        if self.failures <= self.quiet_after:
+            print(f"[{self.tag}] Error conectando a {self.port} (intento {self.failures}): {error}")
+            if self.failures == self.quiet_after:
+                print(f"[{self.tag}] Reintentando en segundo plano cada {self.max_delay:.1f} s como maximo")
+        self.next_attempt = time.monotonic() + self.delay
+        self.delay = min(self.delay * 2, self.max_delay)
+
+    def established(self):
+        if self.lost_at is not None:
+            downtime = time.monotonic() - self.lost_at
+            lost = int(round(downtime * self.sample_rate))
+            self.reconnects += 1
+            self.downtime_s += downtime
+            self.lost_samples += lost
+            self.history.append((downtime, lost))
+            message = f"[{self.tag}] Reconectado a {self.port} tras {downtime * 1000:.0f} ms"
+            print(message + (f" (~{lost} muestras perdidas)" if self.sample_rate else ""))
+        else:
+            print(f"[{self.tag}] Conexion establecida en {self.port}")
+        self.lost_at = None
+        self.failures = 0
+        self.delay = self.initial_delay
+        self.ready.set()
+
+    def lost(self, error):
+        self.ready.clear()
+        self.lost_at = time.monotonic()
+        self.next_attempt = 0.0
+        print(f"[{self.tag}] ❌ Conexion perdida con {self.port}: {error}")
+
+
+class ReconnectSupervisor:
+    """Opens and reopens the ports of every registered reader from one thread
+
+    Reader threads never sleep in retry loops: they wait on their
+    ConnectionState until the supervisor hands them an open port. Failed
+    attempts back off exponentially; a change in HOTPLUG_DIR (or the port path
+    reappearing) triggers an immediate retry.
+    """
+
+    def __init__(self, hotplug_dir=HOTPLUG_DIR, poll_ms=HOTPLUG_POLL_MS):
+        self.hotplug_dir = hotplug_dir
+        self.poll_s = poll_ms / 1000.0
+        self.readers = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self._devices = self._list_devices()
+        self._present = {}
+
+    def register(self, reader):
+        with self.lock:
+            if reader not in self.readers:
+                self.readers.append(reader)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        self.wake()
+
+    def unregister(self, reader):
+        with self.lock:
+            if reader in self.readers:
+                self.readers.remove(reader)
+
+    def wake(self):
+        self.wakeup.set()
+
+    def _list_devices(self):
+        try:
+            return set(os.listdir(self.hotplug_dir))
+        except OSError:
+            return set()
+
+    def _check_hotplug(self, readers):
+        devices = self._list_devices()
+        plugged = bool(devices - self._devices)
+        self._devices = devices
+        for reader in readers:
+            if reader.link.connected:
+                continue
+            present = os.path.exists(reader.port)
+            if plugged or (present and self._present.get(reader) is False):
+                reader.link.retry_now()
+            self._present[reader] = present
+
+    def _run(self):
+        while True:
+            self.wakeup.clear()
+            idle = False
+            try:
+                idle = self._pass()
+            except Exception as e:
+                # One thread serves every port: never let an unexpected error end it
+                print(f"[RECONNECT] ❌ Error inesperado en el supervisor: {e!r}")
+            self.wakeup.wait(None if idle else self.poll_s)
+
+    def _pass(self):
+        """Hot-plug check and due connection attempts; True when every port is open"""
+        with self.lock:
+            readers = list(self.readers)
+        self._check_hotplug(readers)
+
+        now = time.monotonic()
+        for reader in readers:
+            if reader.running and reader.link.attempt_due(now):
+                try:
+                    reader.connect()
+                except Exception as e:
+                    reader.link.failed(e)  # Unexpected error: back off as for a port error
+
+        # With every port open there is nothing to poll until a reader reports a loss
+        return all(reader.link.connected for reader in readers)
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    """Process-wide supervisor shared by all serial readers"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ReconnectSupervisor()
+        return _supervisor
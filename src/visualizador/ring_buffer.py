@@ -0,0 +1,162 @@
+from typing import NamedTuple
+import numpy as np
+
+# Header layout (int64): total samples written by the producer, capacity, timestamps column flag,
+# and the write counter the producer will reach once the block it is copying in is published
+HEADER_WRITTEN = 0
+HEADER_CAPACITY = 1
+HEADER_TIMESTAMPS = 2
+HEADER_WRITING = 3
+HEADER_FIELDS = 4
+
+
+class RingBlock(NamedTuple):
+    """Samples copied out of a SampleRing"""
+    samples: np.ndarray  # float32
+    indices: np.ndarray  # int64 sample indices
+    timestamps: np.ndarray = None  # float64 ms, only if the ring has a timestamps column
+
+
+def ring_nbytes(capacity: int, timestamps: bool = False) -> int:
+    """Bytes needed for the header and columns of a ring"""
+    return HEADER_FIELDS * 8 + capacity * (8 + 4 + (8 if timestamps else 0))
+
+
+class SampleRing:
+    """Single-producer/single-consumer ring of float32 samples and int64 sample indices
+
+    No locks: the producer announces the counter it is writing up to, copies a
+    whole block in with slice assignments and only then publishes the new write
+    counter; the consumer keeps its own read counter, copies whole spans out and
+    then checks the announced counter (seqlock style) to discard any part a
+    concurrent write may have overwritten. The producer never waits. If the
+    consumer falls more than one ring behind, the oldest samples are skipped and
+    counted in `overflows` (drop-oldest). An optional float64 column carries
+    per-sample timestamps.
+    """
+
+    def __init__(self, capacity: int, timestamps: bool = False):
+        self._map(bytearray(ring_nbytes(capacity, timestamps)), capacity, timestamps)
+
+    def _map(self, buffer, capacity=None, timestamps=False):
+        """Lay the header and columns over buffer (capacity None: read them from the header)"""
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buffer)
+        if capacity is not None:
+            self.header[:] = 0
+            self.header[HEADER_CAPACITY] = capacity
+            self.header[HEADER_TIMESTAMPS] = int(timestamps)
+        self.capacity = int(self.header[HEADER_CAPACITY])
+
+        offset = HEADER_FIELDS * 8
+        self.indices = np.ndarray((self.capacity,), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += self.capacity * 8
+        self.samples = np.ndarray((self.capacity,), dtype=np.float32, buffer=buffer, offset=offset)
+        offset += self.capacity * 4
+        self.timestamps = None
+        if self.header[HEADER_TIMESTAMPS]:
+            self.timestamps = np.ndarray((self.capacity,), dtype=np.float64, buffer=buffer, offset=offset)
+
+        self.read_count = 0  # Consumer side only
+        self.overflows = 0
+
+    @property
+    def written(self) -> int:
+        return int(self.header[HEADER_WRITTEN])
+
+    @property
+    def pending(self) -> int:
+        """Samples waiting for the consumer (at most one ring)"""
+        return min(self.written - self.read_count, self.capacity)
+
+    def write(self, samples: np.ndarray, indices, timestamps=None):
+        """Producer: append a block (only the newest `capacity` samples if larger)
+
+        indices is either an array with one index per sample or the index of the
+        first sample of a consecutive block; timestamps may be an array or a
+        scalar shared by the whole block.
+        """
+        n = len(samples)
+        if n == 0:
+            return
+        if np.ndim(indices) == 0:
+            indices = np.arange(indices, indices + n, dtype=np.int64)
+        if self.timestamps is not None:
+            timestamps = np.broadcast_to(np.nan if timestamps is None else timestamps, (n,))
+
+        skipped = max(n - self.capacity, 0)
+        if skipped:
+            samples = samples[skipped:]
+            indices = indices[skipped:]
+            if self.timestamps is not None:
+                timestamps = timestamps[skipped:]
+            n = self.capacity
+
+        head = int(self.header[HEADER_WRITTEN]) + skipped
+        # Announce the slots about to change before touching them
+        self.header[HEADER_WRITING] = head + n
+        pos = head % self.capacity
+        first = min(n, self.capacity - pos)
+        self.samples[pos:pos + first] = samples[:first]
+        self.indices[pos:pos + first] = indices[:first]
+        if self.timestamps is not None:
+            self.timestamps[pos:pos + first] = timestamps[:first]
+        if first < n:
+            self.samples[:n - first] = samples[first:]
+            self.indices[:n - first] = indices[first:]
+            if self.timestamps is not None:
+                self.timestamps[:n - first] = timestamps[first:]
+
+        # Publish only after the data is in place
+        self.header[HEADER_WRITTEN] = head + n
+
+    def read_into(self, samples_out: np.ndarray, indices_out: np.ndarray, timestamps_out: np.ndarray = None,
+                  end: int = None) -> int:
+        """Consumer: copy the oldest unread samples into the given arrays
+
+        Copies at most len(samples_out) samples, and none at or beyond the write
+        count `end` if given (the rest stay for the next call); returns how many
+        were copied.
+        """
+        head = int(self.header[HEADER_WRITTEN])
+        if end is not None:
+            head = min(head, end)
+        tail = self.read_count
+        if head - tail > self.capacity:
+            self.overflows += head - tail - self.capacity
+            tail = head - self.capacity
+        n = min(head - tail, len(samples_out))
+        if n <= 0:
+            return 0
+        stop = tail + n
+
+        columns = [(self.samples, samples_out), (self.indices, indices_out)]
+        if timestamps_out is not None and self.timestamps is not None:
+            columns.append((self.timestamps, timestamps_out))
+        pos = tail % self.capacity
+        first = min(n, self.capacity - pos)
+        for ring, out in columns:
+            out[:first] = ring[pos:pos + first]
+            out[first:n] = ring[:n - first]
+
+        # A write started (even if not published) while we were copying may have lapped the oldest part
+        overrun = int(self.header[HEADER_WRITING]) - self.capacity - tail
+        if overrun > 0:
+            overrun = min(overrun, n)
+            self.overflows += overrun
+            for _, out in columns:
+                out[:n - overrun] = out[overrun:n].copy()
+            n -= overrun
+
+        self.read_count = stop
+        return n
+
+    def read(self, max_samples: int = None, end: int = None) -> RingBlock:
+        """Consumer: copy out everything (or up to max_samples, or up to the write count end) written since the last read"""
+        n = self.pending if max_samples is None else min(self.pending, max_samples)
+        if end is not None:
+            n = min(n, max(end - self.read_count, 0))
+        samples = np.empty(n, dtype=np.float32)
+        indices = np.empty(n, dtype=np.int64)
+        timestamps = np.empty(n, dtype=np.float64) if self.timestamps is not None else None
+        n = self.read_into(samples, indices, timestamps, end)
+        return RingBlock(samples[:n], indices[:n], timestamps[:n] if timestamps is not None else None)
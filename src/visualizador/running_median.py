@@ -0,0 +1,143 @@
+import math
+import random
+from collections import deque
+import numpy as np
+from .config import SAMPLE_RATE, MEDIAN_BASELINE_MS
+
+_END = float('inf')  # Value of the sentinel after the last node
+
+
+class _Node:
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value, next_nodes, widths):
+        self.value = value
+        self.next = next_nodes
+        self.width = widths  # Positions skipped by each link
+
+
+_NIL = _Node(_END, [], [])
+
+
+class IndexableSkiplist:
+    """Sorted multiset with O(log n) insert, remove and access by rank"""
+
+    def __init__(self, expected_size=100):
+        self.size = 0
+        self.maxlevels = int(1 + math.log(max(expected_size, 2), 2))
+        self.head = _Node(None, [_NIL] * self.maxlevels, [1] * self.maxlevels)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        node = self.head
+        i += 1
+        for level in reversed(range(self.maxlevels)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def insert(self, value):
+        chain = [None] * self.maxlevels
+        steps_at_level = [0] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = min(self.maxlevels, 1 - int(math.log(random.random() or 0.5, 2.0)))
+        new_node = _Node(value, [None] * levels, [None] * levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.maxlevels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        chain = [None] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        if chain[0].next[0].value != value:
+            raise KeyError(value)
+
+        levels = len(chain[0].next[0].next)
+        for level in range(levels):
+            previous = chain[level]
+            previous.width[level] += previous.next[level].width[level] - 1
+            previous.next[level] = previous.next[level].next[level]
+        for level in range(levels, self.maxlevels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RunningMedian:
+    """Median of the last `window` values, O(log window) per value"""
+
+    def __init__(self, window: int):
+        self.window = max(int(window), 1)
+        self.values = deque()
+        self.sorted = IndexableSkiplist(self.window)
+
+    def push(self, value: float) -> float:
+        """Add a value and return the median of the window
+
+        A NaN or infinite value would break the ordering of the skiplist, so
+        the last value is repeated in its place.
+        """
+        if not math.isfinite(value):
+            if not self.values:
+                return value
+            value = self.values[-1]
+        if len(self.values) == self.window:
+            self.sorted.remove(self.values.popleft())
+        self.values.append(value)
+        self.sorted.insert(value)
+        return self.sorted[len(self.values) // 2]
+
+    def reset(self):
+        self.values.clear()
+        self.sorted = IndexableSkiplist(self.window)
+
+
+class MovingMedianBaseline:
+    """Baseline wander removal with cascaded moving medians (block processing stage)
+
+    The baseline is the median of the medians (MEDIAN_BASELINE_MS, 200 ms
+    then 600 ms by default): the first window removes the QRS, the second
+    the P and T waves. The windows are causal, so the output keeps the sample
+    indices of the input (no delay) and the estimate lags a drifting baseline
+    by about half the windows.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, windows_ms=MEDIAN_BASELINE_MS):
+        self.name = "median"
+        self.medians = [RunningMedian(ms * sample_rate / 1000) for ms in windows_ms]
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if len(x) == 0:
+            return x
+        baseline = np.empty(len(x))
+        medians = self.medians
+        for i, value in enumerate(x.tolist()):
+            for median in medians:
+                value = median.push(value)
+            baseline[i] = value
+        return x - baseline
+
+    def reset(self):
+        for median in self.medians:
+            median.reset()
@@ -0,0 +1,51 @@
+import time
+
+READ_MODE_BLOCKING = "blocking"
+READ_MODE_POLL = "poll"
+
+
+class ReadStats:
+    """Wakeup and throughput counters for a serial reader loop"""
+
+    def __init__(self):
+        self.wakeups = 0
+        self.bytes_received = 0
+        self._last_time = time.monotonic()
+        self._last_wakeups = 0
+        self._last_bytes = 0
+
+    def record(self, nbytes: int):
+        """Count one wakeup of the reader loop that returned nbytes"""
+        self.wakeups += 1
+        self.bytes_received += nbytes
+
+    def snapshot(self) -> dict:
+        """Rates since the previous snapshot: wakeups/s and bytes per wakeup"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-9)
+        wakeups = self.wakeups - self._last_wakeups
+        nbytes = self.bytes_received - self._last_bytes
+
+        self._last_time = now
+        self._last_wakeups = self.wakeups
+        self._last_bytes = self.bytes_received
+
+        return {
+            'wakeups_per_s': wakeups / elapsed,
+            'bytes_per_wakeup': nbytes / wakeups if wakeups else 0.0,
+            'bytes_per_s': nbytes / elapsed,
+        }
+
+
+def read_chunk(ser, min_chunk_size: int) -> bytes:
+    """Block until min_chunk_size bytes arrive or the port timeout expires, then drain the rest
+
+    The port timeout acts as the latency target: at low data rates the read returns
+    after at most that long, at high rates it returns as soon as min_chunk_size bytes
+    are in. Whatever else is already buffered is drained in the same wakeup.
+    """
+    data = ser.read(min_chunk_size)
+    pending = ser.in_waiting
+    if pending:
+        data += ser.read(pending)
+    return data
@@ -1,46 +1,98 @@
 import serial
 import time
+import threading
 from .config import DEBUG_MODE, BAUD_RATE, SAMPLE_RATE, POST_R_DELAY_SAMPLES, MIN_PEAK_DISTANCE, MIN_PEAK_HEIGHT, PEAK_WIDTH_MIN, PEAK_PROMINENCE
+from .config import SERIAL_READ_MODE, ESP32_READ_LATENCY_MS, ESP32_MIN_CHUNK_BYTES, ARDUINO_READ_LATENCY_MS, ARDUINO_MIN_CHUNK_BYTES
 import numpy as np
 from scipy import signal
+from .frame_decoder import FrameDecoder
+from .stream_demux import StreamDemultiplexer
+from .events import LeadChangeEvent, RPeakEvent, DischargeEvent
+from .telemetry_parser import TelemetryLineParser
+from .serial_io import ReadStats, read_chunk, READ_MODE_BLOCKING
+from .reconnect import ConnectionState, get_supervisor
+
+PORT_ERRORS = (serial.SerialException, OSError)
 
 class SerialReaderESP32:
-    def __init__(self, port, baud_rate, max_connection_attempts=5):
+    def __init__(self, port, baud_rate, max_connection_attempts=5, read_mode=SERIAL_READ_MODE,
+                 latency_ms=ESP32_READ_LATENCY_MS, min_chunk_size=ESP32_MIN_CHUNK_BYTES, channel=0):
         self.port = port
+        self.channel = channel  # Acquisition channel index when several ESP32 ports are used
         self.baud_rate = baud_rate
-        self.max_connection_attempts = max_connection_attempts
-        self.connection_attempts = 0
+        self.max_connection_attempts = max_connection_attempts  # Failed attempts logged before going quiet
+        self.link = ConnectionState("ESP32", port, SAMPLE_RATE, max_connection_attempts)
+        self.supervisor = None
         self.ser = None
         self.running = False
         self.total_bytes_received = 0
-        self.valid_packets = 0
-        self.invalid_packets = 0
-        self.sync_buffer = []
+        self.decoder = FrameDecoder()
+        self.demux = StreamDemultiplexer(self.decoder)
 
-    def connect(self):
-        if self.connection_attempts >= self.max_connection_attempts:
-            return False
+        # Read loop settings
+        self.read_mode = read_mode
+        self.latency_ms = latency_ms
+        self.min_chunk_size = min_chunk_size
+        self.read_stats = ReadStats()
 
-        for attempt in range(self.max_connection_attempts - self.connection_attempts):
-            try:
-                if self.ser:
-                    self.ser.close()
-                print(f"[ESP32] Intentando conectar a {self.port}... (intento {self.connection_attempts + attempt + 1})")
-                self.ser = serial.Serial(self.port, self.baud_rate, timeout=0.1)
-                time.sleep(2)
+    @property
+    def valid_packets(self):
+        return self.decoder.valid_packets
 
-                self.ser.flushInput()
-                self.ser.flushOutput()
+    @property
+    def invalid_packets(self):
+        return self.decoder.invalid_packets
 
-                print(f"[ESP32] Conexion establecida en {self.port}")
-                self.connection_attempts = 0  # Reset on success
-                return True
-            except Exception as e:
-                print(f"[ESP32] Error en intento {self.connection_attempts + attempt + 1}: {e}")
-                time.sleep(1)
+    @property
+    def lost_samples(self):
+        """Samples lost to sequence gaps plus those estimated for reconnect downtime"""
+        return self.decoder.lost_samples + self.link.lost_samples
 
-        self.connection_attempts += (self.max_connection_attempts - self.connection_attempts)
-        return False
+    @property
+    def connected(self):
+        return self.running and self.link.connected
+
+    def connect(self):
+        """Un solo intento de abrir el puerto, sin esperas (lo llama el supervisor)"""
+        try:
+            ser = serial.Serial(self.port, self.baud_rate, timeout=self._read_timeout())
+            ser.reset_input_buffer()
+            ser.reset_output_buffer()
+        except (*PORT_ERRORS, ValueError) as e:
+            self.link.failed(e)
+            return False
+
+        self.demux.reset()
+        self.ser = ser
+        self.link.established()
+        return True
+
+    def _connection_lost(self, error):
+        """Cierra el puerto y deja la reconexion al supervisor"""
+        self.link.lost(error)
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+        if self.supervisor:
+            self.supervisor.wake()
+
+    def _read_timeout(self):
+        """Port timeout: the latency target in blocking mode"""
+        if self.read_mode == READ_MODE_BLOCKING:
+            return self.latency_ms / 1000.0
+        return 0.1
+
+    def _read_chunk(self):
+        """Wait for the next chunk of bytes (empty if nothing arrived)"""
+        if self.read_mode == READ_MODE_BLOCKING:
+            raw_bytes = read_chunk(self.ser, self.min_chunk_size)
+        else:
+            time.sleep(0.0005)
+            pending = self.ser.in_waiting
+            raw_bytes = self.ser.read(pending) if pending > 0 else b""
+        self.read_stats.record(len(raw_bytes))
+        return raw_bytes
 
     def send_lead_command(self, lead_name):
         """Envía comando de cambio de derivación al ESP32"""
@@ -55,24 +107,24 @@ class SerialReaderESP32:
     def decode_packet(self, pkt):
         """Decodifica paquete binario de 4 bytes con checksum"""
         if len(pkt) != 4:
-            self.invalid_packets += 1
+            self.decoder.invalid_packets += 1
             return None
 
         start, lsb, msb, checksum = pkt
 
         if start != 0xAA:
-            self.invalid_packets += 1
+            self.decoder.invalid_packets += 1
             return None
 
         expected_checksum = start ^ lsb ^ msb
         if checksum != expected_checksum:
-            self.invalid_packets += 1
+            self.decoder.invalid_packets += 1
             return None
 
         val = (msb << 8) | lsb
         voltage = val * (3.3 / 4095.0)
 
-        self.valid_packets += 1
+        self.decoder.valid_packets += 1
         return voltage
 
     def read_data(self, adc_service):
@@ -80,202 +132,171 @@ class SerialReaderESP32:
         print("[ESP32] Iniciando lectura de datos ECG...")
 
         while self.running:
+            # The supervisor opens the port; wait for it without polling
+            if not self.link.ready.wait(timeout=0.5):
+                continue
             try:
-                if not self.ser or not self.ser.is_open:
-                    if self.connection_attempts >= self.max_connection_attempts:
-                        time.sleep(1)  # Just wait, don't try to reconnect
-                        continue
-                    if not self.connect():
-                        time.sleep(1)
-                        continue
-
-                if self.ser.in_waiting > 0:
-                    raw_bytes = self.ser.read(self.ser.in_waiting)
+                raw_bytes = self._read_chunk()
+            except Exception as e:
+                if self.running:  # Otherwise stop() closed the port under the read
+                    self._connection_lost(e)
+                continue
+
+            try:
+                if raw_bytes:
                     self.total_bytes_received += len(raw_bytes)
 
-                    try:
-                        text = raw_bytes.decode('utf-8', errors='ignore')
-
-                        if "LEAD_CHANGE:" in text:
-                            parts = text.split("LEAD_CHANGE:")[1].split(",")
-                            if len(parts) >= 2:
-                                lead_idx = int(parts[0].strip())
-                                lead_name = parts[1].strip()
-                                metadata = {'lead_change': {'index': lead_idx, 'name': lead_name}}
-                                adc_service.on_esp32_data(0.0, metadata)  # Send metadata without voltage
-                                print(f"[ESP32] Cambio de derivacion: {lead_name}")
-
-                        if "R_PEAK:" in text:
-                            metadata = {'r_peak': True}
-                            adc_service.on_esp32_data(0.0, metadata)  # Send metadata without voltage
-                            if DEBUG_MODE:
-                                print(f"[ESP32] Pico R detectado")
-
-                        if "DISPARO:" in text:
-                            metadata = {'disparo': text.strip()}
-                            adc_service.on_esp32_data(0.0, metadata)  # Send metadata without voltage
-                            if DEBUG_MODE:
-                                print(f"[ESP32] {text.strip()}")
-                    except:
-                        pass
-
-                    self.sync_buffer.extend(raw_bytes)
-
-                    while len(self.sync_buffer) >= 4:
-                        start_idx = -1
-                        for i, byte in enumerate(self.sync_buffer):
-                            if byte == 0xAA:
-                                start_idx = i
-                                break
-
-                        if start_idx == -1:
-                            self.sync_buffer.clear()
-                            break
-
-                        if start_idx > 0:
-                            self.sync_buffer = self.sync_buffer[start_idx:]
-
-                        if len(self.sync_buffer) >= 4:
-                            packet = self.sync_buffer[:4]
-                            voltage = self.decode_packet(packet)
-
-                            if voltage is not None:
-                                # Send raw voltage data to ADC service
-                                adc_service.on_esp32_data(voltage)
-
-                            self.sync_buffer = self.sync_buffer[4:]
-                        else:
-                            break
-
-                    if len(self.sync_buffer) > 100:
-                        self.sync_buffer = self.sync_buffer[-50:]
-                time.sleep(0.0005)
+                    # Split frames and text events in a single pass over the read
+                    first_index = self.demux.sample_count
+                    voltages, events = self.demux.feed(raw_bytes)
+
+                    # Events first: lead boundaries must be known before their samples arrive
+                    for event in events:
+                        if isinstance(event, LeadChangeEvent):
+                            print(f"[ESP32] Cambio de derivacion: {event.lead_name}")
+                        elif DEBUG_MODE and isinstance(event, RPeakEvent):
+                            print(f"[ESP32] Pico R detectado")
+                        elif DEBUG_MODE and isinstance(event, DischargeEvent):
+                            print(f"[ESP32] {event.text}")
+                        adc_service.on_esp32_event(event, channel=self.channel)
+
+                    adc_service.on_esp32_samples(voltages, first_index, channel=self.channel)
 
             except Exception as e:
                 if DEBUG_MODE:
                     print(f"[ESP32] ❌ Error en lectura: {e}")
-                time.sleep(1)
 
-    def start(self, adc_service):
+    def start(self, adc_service, supervisor=None):
         self.running = True
-        import threading
         self.thread = threading.Thread(target=self.read_data, args=(adc_service,), daemon=True)
         self.thread.start()
+        self.supervisor = supervisor or get_supervisor()
+        self.supervisor.register(self)
 
     def stop(self):
         self.running = False
+        if self.supervisor:
+            self.supervisor.unregister(self)
+        self.link.ready.clear()
         if self.ser:
             self.ser.close()
 
 class SerialReaderArduino:
-    def __init__(self, port, baud_rate, max_connection_attempts=5):
+    def __init__(self, port, baud_rate, max_connection_attempts=5, read_mode=SERIAL_READ_MODE,
+                 latency_ms=ARDUINO_READ_LATENCY_MS, min_chunk_size=ARDUINO_MIN_CHUNK_BYTES):
         self.port = port
         self.baud_rate = baud_rate
-        self.max_connection_attempts = max_connection_attempts
-        self.connection_attempts = 0
+        self.max_connection_attempts = max_connection_attempts  # Failed attempts logged before going quiet
+        self.link = ConnectionState("ARDUINO", port, quiet_after=max_connection_attempts)
+        self.supervisor = None
         self.ser = None
         self.running = False
 
-    def connect(self):
-        if self.connection_attempts >= self.max_connection_attempts:
-            return False
+        # Read loop settings
+        self.read_mode = read_mode
+        self.latency_ms = latency_ms
+        self.min_chunk_size = min_chunk_size
+        self.read_stats = ReadStats()
+        self.parser = TelemetryLineParser()
+        self.write_lock = threading.Lock()  # UI commands and the sync trigger write from different threads
 
-        for attempt in range(self.max_connection_attempts - self.connection_attempts):
-            try:
-                if self.ser:
-                    self.ser.close()
-                print(f"[ARDUINO] Intentando conectar a {self.port}... (intento {self.connection_attempts + attempt + 1})")
-                self.ser = serial.Serial(self.port, self.baud_rate, timeout=0.1)
-                time.sleep(2)
+    @property
+    def connected(self):
+        return self.running and self.link.connected
 
-                self.ser.flushInput()
-                self.ser.flushOutput()
+    def connect(self):
+        """Un solo intento de abrir el puerto, sin esperas (lo llama el supervisor)"""
+        try:
+            ser = serial.Serial(self.port, self.baud_rate, timeout=self._read_timeout())
+            ser.reset_input_buffer()
+            ser.reset_output_buffer()
+        except (*PORT_ERRORS, ValueError) as e:
+            self.link.failed(e)
+            return False
 
-                print(f"[ARDUINO] Conexion establecida en {self.port}")
-                self.connection_attempts = 0  # Reset on success
-                return True
-            except Exception as e:
-                print(f"[ARDUINO] Error en intento {self.connection_attempts + attempt + 1}: {e}")
-                time.sleep(1)
+        self.parser.reset()
+        self.ser = ser
+        self.link.established()
+        return True
 
-        self.connection_attempts += (self.max_connection_attempts - self.connection_attempts)
-        return False
+    def _connection_lost(self, error):
+        """Cierra el puerto y deja la reconexion al supervisor"""
+        self.link.lost(error)
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+        if self.supervisor:
+            self.supervisor.wake()
+
+    def _read_timeout(self):
+        """Port timeout: the latency target in blocking mode"""
+        if self.read_mode == READ_MODE_BLOCKING:
+            return self.latency_ms / 1000.0
+        return 0.1
+
+    def _read_chunk(self):
+        """Wait for the next chunk of bytes (empty if nothing arrived)"""
+        if self.read_mode == READ_MODE_BLOCKING:
+            raw_bytes = read_chunk(self.ser, self.min_chunk_size)
+        else:
+            time.sleep(0.01)
+            pending = self.ser.in_waiting
+            raw_bytes = self.ser.read(pending) if pending > 0 else b""
+        self.read_stats.record(len(raw_bytes))
+        return raw_bytes
 
     def send_command(self, command):
         """Envía comandos al Arduino"""
+        if self.write_now(f"{command}\n".encode()):
+            print(f"[ARDUINO] Comando enviado: {command}")
+
+    def write_now(self, data):
+        """Escribe bytes en el puerto sin colas ni mensajes (camino del disparo sincronizado)"""
         if self.ser and self.ser.is_open:
             try:
-                self.ser.write(f"{command}\n".encode())
-                print(f"[ARDUINO] Comando enviado: {command}")
+                with self.write_lock:
+                    self.ser.write(data)
+                return True
             except Exception as e:
                 print(f"[ARDUINO] ❌ Error enviando comando: {e}")
-
-    def process_arduino_data(self, line, adc_service):
-        """Procesa datos del Arduino (formato CSV)"""
-        try:
-            parts = line.strip().split(',')
-            if len(parts) == 7:
-                timestamp = int(parts[0])
-                vcap = float(parts[1])
-                corriente = float(parts[2])
-                e_f1 = float(parts[3])
-                e_f2 = float(parts[4])
-                e_total = float(parts[5])
-                estado = parts[6]
-
-                # Send energy data to ADC service
-                metadata = {
-                    'energia': {
-                        'vcap': vcap,
-                        'corriente': corriente,
-                        'e_f1': e_f1,
-                        'e_f2': e_f2,
-                        'e_total': e_total,
-                        'estado': estado
-                    }
-                }
-                adc_service.on_arduino_data(timestamp, vcap, metadata)
-
-        except Exception as e:
-            if DEBUG_MODE:
-                print(f"[ARDUINO] Error procesando datos: {e}")
+        return False
 
     def read_data(self, adc_service):
         print("[ARDUINO] Iniciando lectura de datos de energia...")
 
         while self.running:
+            # The supervisor opens the port; wait for it without polling
+            if not self.link.ready.wait(timeout=0.5):
+                continue
+            try:
+                raw_bytes = self._read_chunk()
+            except Exception as e:
+                if self.running:  # Otherwise stop() closed the port under the read
+                    self._connection_lost(e)
+                continue
+
             try:
-                if not self.ser or not self.ser.is_open:
-                    if self.connection_attempts >= self.max_connection_attempts:
-                        time.sleep(1)  # Just wait, don't try to reconnect
-                        continue
-                    if not self.connect():
-                        time.sleep(1)
-                        continue
-
-                if self.ser.in_waiting > 0:
-                    try:
-                        line = self.ser.readline().decode('utf-8', errors='ignore')
-                        if ',' in line and line.count(',') >= 6:
-                            self.process_arduino_data(line, adc_service)
-                    except Exception as e:
-                        if DEBUG_MODE:
-                            print(f"[ARDUINO] Error leyendo línea: {e}")
-
-                time.sleep(0.01)
+                if raw_bytes:
+                    # Parse every complete line of this read in one batch
+                    for row in self.parser.feed(raw_bytes):
+                        adc_service.on_arduino_data(row.timestamp, row.vcap, row.metadata())
 
             except Exception as e:
                 if DEBUG_MODE:
                     print(f"[ARDUINO] ❌ Error en lectura: {e}")
-                time.sleep(1)
 
-    def start(self, adc_service):
+    def start(self, adc_service, supervisor=None):
         self.running = True
-        import threading
         self.thread = threading.Thread(target=self.read_data, args=(adc_service,), daemon=True)
         self.thread.start()
+        self.supervisor = supervisor or get_supervisor()
+        self.supervisor.register(self)
 
     def stop(self):
         self.running = False
+        if self.supervisor:
+            self.supervisor.unregister(self)
+        self.link.ready.clear()
         if self.ser:
             self.ser.close()
\ No newline at end of file
@@ -0,0 +1,32 @@
+from multiprocessing import shared_memory
+from .ring_buffer import SampleRing, ring_nbytes
+
+
+class SharedSampleRing(SampleRing):
+    """SampleRing laid out in multiprocessing shared memory
+
+    The creating process passes a capacity; the other side attaches by name and
+    reads the layout from the header. Producer and consumer may live in
+    different processes, with the same lock-free drop-oldest protocol.
+    """
+
+    def __init__(self, capacity: int = None, name: str = None, timestamps: bool = False):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=ring_nbytes(capacity, timestamps))
+            self.owner = True
+            self._map(self.shm.buf, capacity, timestamps)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+            self.owner = False
+            self._map(self.shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """Release the mapping (and the segment, if this process created it)"""
+        del self.header, self.indices, self.samples, self.timestamps
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,225 @@
+import threading
+import queue
+import time
+from collections import deque
+import numpy as np
+from .filters import BaselineEMA, bandpass_filter, notch_filter
+from .r_peak_detector import RPeakDetector
+from .running_median import MovingMedianBaseline
+from .signal_quality import SignalQualityIndex
+from .config import (SAMPLE_RATE, FILTER_CHAIN, BASELINE_ALPHA, NOTCH_HZ, NOTCH_Q,
+                     BANDPASS_LOW_HZ, BANDPASS_HIGH_HZ, BANDPASS_ORDER, PROCESSING_QUEUE_BLOCKS,
+                     HOST_PEAK_DETECTION, SIGNAL_QUALITY, LEADS)
+
+
+def build_stage(name, sample_rate=SAMPLE_RATE):
+    """Create one processing stage from its FILTER_CHAIN name"""
+    if name == "baseline":
+        return BaselineEMA(BASELINE_ALPHA)
+    if name == "median":
+        return MovingMedianBaseline(sample_rate)
+    if name == "notch":
+        return notch_filter(sample_rate, NOTCH_HZ, NOTCH_Q)
+    if name == "bandpass":
+        return bandpass_filter(sample_rate, BANDPASS_LOW_HZ, BANDPASS_HIGH_HZ, BANDPASS_ORDER)
+    raise ValueError(f"Unknown processing stage: {name}")
+
+
+class SignalProcessingService:
+    """Service that filters ESP32 sample blocks on a worker thread
+
+    Each stage keeps its filter state between blocks, so every sample is
+    filtered exactly once however the stream is split into blocks. The result
+    goes to the UI as a ProcessedBlock carrying both the raw and the filtered
+    voltages, with the time spent in each stage in metadata['stage_ms'].
+    With HOST_PEAK_DETECTION the filtered blocks also go through an
+    RPeakDetector, whose RPeakEvents are published through the ADC service.
+    With SIGNAL_QUALITY the raw blocks are checked by a SignalQualityIndex,
+    whose QualityEvents are published the same way.
+
+    Every lead has its own stages and detector. Blocks are split at the
+    sample index of each lead change, so the state of a lead (filter zi,
+    detector thresholds) is left untouched while other leads are acquired
+    and picks up where it stopped when the lead comes back.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, chain=None):
+        self.running = False
+        self.thread = None
+        self.sample_rate = sample_rate
+        self.chain = list(chain or FILTER_CHAIN)
+        self.lead_stages = [[build_stage(name, sample_rate) for name in self.chain] for _ in LEADS]
+        self.lead_detectors = [RPeakDetector(sample_rate) if HOST_PEAK_DETECTION else None for _ in LEADS]
+        self.lead_quality = [SignalQualityIndex(sample_rate, i) if SIGNAL_QUALITY else None
+                             for i in range(len(LEADS))]
+        self.lead_index = 0  # Lead of the samples being processed
+        self.lead_changes = deque()  # (sample_index, lead_index) from lead_changed(), oldest first
+
+        # Communication queues (one item per block)
+        self.input_queue = queue.Queue(maxsize=PROCESSING_QUEUE_BLOCKS)
+        self.ui_service = None
+        self.adc_service = None
+
+        # Statistics
+        self.blocks_processed = 0
+        self.samples_processed = 0
+        self.dropped_blocks = 0
+        self.stage_time_s = {stage.name: 0.0 for stage in self.stages}
+        if self.detector:
+            self.stage_time_s[self.detector.name] = 0.0
+        if self.quality:
+            self.stage_time_s[self.quality.name] = 0.0
+
+        print("Signal Processing Service initialized")
+
+    def set_services(self, ui_service, adc_service=None):
+        """Set references to other services for communication"""
+        self.ui_service = ui_service
+        self.adc_service = adc_service
+
+    def start(self):
+        """Start the processing worker thread"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+            print("Signal Processing Service started")
+
+    def stop(self):
+        """Stop the processing worker thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        print("Signal Processing Service stopped")
+
+    @property
+    def stages(self):
+        """Filter stages of the current lead"""
+        return self.lead_stages[self.lead_index]
+
+    @property
+    def detector(self):
+        """R-peak detector of the current lead (None without HOST_PEAK_DETECTION)"""
+        return self.lead_detectors[self.lead_index]
+
+    @property
+    def quality(self):
+        """Signal quality index of the current lead (None without SIGNAL_QUALITY)"""
+        return self.lead_quality[self.lead_index]
+
+    def lead_changed(self, sample_index: int, lead_index: int):
+        """Samples from sample_index on belong to lead_index (called on LEAD_CHANGE)"""
+        if 0 <= lead_index < len(self.lead_stages):
+            self.lead_changes.append((sample_index, lead_index))
+
+    def process_block(self, block):
+        """Queue a SampleBlock for filtering (called from the acquisition side)"""
+        try:
+            self.input_queue.put_nowait(block)
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def reset(self):
+        """Forget the filter state of every lead (e.g. after a gap in the stream)"""
+        for stages, detector, quality in zip(self.lead_stages, self.lead_detectors, self.lead_quality):
+            for stage in stages:
+                stage.reset()
+            if detector:
+                detector.reset()
+            if quality:
+                quality.reset()
+
+    def stage_stats(self) -> dict:
+        """Average processing cost of each stage in microseconds per sample"""
+        samples = max(self.samples_processed, 1)
+        return {name: total * 1e6 / samples for name, total in self.stage_time_s.items()}
+
+    def filter_block(self, voltages: np.ndarray):
+        """Run the chain over one block; returns (filtered, {stage: ms})"""
+        x = np.asarray(voltages, dtype=np.float64)
+        stage_ms = {}
+        for stage in self.stages:
+            started = time.perf_counter()
+            x = stage.process(x)
+            elapsed = time.perf_counter() - started
+            self.stage_time_s[stage.name] += elapsed
+            stage_ms[stage.name] = elapsed * 1000.0
+        self.blocks_processed += 1
+        self.samples_processed += len(x)
+        return x, stage_ms
+
+    def detect_peaks(self, filtered: np.ndarray, first_index: int):
+        """Run the R-peak detector over a filtered block; returns its RPeakEvents"""
+        started = time.perf_counter()
+        events = self.detector.process(filtered, first_index)
+        self.stage_time_s[self.detector.name] += time.perf_counter() - started
+        return events
+
+    def check_quality(self, voltages: np.ndarray, first_index: int):
+        """Run the signal quality index over a raw block; returns its QualityEvents"""
+        started = time.perf_counter()
+        events = self.quality.process(voltages, first_index)
+        self.stage_time_s[self.quality.name] += time.perf_counter() - started
+        return events
+
+    def _lead_segments(self, n, first_index):
+        """Split a block into (start, end) runs of one lead, switching lead_index at each change"""
+        start = 0
+        while self.lead_changes:
+            sample_index, lead_index = self.lead_changes[0]
+            if sample_index >= first_index + n:
+                break  # Not reached in this block
+            split = max(sample_index - first_index, start)  # A late change applies from here
+            if split > start:
+                yield start, split
+            start = split
+            self.lead_index = lead_index
+            self.lead_changes.popleft()
+        if start < n:
+            yield start, n
+
+    def _process_leads(self, voltages, first_index):
+        """Filter (and detect on) each lead's part of a block with that lead's state"""
+        parts = []
+        stage_ms = {}
+        for start, end in self._lead_segments(len(voltages), first_index):
+            quality_events = self.check_quality(voltages[start:end], first_index + start) if self.quality else []
+            filtered, ms = self.filter_block(voltages[start:end])
+            parts.append(filtered)
+            for name, value in ms.items():
+                stage_ms[name] = stage_ms.get(name, 0.0) + value
+            # R peaks first: the synchronized trigger is waiting for them
+            events = self.detect_peaks(filtered, first_index + start) if self.detector else []
+            if self.adc_service:
+                events += quality_events
+                for event in events:
+                    self.adc_service.on_esp32_event(event)
+        if len(parts) == 1:
+            return parts[0], stage_ms
+        return (np.concatenate(parts) if parts else np.asarray(voltages, dtype=np.float64)), stage_ms
+
+    def _run(self):
+        """Main service loop"""
+        while self.running:
+            try:
+                block = self.input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            try:
+                filtered, stage_ms = self._process_leads(block.voltages, block.first_index)
+
+                if self.ui_service:
+                    from .ui_service import ProcessedBlock
+                    metadata = dict(block.metadata or {})
+                    metadata['stage_ms'] = stage_ms
+                    self.ui_service.add_processed_block(ProcessedBlock(
+                        timestamp=block.timestamp,
+                        raw_voltage=block.voltages,
+                        first_sample=block.first_index,
+                        metadata=metadata,
+                        timestamps=block.timestamps,
+                        filtered_voltage=filtered
+                    ))
+            except Exception as e:
+                print(f"Signal Processing error: {e}")
@@ -0,0 +1,76 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .events import QualityEvent
+from .frame_decoder import ADC_VREF, ADC_MAX_CODE
+from .config import (SAMPLE_RATE, SQI_WINDOW_MS, SQI_HOP_MS, SQI_FLATLINE_V, SQI_CLIP_FRACTION, SQI_NOISE_V,
+                     SQI_BASELINE_JUMP_V)
+
+ISSUES = ("flatline", "clipping", "noise", "baseline_jump")
+CLIP_MARGIN_V = 0.5 * ADC_VREF / ADC_MAX_CODE  # Within half an LSB of 0 or 4095 counts as clipped
+NOISE_SCALE = 1.0 / (0.6745 * np.sqrt(2.0))  # Median |difference| of white noise -> its RMS
+
+
+class SignalQualityIndex:
+    """Signal quality checks over sliding windows of the raw samples of one lead
+
+    Every SQI_HOP_MS the last SQI_WINDOW_MS are checked for a flat line,
+    samples at the ADC rails, high-frequency noise and a baseline jump. All
+    the windows a block completes are evaluated together on strided views of
+    the block and the samples carried from the previous one, so the cost per
+    sample stays a few vectorized operations. Only changes of the set of
+    issues are returned as QualityEvents. A gap in the sample index restarts
+    the windows.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, lead_index=0):
+        self.name = "sqi"
+        self.lead_index = lead_index
+        self.window = max(int(SQI_WINDOW_MS * sample_rate / 1000), 2)
+        self.hop = min(max(int(SQI_HOP_MS * sample_rate / 1000), 1), self.window)
+        self.windows = 0  # Windows checked
+        self.poor = 0  # ... with at least one issue
+        self.flagged = dict.fromkeys(ISSUES, 0)
+        self.reset()
+
+    def reset(self):
+        self.carry = np.empty(0)  # Samples of the windows not completed yet
+        self.next_index = None
+        self.issues = None  # Issues of the last window (None before the first one)
+
+    def process(self, x: np.ndarray, first_index: int):
+        """Check the windows completed by a raw block; returns QualityEvents for the changes"""
+        x = np.asarray(x, dtype=np.float64)
+        if first_index != self.next_index:
+            self.carry = np.empty(0)
+        self.next_index = first_index + len(x)
+        data = np.concatenate((self.carry, x))
+        data_first = first_index - len(self.carry)
+        count = (len(data) - self.window) // self.hop + 1 if len(data) >= self.window else 0
+        self.carry = data[count * self.hop:]
+        if count == 0:
+            return []
+
+        starts = np.arange(count) * self.hop
+        windows = sliding_window_view(data, self.window)[starts]
+        flatline = windows.max(axis=1) - windows.min(axis=1) < SQI_FLATLINE_V
+        at_rails = np.r_[0, np.cumsum((data <= CLIP_MARGIN_V) | (data >= ADC_VREF - CLIP_MARGIN_V))]
+        clipping = at_rails[starts + self.window] - at_rails[starts] > SQI_CLIP_FRACTION * self.window
+        steps = sliding_window_view(np.abs(np.diff(data)), self.window - 1)[starts]
+        noise_v = np.median(steps, axis=1) * NOISE_SCALE
+        jump = np.abs(np.median(windows[:, -self.hop:], axis=1) -
+                      np.median(windows[:, :self.hop], axis=1)) > SQI_BASELINE_JUMP_V
+        flags = np.column_stack((flatline, clipping, noise_v > SQI_NOISE_V, jump))
+
+        self.windows += count
+        self.poor += int(np.count_nonzero(flags.any(axis=1)))
+        for name, column in zip(ISSUES, flags.T):
+            self.flagged[name] += int(np.count_nonzero(column))
+
+        events = []
+        ends = data_first + starts + self.window - 1
+        for i, row in enumerate(flags.tolist()):
+            issues = tuple(name for name, bad in zip(ISSUES, row) if bad)
+            if issues != self.issues:
+                self.issues = issues
+                events.append(QualityEvent(int(ends[i]), self.lead_index, issues, float(noise_v[i])))
+        return events
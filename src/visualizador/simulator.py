@@ -0,0 +1,374 @@
+"""ESP32/Arduino device simulator on Linux pseudo-terminals
+
+Run with ``python -m visualizador.simulator --rate 10000`` and point the
+application at the printed ports through the VISUALIZADOR_PORT_ESP32 /
+VISUALIZADOR_PORT_ARDUINO environment variables.
+"""
+import abc
+import argparse
+import errno
+import os
+import threading
+import time
+import tty
+import numpy as np
+from .config import SAMPLE_RATE, LEADS
+from .frame_decoder import FRAME_START, ADC_VREF, ADC_MAX_CODE, PROTOCOL_LEGACY, PROTOCOL_BLOCK
+from .block_frame import encode_block_frame
+
+# (amplitude V, width s, offset from R s) of the P, Q, R, S and T waves
+ECG_WAVES = (
+    (0.08, 0.025, -0.20),
+    (-0.06, 0.010, -0.035),
+    (0.90, 0.012, 0.0),
+    (-0.20, 0.012, 0.035),
+    (0.22, 0.045, 0.28),
+)
+
+
+class SyntheticECG:
+    """Continuous synthetic ECG generator (sum-of-Gaussians beat model)"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, heart_rate_bpm=72.0, rr_jitter=0.03,
+                 baseline=1.2, noise=0.005, mains_hz=50.0, mains_amplitude=0.01, seed=None):
+        self.sample_rate = sample_rate
+        self.rr_s = 60.0 / heart_rate_bpm
+        self.rr_jitter = rr_jitter
+        self.baseline = baseline
+        self.noise = noise
+        self.mains_hz = mains_hz
+        self.mains_amplitude = mains_amplitude
+        self.rng = np.random.default_rng(seed)
+        self.sample_index = 0
+        self.beat_times = [0.3]  # R-peak times (s), generated ahead as needed
+
+    def _beats_until(self, t_end):
+        while self.beat_times[-1] < t_end:
+            rr = self.rr_s * (1.0 + self.rr_jitter * self.rng.standard_normal())
+            self.beat_times.append(self.beat_times[-1] + rr)
+
+    def generate(self, count):
+        """Next count samples in volts and the sample indices of their R peaks"""
+        start = self.sample_index
+        t = np.arange(start, start + count) / self.sample_rate
+        t_first, t_last = t[0], t[-1]
+        self._beats_until(t_last + 1.0)
+
+        beats = np.array([b for b in self.beat_times if t_first - 1.0 <= b <= t_last + 1.0])
+        signal = np.full(count, self.baseline)
+        if len(beats):
+            dt = t[:, None] - beats[None, :]
+            for amplitude, width, offset in ECG_WAVES:
+                signal += amplitude * np.exp(-0.5 * ((dt - offset) / width) ** 2).sum(axis=1)
+
+        signal += self.noise * self.rng.standard_normal(count)
+        signal += self.mains_amplitude * np.sin(2 * np.pi * self.mains_hz * t)
+
+        r_indices = np.round(beats * self.sample_rate).astype(np.int64)
+        r_indices = r_indices[(r_indices >= start) & (r_indices < start + count)]
+
+        # Drop beats that can no longer affect future samples
+        self.beat_times = [b for b in self.beat_times if b > t_first - 1.0] or [self.beat_times[-1]]
+        self.sample_index += count
+        return signal, r_indices
+
+
+def to_codes(voltages):
+    """Quantize volts to 12-bit ADC codes"""
+    return np.clip(np.round(voltages / ADC_VREF * ADC_MAX_CODE), 0, ADC_MAX_CODE).astype(np.uint16)
+
+
+def encode_frames(voltages):
+    """Encode volts as ESP32 4-byte frames (0xAA, LSB, MSB, XOR)"""
+    codes = to_codes(voltages)
+    frames = np.empty((len(codes), 4), dtype=np.uint8)
+    frames[:, 0] = FRAME_START
+    frames[:, 1] = codes & 0xFF
+    frames[:, 2] = codes >> 8
+    frames[:, 3] = frames[:, 0] ^ frames[:, 1] ^ frames[:, 2]
+    return frames
+
+
+def open_pty():
+    """Open a raw pseudo-terminal; returns (master_fd, slave_fd, slave_path)"""
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(slave_fd)
+    os.set_blocking(master_fd, False)
+    return master_fd, slave_fd, os.ttyname(slave_fd)
+
+
+class _PtyDevice(abc.ABC):
+    """Common pseudo-terminal plumbing: pacing thread, command input and write stats"""
+
+    name = "SIM"
+
+    def __init__(self, chunk_ms):
+        self.chunk_ms = chunk_ms
+        self.master_fd, self.slave_fd, self.port = open_pty()
+        self.running = False
+        self.thread = None
+        self.command_buffer = b""
+        self.commands = []  # (time.perf_counter(), command) of every received command
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def write(self, data):
+        """Non-blocking write; bytes the port cannot take are dropped like a UART overrun"""
+        try:
+            written = os.write(self.master_fd, data)
+        except BlockingIOError:
+            written = 0
+        self.bytes_written += written
+        self.bytes_dropped += len(data) - written
+
+    def _read_commands(self):
+        try:
+            self.command_buffer += os.read(self.master_fd, 4096)
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EIO):
+                raise
+            return
+        *lines, self.command_buffer = self.command_buffer.split(b"\n")
+        for line in lines:
+            command = line.strip().decode('ascii', errors='ignore')
+            if command:
+                self.commands.append((time.perf_counter(), command))
+                self.on_command(command)
+
+    def on_command(self, command):
+        pass
+
+    def _run(self):
+        started = time.perf_counter()
+        while self.running:
+            self._read_commands()
+            self.step(time.perf_counter() - started)
+            time.sleep(self.chunk_ms / 1000.0)
+
+    @abc.abstractmethod
+    def step(self, elapsed):
+        """Emit what is due elapsed seconds after start()"""
+
+
+class ESP32Simulator(_PtyDevice):
+    """Streams ECG frames with LEAD_CHANGE / R_PEAK markers on a pseudo-terminal
+
+    With protocol="block" samples go out in block frames of block_samples with
+    sequence counter and CRC16; frame_loss drops that fraction of the frames
+    (after numbering them) to exercise the lost-sample accounting.
+    """
+
+    name = "ESP32"
+
+    def __init__(self, sample_rate=SAMPLE_RATE, heart_rate_bpm=72.0, lead_change_interval_s=0.0,
+                 r_peak_markers=True, chunk_ms=2.0, seed=None, protocol=PROTOCOL_LEGACY,
+                 block_samples=32, frame_loss=0.0):
+        super().__init__(chunk_ms)
+        self.protocol = protocol
+        self.block_samples = block_samples
+        self.frame_loss = frame_loss
+        self.loss_rng = np.random.default_rng(seed)
+        self.block_codes = np.empty(0, dtype=np.uint16)  # Samples waiting to fill a block frame
+        self.frames_dropped = 0
+        self.samples_dropped = 0
+        self.sample_rate = sample_rate
+        self.ecg = SyntheticECG(sample_rate, heart_rate_bpm, seed=seed)
+        self.lead_change_interval_s = lead_change_interval_s
+        self.r_peak_markers = r_peak_markers
+        self.lead_index = 0
+        self.pending_markers = []  # Text lines to insert before the next generated sample
+        self.samples_sent = 0
+        self.r_peaks_sent = []  # Sample indices of the R_PEAK markers
+        self.next_lead_change = lead_change_interval_s
+
+    def on_command(self, command):
+        if command.startswith("LEAD_"):
+            name = command[len("LEAD_"):]
+            names = [lead.upper() for lead in LEADS]
+            if name.upper() in names:
+                self._change_lead(names.index(name.upper()))
+
+    def _change_lead(self, lead_index):
+        self.lead_index = lead_index
+        # Third field: device sample counter of the first sample on the new lead
+        self.pending_markers.append(f"LEAD_CHANGE:{lead_index},{LEADS[lead_index]},{self.samples_sent}\n".encode())
+
+    def step(self, elapsed):
+        if self.lead_change_interval_s > 0 and elapsed >= self.next_lead_change:
+            self.next_lead_change += self.lead_change_interval_s
+            self._change_lead((self.lead_index + 1) % len(LEADS))
+
+        due = int(elapsed * self.sample_rate) - self.samples_sent
+        if due <= 0:
+            return
+        voltages, r_indices = self.ecg.generate(due)
+        if self.protocol == PROTOCOL_BLOCK:
+            self._send_blocks(voltages, r_indices)
+            return
+        frames = encode_frames(voltages)
+
+        # Text markers are inserted between frames at their sample position
+        chunks = list(self.pending_markers)
+        self.pending_markers = []
+        position = 0
+        if self.r_peak_markers:
+            for r_index in r_indices.tolist():
+                offset = r_index - self.samples_sent
+                chunks.append(frames[position:offset].tobytes())
+                chunks.append(f"R_PEAK:{r_index}\n".encode())
+                self.r_peaks_sent.append(r_index)
+                position = offset
+        chunks.append(frames[position:].tobytes())
+
+        self.write(b"".join(chunks))
+        self.samples_sent += due
+
+    def _send_blocks(self, voltages, r_indices):
+        """Emit every complete block frame; markers go before the frame holding their sample"""
+        first_index = self.samples_sent - len(self.block_codes)
+        codes = np.concatenate((self.block_codes, to_codes(voltages)))
+        complete = len(codes) // self.block_samples * self.block_samples
+        self.block_codes = codes[complete:]
+        self.samples_sent += len(voltages)
+
+        chunks = list(self.pending_markers)
+        self.pending_markers = []
+        r_blocks = {}
+        if self.r_peak_markers:
+            for r_index in r_indices.tolist():
+                r_blocks.setdefault((r_index - first_index) // self.block_samples, []).append(r_index)
+
+        for block in range(complete // self.block_samples):
+            for r_index in r_blocks.pop(block, []):
+                chunks.append(f"R_PEAK:{r_index}\n".encode())
+                self.r_peaks_sent.append(r_index)
+            if self.frame_loss and self.loss_rng.random() < self.frame_loss:
+                self.frames_dropped += 1
+                self.samples_dropped += self.block_samples
+                continue
+            start = block * self.block_samples
+            chunks.append(encode_block_frame(first_index + start, codes[start:start + self.block_samples]))
+
+        # Markers of samples still waiting in the partial block are sent with it
+        for r_index in sorted(sum(r_blocks.values(), [])):
+            self.pending_markers.append(f"R_PEAK:{r_index}\n".encode())
+            self.r_peaks_sent.append(r_index)
+        self.write(b"".join(chunks))
+
+
+class ArduinoSimulator(_PtyDevice):
+    """Emits 7-field energy CSV lines through CARGA / DESCARGA cycles on a pseudo-terminal"""
+
+    name = "ARDUINO"
+
+    # (state, duration s) of one charge/discharge cycle
+    CYCLE = (("CARGA", 3.0), ("ESPERA", 1.0), ("DESCARGA_F1", 0.05), ("DESCARGA_F2", 0.05), ("REPOSO", 1.0))
+
+    def __init__(self, line_rate=100.0, capacitance_f=0.0047, v_target=25.0, chunk_ms=5.0):
+        super().__init__(chunk_ms)
+        self.line_rate = line_rate
+        self.capacitance_f = capacitance_f
+        self.v_target = v_target
+        self.lines_sent = 0
+        self.cycle_length = sum(duration for _, duration in self.CYCLE)
+
+    def state_at(self, t):
+        """(estado, vcap, corriente, e_f1, e_f2, e_total) at time t of the cycle loop"""
+        t = t % self.cycle_length
+        e_full = 0.5 * self.capacitance_f * self.v_target ** 2
+        for estado, duration in self.CYCLE:
+            if t < duration:
+                break
+            t -= duration
+        fraction = t / duration
+
+        if estado == "CARGA":
+            vcap = self.v_target * fraction
+            return estado, vcap, 0.5, 0.0, 0.0, 0.5 * self.capacitance_f * vcap ** 2
+        if estado == "ESPERA":
+            return estado, self.v_target, 0.0, 0.0, 0.0, e_full
+        if estado == "DESCARGA_F1":
+            vcap = self.v_target * (1.0 - 0.5 * fraction)
+            e_f1 = e_full - 0.5 * self.capacitance_f * vcap ** 2
+            return estado, vcap, 8.0, e_f1, 0.0, e_f1
+        if estado == "DESCARGA_F2":
+            vcap = self.v_target * 0.5 * (1.0 - fraction)
+            e_f1 = e_full * 0.75
+            e_f2 = e_full * 0.25 - 0.5 * self.capacitance_f * vcap ** 2
+            return estado, vcap, -8.0, e_f1, e_f2, e_f1 + e_f2
+        return estado, 0.0, 0.0, 0.0, 0.0, 0.0
+
+    def step(self, elapsed):
+        due = int(elapsed * self.line_rate) - self.lines_sent
+        if due <= 0:
+            return
+        lines = []
+        for k in range(self.lines_sent, self.lines_sent + due):
+            t = k / self.line_rate
+            estado, vcap, corriente, e_f1, e_f2, e_total = self.state_at(t)
+            lines.append(f"{int(t * 1000)},{vcap:.3f},{corriente:.3f},{e_f1:.4f},"
+                         f"{e_f2:.4f},{e_total:.4f},{estado}\n")
+        self.write("".join(lines).encode())
+        self.lines_sent += due
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de ESP32/Arduino sobre pseudo-terminales")
+    parser.add_argument("--rate", type=int, default=SAMPLE_RATE, help="Muestras/s del ESP32 (2000-100000)")
+    parser.add_argument("--bpm", type=float, default=72.0, help="Frecuencia cardiaca simulada")
+    parser.add_argument("--lead-interval", type=float, default=0.0,
+                        help="Segundos entre cambios de derivacion automaticos (0 = solo por comando)")
+    parser.add_argument("--telemetry-rate", type=float, default=100.0, help="Lineas/s de energia del Arduino")
+    parser.add_argument("--no-arduino", action="store_true", help="Simular solo el ESP32")
+    parser.add_argument("--protocol", choices=(PROTOCOL_LEGACY, PROTOCOL_BLOCK), default=PROTOCOL_LEGACY,
+                        help="Tramas de 4 bytes por muestra o bloques con secuencia y CRC16")
+    parser.add_argument("--block-samples", type=int, default=32, help="Muestras por trama de bloque (par)")
+    parser.add_argument("--frame-loss", type=float, default=0.0, help="Fraccion de tramas de bloque descartadas")
+    args = parser.parse_args(argv)
+
+    devices = [ESP32Simulator(args.rate, args.bpm, args.lead_interval, protocol=args.protocol,
+                              block_samples=args.block_samples, frame_loss=args.frame_loss)]
+    if not args.no_arduino:
+        devices.append(ArduinoSimulator(args.telemetry_rate))
+
+    print("=" * 70)
+    print("SIMULADOR DE DISPOSITIVOS")
+    print("=" * 70)
+    print(f"export VISUALIZADOR_PORT_ESP32={devices[0].port}")
+    if not args.no_arduino:
+        print(f"export VISUALIZADOR_PORT_ARDUINO={devices[1].port}")
+    print(f"export VISUALIZADOR_SAMPLE_RATE={args.rate}")
+    print("=" * 70)
+
+    for device in devices:
+        device.start()
+
+    try:
+        last = {device.name: 0 for device in devices}
+        while True:
+            time.sleep(5)
+            for device in devices:
+                rate = (device.bytes_written - last[device.name]) / 5.0
+                last[device.name] = device.bytes_written
+                print(f"[{device.name}] {rate / 1024:.1f} KB/s, {device.bytes_dropped} bytes descartados")
+    except KeyboardInterrupt:
+        print("\nSimulador detenido")
+    finally:
+        for device in devices:
+            device.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import numpy as np
+from .frame_decoder import FrameDecoder
+from .events import LeadChangeEvent, RPeakEvent, DischargeEvent
+
+NEWLINE = 0x0A
+MAX_LINE_LENGTH = 256
+
+
+SEQ_MODULUS = 1 << 16
+
+
+class StreamDemultiplexer:
+    """Incremental parser for the ESP32 stream of interleaved binary frames and text lines
+
+    Every read is scanned once: bytes covered by valid frames become samples, the
+    remaining ASCII bytes are assembled into lines (which may span several reads)
+    and parsed into typed events carrying the index of the next sample.
+
+    With block frames a line only falls between frames, which would round its
+    index to a frame boundary. Markers that carry the device sample counter
+    (`R_PEAK:<n>`, `LEAD_CHANGE:<idx>,<name>,<n>`) are placed exactly instead,
+    by mapping <n> through the `seq` of the nearest frame.
+    """
+
+    def __init__(self, decoder: FrameDecoder = None):
+        self.decoder = decoder or FrameDecoder()
+        self.line_buffer = b""
+        self.sample_count = 0  # Samples decoded so far (index of the next sample)
+        self.text_lines = 0
+        self.seq_anchor = None  # (seq, sample index) of the last block frame
+
+    def reset(self):
+        """Drop partial frames and lines (e.g. after a reconnect)"""
+        self.decoder.reset()
+        self.line_buffer = b""
+        self.seq_anchor = None
+
+    def feed(self, raw_bytes: bytes):
+        """Parse one read; returns (voltages, events)"""
+        data = self.decoder.pending + bytes(raw_bytes)
+        buf = np.frombuffer(data, dtype=np.uint8)
+        scan = self.decoder.decode_buffer(buf)
+        self.decoder.pending = data[scan.consumed:]
+
+        events = []
+        if scan.consumed > int((scan.ends - scan.starts).sum()):
+            events = self._parse_text(buf[:scan.consumed], scan)
+        if scan.seqs is not None and len(scan.seqs):
+            self.seq_anchor = (int(scan.seqs[-1]), self.sample_count + int(scan.sample_offsets[-2]))
+
+        self.sample_count += len(scan.voltages)
+        return scan.voltages, events
+
+    def _parse_text(self, buf: np.ndarray, scan):
+        """Assemble the bytes between frames into lines and parse them"""
+        # Mark frame bytes with +1/-1 at frame bounds; the running sum is 1 inside a frame
+        bounds = np.zeros(len(buf) + 1, dtype=np.int32)
+        np.add.at(bounds, scan.starts, 1)
+        np.add.at(bounds, scan.ends, -1)
+        in_frame = np.cumsum(bounds[:-1]) > 0
+        gap_pos = np.flatnonzero(~in_frame)
+        gap = buf[gap_pos]
+        is_ascii = gap < 0x80
+        gap_pos = gap_pos[is_ascii]
+        text = gap[is_ascii]
+
+        # Sample index of every line end: samples of the frames that precede the newline
+        newline_pos = gap_pos[text == NEWLINE]
+        next_frames = np.searchsorted(scan.starts, newline_pos)
+        line_indices = self.sample_count + scan.sample_offsets[next_frames]
+
+        lines = (self.line_buffer + text.tobytes()).split(b"\n")
+        self.line_buffer = lines.pop()[-MAX_LINE_LENGTH:]
+
+        events = []
+        for line, sample_index, next_frame in zip(lines, line_indices.tolist(), next_frames.tolist()):
+            self.text_lines += 1
+            anchor = self._anchor(scan, next_frame)
+            event = self.parse_line(line.decode('ascii', errors='ignore'), sample_index, anchor)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _anchor(self, scan, frame):
+        """(seq, sample index) of the block frame after a line, else of the last one before it"""
+        if scan.seqs is None:
+            return None  # Legacy frames: the position between frames is exact
+        if frame < len(scan.seqs):
+            return int(scan.seqs[frame]), self.sample_count + int(scan.sample_offsets[frame])
+        if len(scan.seqs):
+            return int(scan.seqs[-1]), self.sample_count + int(scan.sample_offsets[-2])
+        return self.seq_anchor
+
+    @staticmethod
+    def parse_line(line: str, sample_index: int, anchor=None):
+        """Convert one text line into a typed event (None if it is not an event)
+
+        anchor is the (seq, sample index) of a nearby block frame; with it a
+        device sample counter in the marker takes precedence over sample_index.
+        """
+        def placed(device_index: str):
+            if anchor is None:
+                return sample_index
+            try:
+                delta = (int(device_index) - anchor[0]) % SEQ_MODULUS
+            except ValueError:
+                return sample_index
+            return anchor[1] + (delta - SEQ_MODULUS if delta >= SEQ_MODULUS // 2 else delta)
+
+        pos = line.find("LEAD_CHANGE:")
+        if pos >= 0:
+            parts = line[pos + len("LEAD_CHANGE:"):].split(",")
+            if len(parts) >= 2:
+                try:
+                    lead_index = int(parts[0].strip())
+                except ValueError:
+                    return None
+                if len(parts) >= 3:
+                    sample_index = placed(parts[2].strip())
+                return LeadChangeEvent(sample_index, lead_index, parts[1].strip())
+            return None
+
+        pos = line.find("R_PEAK:")
+        if pos >= 0:
+            return RPeakEvent(placed(line[pos + len("R_PEAK:"):].strip()))
+
+        pos = line.find("DISPARO:")
+        if pos >= 0:
+            return DischargeEvent(sample_index, line[pos:].strip())
+
+        return None
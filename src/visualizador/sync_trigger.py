@@ -0,0 +1,252 @@
+"""Synchronized discharge trigger: R peak + POST_R_DELAY_SAMPLES -> Arduino write
+
+Benchmark the whole path against the device simulator with
+``python -m visualizador.sync_trigger --seconds 60``.
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+import numpy as np
+from .config import (SAMPLE_RATE, POST_R_DELAY_SAMPLES, SYNC_FIRE_COMMAND, SYNC_R_SOURCE, SYNC_MAX_R_TO_FIRE_MS,
+                     SYNC_TRIGGER_PRIORITY, SYNC_SPIN_MS, SYNC_HISTORY, SYNC_SWITCH_INTERVAL_S)
+
+BENCHMARK_SWITCH_INTERVAL_S = 0.0005
+
+
+class TriggerRecord(NamedTuple):
+    """Timestamps (host ms, time.time() base) of one synchronized trigger"""
+    r_index: int
+    r_time_ms: float  # Sample clock time of the R peak
+    detected_ms: float  # R-peak event handed to the trigger
+    due_ms: float  # R peak + POST_R_DELAY_SAMPLES
+    written_ms: float  # Command written to the port (NaN if skipped)
+    fired: bool
+
+
+def _now_ms():
+    return time.time() * 1000.0
+
+
+class SyncTrigger:
+    """Dedicated thread that turns R-peak events into timed discharge commands
+
+    R-peak events are handed over straight from the thread that produced
+    them (serial reader or processing worker) through a SimpleQueue; the
+    trigger thread sleeps until shortly before the due time, busy-waits the
+    rest and writes SYNC_FIRE_COMMAND directly to the Arduino port, without
+    going through ADCService's command polling loop. Nothing is sent unless
+    the trigger has been armed, and it cannot be armed unless the Arduino
+    reader offers write_now() (threaded and async acquisition; in process
+    mode the port lives in the acquisition process) and the R peaks come
+    from the firmware (host-detected ones arrive after the post-R delay).
+    """
+
+    def __init__(self, arduino_reader, sample_clock, sample_rate=SAMPLE_RATE, command=SYNC_FIRE_COMMAND,
+                 delay_samples=POST_R_DELAY_SAMPLES, source=SYNC_R_SOURCE, switch_interval=SYNC_SWITCH_INTERVAL_S):
+        self.arduino_reader = arduino_reader
+        self.sample_clock = sample_clock
+        self.sample_rate = sample_rate
+        self.command = command
+        self.payload = f"{command}\n".encode()
+        self.delay_ms = delay_samples * 1000.0 / sample_rate
+        self.source = source
+        self.switch_interval = switch_interval  # Opt-in, see SYNC_SWITCH_INTERVAL_S
+        self.saved_switch_interval = None
+        self.pending = queue.SimpleQueue()  # (r_index, r_time_ms, detected_ms)
+        self.shots = 0  # Armed shots left (-1 = every beat, for benchmarks)
+        self.running = False
+        self.thread = None
+        self.realtime = False
+        self.history = deque(maxlen=SYNC_HISTORY)
+        self.fired = 0
+        self.skipped = 0
+
+    @property
+    def armed(self) -> bool:
+        return self.shots != 0
+
+    @property
+    def supported(self) -> bool:
+        """The Arduino port can be written directly from the trigger thread"""
+        return callable(getattr(self.arduino_reader, 'write_now', None))
+
+    @property
+    def on_time(self) -> bool:
+        """R peaks of this source arrive before the post-R delay has elapsed
+
+        Only the firmware markers do: the host detector reports an R peak
+        ~50 ms (p99 ~70 ms) after it, well past POST_R_DELAY_MS.
+        """
+        return self.source == "esp32"
+
+    @property
+    def unavailable_reason(self):
+        """Why arm() would refuse, or None if it can be armed"""
+        if not self.supported:
+            return "el puerto del Arduino no admite escritura directa (modo de adquisición 'process')"
+        if not self.on_time:
+            return (f"los picos R del detector del host llegan ~50-70 ms tarde, más que el retardo post-R "
+                    f"({self.delay_ms:.0f} ms); use SYNC_R_SOURCE = \"esp32\"")
+        return None
+
+    def arm(self, shots=1) -> bool:
+        """Fire on the next `shots` R peaks (-1: every R peak until disarmed); False if it cannot fire on time"""
+        reason = self.unavailable_reason
+        if reason:
+            print(f"[SYNC] ❌ Disparo sincronizado no disponible: {reason}")
+            return False
+        self.shots = shots
+        print(f"[SYNC] Armado ({'continuo' if shots < 0 else shots} disparo/s)")
+        return True
+
+    def disarm(self):
+        self.shots = 0
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            if self.switch_interval:
+                self.saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.saved_switch_interval, self.switch_interval))
+            self.thread = threading.Thread(target=self._run, name="sync-trigger", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        if self.saved_switch_interval is not None:
+            sys.setswitchinterval(self.saved_switch_interval)
+            self.saved_switch_interval = None
+
+    def on_r_peak(self, event):
+        """Called from the producing thread for every RPeakEvent"""
+        if self.shots == 0 or event.source != self.source:
+            return
+        self.pending.put((event.sample_index, self.sample_clock.time_of(event.sample_index), _now_ms()))
+
+    def _raise_priority(self):
+        """Real-time scheduling for this thread where the OS lets us (Linux with CAP_SYS_NICE)"""
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(SYNC_TRIGGER_PRIORITY))
+            self.realtime = True
+        except (AttributeError, OSError):
+            self.realtime = False
+
+    def _write(self):
+        return self.arduino_reader.write_now(self.payload)
+
+    def _wait_until(self, due_ms):
+        remaining = due_ms - _now_ms() - SYNC_SPIN_MS
+        if remaining > 0:
+            time.sleep(remaining / 1000.0)
+        while _now_ms() < due_ms:
+            pass
+
+    def _run(self):
+        self._raise_priority()
+        while self.running:
+            try:
+                r_index, r_time, detected = self.pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if self.shots == 0:
+                continue
+
+            due = r_time + self.delay_ms
+            self._wait_until(due)
+            if _now_ms() - r_time > SYNC_MAX_R_TO_FIRE_MS:
+                # Too late for this beat: stay armed for the next one
+                self.skipped += 1
+                self.history.append(TriggerRecord(r_index, r_time, detected, due, float('nan'), False))
+                continue
+
+            ok = self._write()
+            written = _now_ms()
+            if not ok:
+                self.skipped += 1
+                continue
+            if self.shots > 0:
+                self.shots -= 1
+            self.fired += 1
+            self.history.append(TriggerRecord(r_index, r_time, detected, due, written, True))
+            print(f"[SYNC] {self.command} enviado {written - r_time:.1f} ms despues del pico R {r_index}")
+
+    def latency_stats(self) -> dict:
+        """Distribution (ms) of the kept triggers: R to command, R to detection, and dispatch
+        (command written after the later of due time and detection)"""
+        records = [r for r in self.history if r.fired]
+        stats = {'fired': self.fired, 'skipped': self.skipped, 'realtime': self.realtime}
+        if not records:
+            return stats
+        r_time = np.array([r.r_time_ms for r in records])
+        detected = np.array([r.detected_ms for r in records])
+        due = np.array([r.due_ms for r in records])
+        written = np.array([r.written_ms for r in records])
+        for name, values in (('r_to_command', written - r_time), ('detection', detected - r_time),
+                             ('dispatch', written - np.maximum(due, detected))):
+            stats[name] = {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99)),
+                           'max': float(values.max())}
+        return stats
+
+
+def benchmark(seconds=30.0, protocol=None, switch_interval=BENCHMARK_SWITCH_INTERVAL_S):
+    """Run simulator -> serial readers -> (detector) -> trigger -> Arduino port; returns (stats, commands received)"""
+    from .simulator import ESP32Simulator, ArduinoSimulator
+    from .frame_decoder import PROTOCOL_BLOCK
+    from .adc_service import ADCService
+    from .signal_processing_service import SignalProcessingService
+
+    esp32 = ESP32Simulator(SAMPLE_RATE, protocol=protocol or PROTOCOL_BLOCK, seed=1)
+    arduino = ArduinoSimulator(line_rate=10.0, chunk_ms=0.5)
+    adc_service = ADCService(esp32_ports=[esp32.port], arduino_port=arduino.port)
+    processing_service = SignalProcessingService()
+    processing_service.set_services(None, adc_service)
+    adc_service.set_services(processing_service, None)
+    trigger = adc_service.sync_trigger
+    trigger.source = "esp32"  # The only source that can be armed
+    trigger.switch_interval = switch_interval
+
+    for device in (esp32, arduino):
+        device.start()
+    processing_service.start()
+    adc_service.start()
+    try:
+        time.sleep(3.0)  # Connect, settle the sample clock and learn detector thresholds
+        trigger.arm(-1)
+        time.sleep(seconds)
+        trigger.disarm()
+        time.sleep(0.2)
+    finally:
+        adc_service.stop()
+        processing_service.stop()
+        for device in (esp32, arduino):
+            device.stop()
+    received = sum(1 for _, command in arduino.commands if command == trigger.command)
+    return trigger.latency_stats(), received
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas del disparo sincronizado con el simulador")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Duracion con el disparo armado")
+    parser.add_argument("--switch-interval", type=float, default=BENCHMARK_SWITCH_INTERVAL_S,
+                        help="Intervalo de cambio del GIL (s) mientras corre el disparo; 0 para no tocarlo")
+    args = parser.parse_args(argv)
+
+    stats, received = benchmark(args.seconds, switch_interval=args.switch_interval)
+    print("=" * 70)
+    print(f"Disparos: {stats['fired']} enviados, {received} recibidos, {stats['skipped']} omitidos, "
+          f"prioridad tiempo real: {'si' if stats['realtime'] else 'no'}")
+    for name in ('r_to_command', 'detection', 'dispatch'):
+        if name in stats:
+            s = stats[name]
+            print(f"{name:>12}: p50 {s['p50']:.2f} ms, p99 {s['p99']:.2f} ms, max {s['max']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
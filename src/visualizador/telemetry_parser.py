@@ -0,0 +1,99 @@
+from typing import NamedTuple
+import numpy as np
+
+TELEMETRY_FIELDS = 7
+MAX_LINE_LENGTH = 256
+
+
+class EnergyRow(NamedTuple):
+    """One parsed Arduino energy telemetry line"""
+    timestamp: int
+    vcap: float
+    corriente: float
+    e_f1: float
+    e_f2: float
+    e_total: float
+    estado: str
+
+    def metadata(self) -> dict:
+        """Metadata dict in the format ADCService.on_arduino_data expects"""
+        return {
+            'energia': {
+                'vcap': self.vcap,
+                'corriente': self.corriente,
+                'e_f1': self.e_f1,
+                'e_f2': self.e_f2,
+                'e_total': self.e_total,
+                'estado': self.estado
+            }
+        }
+
+
+class TelemetryLineParser:
+    """Buffered line splitter and batch CSV parser for the Arduino energy telemetry
+
+    Every complete line of a read is handled in the same wakeup. The six numeric
+    columns of all CSV lines in the batch are converted with a single NumPy call;
+    only if that fails are lines parsed one by one to isolate the malformed ones.
+    """
+
+    def __init__(self):
+        self.line_buffer = b""
+        self.lines_parsed = 0
+        self.lines_malformed = 0
+        self.text_lines = 0  # Informational lines without CSV data
+
+    def reset(self):
+        """Drop any partial line (e.g. after a reconnect)"""
+        self.line_buffer = b""
+
+    def feed(self, raw_bytes: bytes):
+        """Split raw_bytes into lines and parse every complete CSV line"""
+        lines = (self.line_buffer + bytes(raw_bytes)).split(b"\n")
+        self.line_buffer = lines.pop()[-MAX_LINE_LENGTH:]
+
+        csv_lines = []
+        for line in lines:
+            commas = line.count(b",")
+            if commas == TELEMETRY_FIELDS - 1:
+                csv_lines.append(line)
+            elif commas:
+                self.lines_malformed += 1
+            else:
+                self.text_lines += 1
+
+        if not csv_lines:
+            return []
+        return self._parse_batch(csv_lines)
+
+    def _parse_batch(self, csv_lines):
+        """Parse CSV lines with one vectorized conversion of the numeric columns"""
+        numeric = []
+        states = []
+        for line in csv_lines:
+            values, _, estado = line.rpartition(b",")
+            numeric.append(values)
+            states.append(estado.strip().decode('ascii', errors='ignore'))
+
+        try:
+            values = np.array(b",".join(numeric).split(b","), dtype=np.float64)
+            values = values.reshape(len(csv_lines), TELEMETRY_FIELDS - 1)
+        except ValueError:
+            return self._parse_lines(numeric, states)
+
+        self.lines_parsed += len(csv_lines)
+        timestamps = values[:, 0].astype(np.int64).tolist()
+        return [EnergyRow(t, *row, estado)
+                for t, row, estado in zip(timestamps, values[:, 1:].tolist(), states)]
+
+    def _parse_lines(self, numeric, states):
+        """Fallback: parse line by line, counting the malformed ones"""
+        rows = []
+        for values, estado in zip(numeric, states):
+            try:
+                parts = values.split(b",")
+                rows.append(EnergyRow(int(parts[0]), *(float(p) for p in parts[1:]), estado))
+                self.lines_parsed += 1
+            except ValueError:
+                self.lines_malformed += 1
+        return rows
@@ -0,0 +1,89 @@
+import time
+import numpy as np
+from .config import SAMPLE_RATE
+
+# Residual above which the stream is considered interrupted and the clock re-anchored
+RESYNC_THRESHOLD_MS = 500.0
+# Minimum span of samples before the device rate estimate is trusted (seconds of data)
+RATE_MIN_SPAN_S = 2.0
+# Maximum deviation of the estimated sample period from nominal
+MAX_RATE_ERROR = 0.05
+
+
+class SampleClock:
+    """Per-sample timestamps derived from the sample counter and SAMPLE_RATE
+
+    The device clock is mapped to host time with a lightweight estimator:
+    - the sample period is the long-run host time elapsed per sample since the
+      anchor block (arrival jitter is divided by an ever larger span), and
+    - the offset follows the lower envelope of the arrival times: blocks that
+      arrive earlier than predicted pull the clock back immediately, late ones
+      (scheduling delays) are absorbed with a small gain.
+    """
+
+    def __init__(self, sample_rate: float = SAMPLE_RATE, offset_gain: float = 0.01):
+        self.sample_rate = sample_rate
+        self.nominal_period_ms = 1000.0 / sample_rate
+        self.offset_gain = offset_gain
+        self.reset()
+
+    def reset(self):
+        """Forget the current host/device mapping"""
+        self.period_ms = self.nominal_period_ms
+        self.ref_index = None  # Sample index of the last update
+        self.ref_time_ms = None  # Corrected host time of ref_index
+        self.anchor_index = None
+        self.anchor_time_ms = None
+        self.last_residual_ms = 0.0
+        self.resyncs = 0
+
+    @property
+    def drift_ppm(self) -> float:
+        """Estimated device clock error relative to the host, in ppm"""
+        return (self.period_ms / self.nominal_period_ms - 1.0) * 1e6
+
+    def update(self, last_index: int, host_time_ms: float):
+        """Feed the host arrival time of sample last_index"""
+        if self.ref_index is None:
+            self._anchor(last_index, host_time_ms)
+            return
+
+        predicted = self.ref_time_ms + (last_index - self.ref_index) * self.period_ms
+        residual = host_time_ms - predicted
+        self.last_residual_ms = residual
+
+        if abs(residual) > RESYNC_THRESHOLD_MS:
+            # Stream gap or reconnect: the old mapping is meaningless
+            self.resyncs += 1
+            self._anchor(last_index, host_time_ms)
+            return
+
+        correction = residual if residual < 0 else self.offset_gain * residual
+        self.ref_index = last_index
+        self.ref_time_ms = predicted + correction
+
+        span = last_index - self.anchor_index
+        if span >= RATE_MIN_SPAN_S * self.sample_rate:
+            measured = (host_time_ms - self.anchor_time_ms) / span
+            low = self.nominal_period_ms * (1.0 - MAX_RATE_ERROR)
+            high = self.nominal_period_ms * (1.0 + MAX_RATE_ERROR)
+            self.period_ms = min(max(measured, low), high)
+
+    def _anchor(self, index: int, host_time_ms: float):
+        self.ref_index = index
+        self.ref_time_ms = host_time_ms
+        self.anchor_index = index
+        self.anchor_time_ms = host_time_ms
+
+    def time_of(self, index) -> float:
+        """Host time (ms) of a sample index; works on scalars and arrays"""
+        if self.ref_index is None:
+            return time.time() * 1000
+        return self.ref_time_ms + (index - self.ref_index) * self.period_ms
+
+    def timestamps(self, first_index: int, count: int, host_time_ms: float = None) -> np.ndarray:
+        """Update with a block that just arrived and return its per-sample timestamps (ms)"""
+        if host_time_ms is None:
+            host_time_ms = time.time() * 1000
+        self.update(first_index + count - 1, host_time_ms)
+        return self.time_of(np.arange(first_index, first_index + count, dtype=np.float64))
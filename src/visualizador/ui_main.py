@@ -1,9 +1,11 @@
 import sys
+import math
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLabel, QGroupBox, QGridLayout, QMessageBox, QSlider, QCheckBox, QSpinBox
 from PyQt6.QtCore import QTimer, pyqtSlot, Qt
 from .plot_utils import setup_plot, update_plot, on_lead_di_button, on_lead_dii_button, on_lead_diii_button, on_lead_avr_button
 from .ui_service import UIService
 from .serial_readers import SerialReaderESP32, SerialReaderArduino
+from .config import LEADS
 
 class DeviceStatusWidget(QGroupBox):
     def __init__(self):
@@ -78,10 +80,31 @@ class CardioversorStatusWidget(QGroupBox):
         self.total_discharges = QLabel("0")
         layout.addWidget(self.total_discharges, 4, 2)
 
+        # Heart rate and variability
+        self.heart_rate = QLabel("-- bpm")
+        self.heart_rate.setStyleSheet("font-weight: bold;")
+        layout.addWidget(QLabel("Heart Rate:"), 0, 3)
+        layout.addWidget(self.heart_rate, 0, 4)
+        self.hrv_labels = {}
+        for row, (key, title) in enumerate((("mean_rr_ms", "RR (ms):"), ("sdnn_ms", "SDNN (ms):"),
+                                            ("rmssd_ms", "RMSSD (ms):"), ("pnn50", "pNN50 (%):")), start=1):
+            layout.addWidget(QLabel(title), row, 3)
+            self.hrv_labels[key] = QLabel("--")
+            layout.addWidget(self.hrv_labels[key], row, 4)
+
+        # Signal quality of every lead
+        layout.addWidget(QLabel("Signal Quality:"), 6, 0)
+        self.quality_labels = []
+        for column, lead in enumerate(LEADS, start=1):
+            label = QLabel(f"{lead}: --")
+            label.setStyleSheet("color: gray; font-weight: bold;")
+            layout.addWidget(label, 6, column)
+            self.quality_labels.append(label)
+
         self.setLayout(layout)
 
     def update_status(self, current_lead, charge_energy, phase1_energy, phase2_energy,
-                     total_energy, last_discharge_time, total_discharges):
+                     total_energy, last_discharge_time, total_discharges, hrv=None, quality=None):
         self.current_lead.setText(current_lead)
         self.charge_energy.setText(f"{charge_energy:.3f}")
         self.phase1_energy.setText(f"{phase1_energy:.3f}")
@@ -89,6 +112,22 @@ class CardioversorStatusWidget(QGroupBox):
         self.total_energy.setText(f"{total_energy:.3f}")
         self.last_discharge_time.setText(last_discharge_time)
         self.total_discharges.setText(str(total_discharges))
+        if hrv is not None:
+            self.heart_rate.setText("-- bpm" if math.isnan(hrv.heart_rate) else f"{hrv.heart_rate:.0f} bpm")
+            for key, label in self.hrv_labels.items():
+                value = getattr(hrv, key)
+                label.setText("--" if math.isnan(value) else f"{value:.1f}")
+        if quality is not None:
+            for lead, label, issues in zip(LEADS, self.quality_labels, quality):
+                if issues is None:
+                    label.setText(f"{lead}: --")
+                    label.setStyleSheet("color: gray; font-weight: bold;")
+                elif issues:
+                    label.setText(f"{lead}: {', '.join(issues)}")
+                    label.setStyleSheet("color: red; font-weight: bold;")
+                else:
+                    label.setText(f"{lead}: OK")
+                    label.setStyleSheet("color: green; font-weight: bold;")
 
 
 class CardioversorControlWidget(QGroupBox):
@@ -127,9 +166,10 @@ class CardioversorControlWidget(QGroupBox):
 
 
 class CardioversorFireControlWidget(QGroupBox):
-    def __init__(self, serial_reader_arduino):
+    def __init__(self, serial_reader_arduino, sync_trigger=None):
         super().__init__("Fire Control")
         self.serial_reader_arduino = serial_reader_arduino
+        self.sync_trigger = sync_trigger
         self.init_ui()
 
     def init_ui(self):
@@ -148,6 +188,16 @@ class CardioversorFireControlWidget(QGroupBox):
         self.test_fire_button.clicked.connect(self.on_test_fire_clicked)
         layout.addWidget(self.test_fire_button)
 
+        if self.sync_trigger is not None:
+            self.sync_fire_button = QPushButton("Sync Fire")
+            self.sync_fire_button.setStyleSheet("background-color: red; color: white; font-weight: bold;")
+            self.sync_fire_button.clicked.connect(self.on_sync_fire_clicked)
+            reason = self.sync_trigger.unavailable_reason
+            if reason:
+                self.sync_fire_button.setEnabled(False)
+                self.sync_fire_button.setToolTip(f"No disponible: {reason}")
+            layout.addWidget(self.sync_fire_button)
+
         self.setLayout(layout)
 
     def on_auto_clicked(self):
@@ -166,6 +216,17 @@ class CardioversorFireControlWidget(QGroupBox):
         if reply == QMessageBox.StandardButton.Yes:
             self.serial_reader_arduino.send_command("TEST_FIRE")
 
+    def on_sync_fire_clicked(self):
+        reply = QMessageBox.question(
+            self, 'Confirmar Sync Fire',
+            "¿Está seguro de que desea disparar sincronizado con el próximo pico R?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes and not self.sync_trigger.arm():
+            QMessageBox.warning(self, 'Sync Fire',
+                                f"El disparo sincronizado no está disponible: {self.sync_trigger.unavailable_reason}")
+
 
 class LeadControlWidget(QGroupBox):
     def __init__(self, ui_service, serial_reader_esp32):
@@ -250,11 +311,12 @@ class DataRecorderControlWidget(QGroupBox):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, ui_service, serial_reader_esp32, serial_reader_arduino):
+    def __init__(self, ui_service, serial_reader_esp32, serial_reader_arduino, sync_trigger=None):
         super().__init__()
         self.ui_service = ui_service
         self.serial_reader_esp32 = serial_reader_esp32
         self.serial_reader_arduino = serial_reader_arduino
+        self.sync_trigger = sync_trigger
 
         self.setWindowTitle("Monitor ECG - ADC Raw")
         self.setGeometry(100, 100, 1200, 800)
@@ -278,7 +340,7 @@ class MainWindow(QMainWindow):
         status_layout.addWidget(self.cardioversor_status)
         self.cardioversor_control = CardioversorControlWidget(self.serial_reader_arduino)
         status_layout.addWidget(self.cardioversor_control)
-        self.fire_control = CardioversorFireControlWidget(self.serial_reader_arduino)
+        self.fire_control = CardioversorFireControlWidget(self.serial_reader_arduino, self.sync_trigger)
         status_layout.addWidget(self.fire_control)
         self.lead_control = LeadControlWidget(self.ui_service, self.serial_reader_esp32)
         status_layout.addWidget(self.lead_control)
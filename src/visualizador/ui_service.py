@@ -1,8 +1,7 @@
 import threading
-import queue
 import time
 from typing import Optional, NamedTuple
-from collections import deque
+import numpy as np
 from PyQt6.QtWidgets import QApplication, QMainWindow
 from PyQt6.QtCore import QTimer, pyqtSlot, QObject
 
@@ -10,13 +9,23 @@ from PyQt6.QtCore import QTimer, pyqtSlot, QObject
 from .plot_utils import setup_plot, update_plot
 from .data_recorder import DataRecorder
 from .utils import get_current_lead
-
-class ProcessedData(NamedTuple):
-    """Data structure for processed signal data"""
-    timestamp: int
-    raw_voltage: float
-    sample_count: int
+from .ring_buffer import SampleRing
+from .events import LeadChangeEvent, RPeakEvent, EnergyEvent, QualityEvent
+from .lead_history import LeadHistory
+from .decimator import choose_decimation
+from .hrv import HeartRateStats
+from .config import SAMPLE_RATE, UI_RING_SECONDS, UI_DRAIN_BUDGET_MS, DISPLAY_BUFFER_SIZE, HOST_PEAK_DETECTION, LEADS
+
+DRAIN_CHUNK_SAMPLES = 4096
+
+class ProcessedBlock(NamedTuple):
+    """Data structure for a block of processed signal data"""
+    timestamp: int  # Timestamp of the first sample (ms)
+    raw_voltage: np.ndarray
+    first_sample: int  # Sample count of the first sample in the block
     metadata: dict = None
+    timestamps: np.ndarray = None  # Per-sample timestamps (ms)
+    filtered_voltage: np.ndarray = None  # Output of the processing chain, if any
 
 class UIService(QObject):
     """Service responsible for UI updates and plot management"""
@@ -26,24 +35,27 @@ class UIService(QObject):
         self.running = False
         self.thread = None
 
-        # Communication queues
-        self.processed_data_queue = queue.Queue(maxsize=10000)  # Processed signal data input
-        self.adc_data_queue = queue.Queue(maxsize=10000)  # ADC data input for metadata
+        # Communication: samples through a lock-free SPSC ring, status events through the event bus
+        self.sample_ring = SampleRing(int(SAMPLE_RATE * UI_RING_SECONDS), timestamps=True)
+        self.events = None  # EventBus subscription with typed status events
+        self.recorder_feed = None  # DataBus subscription with the raw sample blocks to record
 
         # UI components
         self.app = None
         self.window = None
         self.timer = None
 
-        # Data buffers (similar to DataManager but simplified)
-        self.voltage_buffer = deque(maxlen=10000)
-        self.time_buffer = deque(maxlen=10000)
+        # Display history (preallocated, one buffer per lead) and drain scratch arrays
+        self.lead_history = LeadHistory(capacity=DISPLAY_BUFFER_SIZE)
         self.sample_count = 0
+        self._drain_samples = np.empty(DRAIN_CHUNK_SAMPLES, dtype=np.float32)
+        self._drain_indices = np.empty(DRAIN_CHUNK_SAMPLES, dtype=np.int64)
+        self._drain_timestamps = np.empty(DRAIN_CHUNK_SAMPLES, dtype=np.float64)
+        self.last_drain_ms = 0.0
 
         # Status data
         self.esp32_connected = False
         self.arduino_connected = False
-        self.current_lead_index = 0
         self.energia_carga_actual = 0.0
         self.energia_fase1_actual = 0.0
         self.energia_fase2_actual = 0.0
@@ -51,6 +63,9 @@ class UIService(QObject):
         self.discharge_events = []
         self.last_discharge_time = 0
         self.last_r_peak_time = 0
+        self.hr_stats = HeartRateStats()  # Fed by host-detected R peaks (firmware ones without HOST_PEAK_DETECTION)
+        self.r_peak_source = "host" if HOST_PEAK_DETECTION else "esp32"
+        self.lead_quality = [None] * len(LEADS)  # Issues of the last QualityEvent of each lead (None: unknown)
 
         # Plot settings
         self.plot_y_min = -0.5
@@ -72,6 +87,14 @@ class UIService(QObject):
             # Start data recorder
             self.data_recorder.start_recording()
 
+            # Status events arrive on their own channel, apart from the samples
+            self.subscribe_events(adc_service.event_bus)
+
+            # Raw samples are recorded from the data bus, whatever the display shows
+            if self.data_recorder.record_samples:
+                from .adc_service import SampleBlock
+                self.recorder_feed = adc_service.data_bus.subscribe("recorder", kinds=(SampleBlock,))
+
             # Initialize PyQt application
             self.app = QApplication([])
 
@@ -79,7 +102,8 @@ class UIService(QObject):
             from .ui_main import MainWindow
 
             # Create main window
-            self.window = MainWindow(self, adc_service.esp32_reader, adc_service.arduino_reader)
+            self.window = MainWindow(self, adc_service.esp32_reader, adc_service.arduino_reader,
+                                     adc_service.sync_trigger)
             self.window.show()
 
             # Start update timer
@@ -102,95 +126,133 @@ class UIService(QObject):
         if self.app:
             self.app.exec()
 
-    def add_processed_data(self, processed_data):
-        """Add processed signal data to UI"""
-        try:
-            self.processed_data_queue.put_nowait(processed_data)
-        except queue.Full:
-            try:
-                self.processed_data_queue.get_nowait()
-                self.processed_data_queue.put_nowait(processed_data)
-            except queue.Empty:
-                pass
-
-    def add_adc_data(self, adc_data):
-        """Add ADC data for metadata updates"""
-        try:
-            self.adc_data_queue.put_nowait(adc_data)
-        except queue.Full:
-            try:
-                self.adc_data_queue.get_nowait()
-                self.adc_data_queue.put_nowait(adc_data)
-            except queue.Empty:
-                pass
+    def add_processed_block(self, processed_block):
+        """Add a block of processed signal data to UI (one copy into the sample ring per block)
+
+        Must be called from a single producer thread; the oldest samples are
+        dropped (and counted in sample_ring.overflows) if the UI falls behind.
+        """
+        timestamps = processed_block.timestamps if processed_block.timestamps is not None else processed_block.timestamp
+        voltages = processed_block.filtered_voltage
+        if voltages is None:
+            voltages = processed_block.raw_voltage
+        self.sample_ring.write(voltages, processed_block.first_sample, timestamps)
+
+    def subscribe_events(self, event_bus):
+        """Receive lead, R-peak and energy events from an EventBus"""
+        self.events = event_bus.subscribe()
 
     def update_connection_status(self, esp32_connected: bool, arduino_connected: bool):
         """Update device connection status"""
         self.esp32_connected = esp32_connected
         self.arduino_connected = arduino_connected
 
-    def _process_incoming_data(self, max_items_per_update=500):
-        """Process incoming data from queues (limited per update cycle for responsiveness)"""
-        items_processed = 0
-
-        # Process processed signal data (limit to prevent UI freezing)
-        try:
-            while items_processed < max_items_per_update:
-                processed_data = self.processed_data_queue.get_nowait()
-
-                # Apply gain to raw voltage
-                voltage_with_gain = processed_data.raw_voltage * self.signal_gain
-
-                # Store in buffers
-                self.voltage_buffer.append(voltage_with_gain)
-                self.time_buffer.append(processed_data.sample_count)
-                self.sample_count = processed_data.sample_count
-
-                self.processed_data_queue.task_done()
-                items_processed += 1
-
-        except queue.Empty:
-            pass
-
-        # Process ADC metadata (limit to prevent UI freezing)
-        try:
-            while items_processed < max_items_per_update:
-                adc_data = self.adc_data_queue.get_nowait()
-
-                if adc_data.source == 'esp32' and adc_data.metadata:
-                    if 'lead_change' in adc_data.metadata:
-                        self.current_lead_index = adc_data.metadata['lead_change']['index']
-                    if 'r_peak' in adc_data.metadata:
-                        self.last_r_peak_time = adc_data.timestamp
-
-                elif adc_data.source == 'arduino' and adc_data.metadata and 'energia' in adc_data.metadata:
-                    energia = adc_data.metadata['energia']
-                    estado = energia['estado']
-
-                    if estado == "CARGA":
-                        self.energia_carga_actual = energia['e_total']
-                    elif estado.startswith("DESCARGA"):
-                        self.energia_fase1_actual = energia['e_f1']
-                        self.energia_fase2_actual = energia['e_f2']
-                        self.energia_total_ciclo = energia['e_total']
-
-                        if estado == "DESCARGA_F1" and (adc_data.timestamp - self.last_discharge_time > 1000):
-                            tiempo_desde_r = adc_data.timestamp - self.last_r_peak_time if self.last_r_peak_time > 0 else 0
-                            self.discharge_events.append((self.sample_count, adc_data.timestamp, tiempo_desde_r))
-                            self.last_discharge_time = adc_data.timestamp
-
-                    # Record to CSV
-                    self.data_recorder.write_row(
-                        energia['timestamp'] if 'timestamp' in energia else adc_data.timestamp,
-                        energia['vcap'], energia['corriente'],
-                        energia['e_f1'], energia['e_f2'], energia['e_total'], estado
-                    )
-
-                self.adc_data_queue.task_done()
-                items_processed += 1
-
-        except queue.Empty:
-            pass
+    @property
+    def display(self):
+        """DisplayBuffer of the lead on screen"""
+        return self.lead_history.current
+
+    @property
+    def current_lead_index(self):
+        return self.lead_history.shown
+
+    @current_lead_index.setter
+    def current_lead_index(self, lead_index):
+        # Shows that lead's own history right away (the lead buttons set this before LEAD_CHANGE arrives)
+        self.lead_history.show(lead_index)
+
+    def update_decimation(self, pixel_width: int):
+        """Pick the display decimation for the plot width and window size"""
+        self.lead_history.set_decimation(choose_decimation(self.plot_window_size, pixel_width))
+
+    @property
+    def voltage_buffer(self):
+        """Displayed voltages (gain applied), oldest first"""
+        return self.display.latest()[0]
+
+    @property
+    def time_buffer(self):
+        """Sample indices of voltage_buffer"""
+        return self.display.latest()[1]
+
+    @property
+    def backlog(self) -> dict:
+        """Items waiting to be shown: a growing value means the UI is falling behind"""
+        return {
+            'samples': self.sample_ring.pending,
+            'events': len(self.events) if self.events is not None else 0,
+            'dropped_samples': self.sample_ring.overflows,
+        }
+
+    def _process_incoming_data(self, budget_ms=UI_DRAIN_BUDGET_MS):
+        """Process incoming data within a wall-clock budget per update cycle"""
+        started = time.perf_counter()
+        deadline = started + budget_ms / 1000.0
+
+        # Status events, all of them: they are few and never wait behind samples. First, so the
+        # lead boundaries of the samples below are already known
+        self._process_events()
+
+        # Pull pending samples as arrays, chunk by chunk, until empty or out of time
+        while True:
+            n = self.sample_ring.read_into(self._drain_samples, self._drain_indices, self._drain_timestamps)
+            if n == 0:
+                break
+            samples = self._drain_samples[:n]
+            indices = self._drain_indices[:n]
+            self.lead_history.extend(samples, indices, self.signal_gain)
+            self.sample_count = int(indices[-1])
+            if n < DRAIN_CHUNK_SAMPLES or time.perf_counter() >= deadline:
+                break
+
+        # Record raw samples to CSV
+        if self.recorder_feed is not None:
+            for block in self.recorder_feed.poll():
+                timestamps = block.timestamps if block.timestamps is not None else block.timestamp
+                self.data_recorder.write_samples(block.first_index, timestamps, block.voltages)
+
+        self.last_drain_ms = (time.perf_counter() - started) * 1000.0
+
+    def _process_events(self):
+        """Apply every pending typed event from the event bus"""
+        if self.events is None:
+            return
+        for timestamp, event in self.events.drain():
+            if isinstance(event, LeadChangeEvent):
+                self.lead_history.lead_changed(event.sample_index, event.lead_index)
+                self.data_recorder.lead_changed(event.sample_index, event.lead_index)
+                self.current_lead_index = event.lead_index
+            elif isinstance(event, RPeakEvent):
+                self.last_r_peak_time = timestamp
+                if event.source == self.r_peak_source:
+                    self.hr_stats.add_peak(event.sample_index)
+            elif isinstance(event, QualityEvent):
+                if 0 <= event.lead_index < len(self.lead_quality):
+                    self.lead_quality[event.lead_index] = event.issues
+            elif isinstance(event, EnergyEvent):
+                self._apply_energy(timestamp, event)
+
+    def _apply_energy(self, timestamp, energia):
+        """Update the energy status from one EnergyEvent and record it"""
+        estado = energia.estado
+
+        if estado == "CARGA":
+            self.energia_carga_actual = energia.e_total
+        elif estado.startswith("DESCARGA"):
+            self.energia_fase1_actual = energia.e_f1
+            self.energia_fase2_actual = energia.e_f2
+            self.energia_total_ciclo = energia.e_total
+
+            if estado == "DESCARGA_F1" and (timestamp - self.last_discharge_time > 1000):
+                tiempo_desde_r = timestamp - self.last_r_peak_time if self.last_r_peak_time > 0 else 0
+                self.discharge_events.append((self.sample_count, timestamp, tiempo_desde_r))
+                self.last_discharge_time = timestamp
+
+        # Record to CSV
+        self.data_recorder.write_row(
+            energia.timestamp, energia.vcap, energia.corriente,
+            energia.e_f1, energia.e_f2, energia.e_total, estado
+        )
 
     @pyqtSlot()
     def _update_ui(self):
@@ -207,8 +269,7 @@ class UIService(QObject):
 
         # Update status widgets
         current_lead = get_current_lead(self.current_lead_index)
-        discharge_list = list(self.discharge_events)
-        last_discharge_time = f"{discharge_list[-1][2]:.0f} ms" if discharge_list else "N/A"
+        last_discharge_time = f"{self.discharge_events[-1][2]:.0f} ms" if self.discharge_events else "N/A"
 
         # Update device status
         if hasattr(self.window, 'device_status'):
@@ -226,7 +287,9 @@ class UIService(QObject):
                 phase2_energy=self.energia_fase2_actual,
                 total_energy=self.energia_total_ciclo,
                 last_discharge_time=last_discharge_time,
-                total_discharges=len(self.discharge_events)
+                total_discharges=len(self.discharge_events),
+                hrv=self.hr_stats.summary(),
+                quality=self.lead_quality
             )
 
         # Update data recorder status
@@ -0,0 +1,133 @@
+import multiprocessing
+import time
+
+import numpy as np
+
+from visualizador.acquisition_process import AcquisitionProcess, _RingSink
+from visualizador.events import LeadChangeEvent, RPeakEvent
+from visualizador.shared_ring import SharedSampleRing
+from visualizador.simulator import ArduinoSimulator, ESP32Simulator
+
+
+def _produce(name, blocks, size):
+    ring = SharedSampleRing(name=name)
+    for k in range(blocks):
+        ring.write(np.arange(k * size, (k + 1) * size, dtype=np.float32), k * size)
+    ring.close()
+
+
+def test_shared_ring_across_processes():
+    ring = SharedSampleRing(4096)
+    try:
+        child = multiprocessing.Process(target=_produce, args=(ring.name, 50, 64))
+        child.start()
+        child.join(timeout=10)
+        block = ring.read()
+        np.testing.assert_array_equal(block.indices, np.arange(3200))
+        np.testing.assert_array_equal(block.samples, block.indices)
+        assert ring.overflows == 0
+    finally:
+        ring.close()
+
+
+class Sink:
+    """Stands in for ADCService"""
+
+    def __init__(self):
+        self.blocks = []
+        self.events = []
+        self.energy = []
+        self.delivered = 0  # Samples handed over so far
+        self.early = []  # Events whose sample had already been handed over
+
+    def on_esp32_samples(self, voltages, first_index=None, t0=None, channel=0):
+        self.blocks.append((first_index, np.array(voltages)))
+        self.delivered = first_index + len(voltages)
+
+    def on_esp32_event(self, event, channel=0):
+        self.events.append(event)
+        if event.sample_index < self.delivered:
+            self.early.append(event)
+
+    def on_arduino_data(self, timestamp, voltage, metadata=None):
+        self.energy.append(timestamp)
+
+
+def test_acquisition_process_with_simulated_devices():
+    esp32 = ESP32Simulator(sample_rate=2000, heart_rate_bpm=120, seed=2)
+    arduino = ArduinoSimulator(line_rate=50)
+    acquisition = AcquisitionProcess([esp32.port], arduino.port)
+    sink = Sink()
+    for device in (esp32, arduino):
+        device.start()
+    acquisition.start()
+    try:
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline and len(sink.events) < 4:
+            acquisition.drain(sink)
+            time.sleep(0.01)
+        acquisition.drain(sink)
+    finally:
+        acquisition.stop()
+        for device in (esp32, arduino):
+            device.stop()
+
+    assert acquisition.esp32_readers[0].connected and acquisition.arduino_reader.connected
+    firsts = [first for first, _ in sink.blocks]
+    ends = [first + len(values) for first, values in sink.blocks]
+    assert firsts[1:] == ends[:-1]  # Contiguous sample indices across blocks
+    assert sum(len(values) for _, values in sink.blocks) >= 2000
+    assert len(sink.events) >= 4 and all(isinstance(event, RPeakEvent) for event in sink.events)
+    assert sink.energy
+    assert acquisition.overflows == 0
+
+
+def test_drain_holds_back_samples_until_their_events_arrive():
+    acquisition = AcquisitionProcess(["esp32"], "arduino", sample_rate=1000, ring_seconds=1.0)
+    sink = Sink()
+    try:
+        ring = acquisition.rings[0]
+        remote = _RingSink(acquisition.rings, acquisition.event_queue)
+        remote.on_esp32_samples(np.zeros(100, dtype=np.float32), 0)
+        while len(sink.blocks) == 0:
+            acquisition.drain(sink)
+
+        # The next read: its lead change is queued, but not delivered yet, when its samples hit the ring
+        ring.write(np.ones(100, dtype=np.float32), 100)
+        acquisition.drain(sink)
+        assert sink.delivered == 100 and sink.events == []
+
+        acquisition.event_queue.put(('event', 0, LeadChangeEvent(150, 1, "DII")))
+        acquisition.event_queue.put(('written', 0, ring.written))
+        deadline = time.monotonic() + 5.0
+        while sink.delivered < 200 and time.monotonic() < deadline:
+            acquisition.drain(sink)
+        assert sink.events == [LeadChangeEvent(150, 1, "DII")]
+        assert sink.delivered == 200
+        assert sink.early == []
+    finally:
+        acquisition.stop()
+
+
+def test_events_reach_the_consumer_before_their_samples():
+    esp32 = ESP32Simulator(sample_rate=2000, heart_rate_bpm=150, lead_change_interval_s=0.2, seed=4,
+                           protocol="legacy", chunk_ms=1.0)
+    arduino = ArduinoSimulator(line_rate=10)
+    acquisition = AcquisitionProcess([esp32.port], arduino.port)
+    sink = Sink()
+    for device in (esp32, arduino):
+        device.start()
+    acquisition.start()
+    try:
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline and len(sink.events) < 20:
+            acquisition.drain(sink)
+        acquisition.drain(sink)
+    finally:
+        acquisition.stop()
+        for device in (esp32, arduino):
+            device.stop()
+
+    assert any(isinstance(event, LeadChangeEvent) for event in sink.events)
+    assert len(sink.events) >= 20
+    assert sink.early == []
@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+import pytest
+
+from visualizador.adc_service import ADCService, SampleBlock
+
+
+class BlockSink:
+    """Stands in for SignalProcessingService"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def process_block(self, block):
+        self.blocks.append(block)
+
+
+@pytest.fixture
+def service():
+    adc_service = ADCService(esp32_ports=["/dev/null-esp32"], arduino_port="/dev/null-arduino")
+    sink = BlockSink()
+    adc_service.set_services(sink, None)
+    return adc_service, sink
+
+
+def test_blocks_are_handed_off_whole(service):
+    adc_service, sink = service
+    feed = adc_service.data_bus.subscribe(kinds=(SampleBlock,))
+    adc_service.on_esp32_samples(np.arange(10.0), first_index=0, t0=1000)
+    adc_service.on_esp32_samples(np.arange(5.0), t0=1005)
+
+    assert [len(block.voltages) for block in sink.blocks] == [10, 5]
+    assert sink.blocks[1].first_index == 10  # Continues from sample_count
+    assert adc_service.sample_count == 15
+    np.testing.assert_allclose(sink.blocks[0].timestamps, 1000 + np.arange(10) * adc_service.sample_clock.period_ms)
+    assert feed.poll() == sink.blocks  # Same objects, not copies
+
+
+def test_sample_clock_stamps_every_sample(service):
+    adc_service, sink = service
+    before = time.time() * 1000
+    adc_service.on_esp32_samples(np.zeros(4), first_index=100)
+    timestamps = sink.blocks[0].timestamps
+    np.testing.assert_allclose(np.diff(timestamps), adc_service.sample_clock.period_ms)
+    assert before <= timestamps[-1] <= time.time() * 1000  # The last sample just arrived
+    assert sink.blocks[0].timestamp == int(timestamps[0])
+
+
+def test_empty_block_is_ignored(service):
+    adc_service, sink = service
+    adc_service.on_esp32_samples(np.empty(0), first_index=0)
+    assert sink.blocks == []
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import numpy as np
+
+from visualizador.async_engine import AsyncSerialEngine
+from visualizador.simulator import ArduinoSimulator, ESP32Simulator
+
+
+class Sink:
+    """Stands in for ADCService; records the order of hand-offs per channel"""
+
+    def __init__(self):
+        self.delivered = {}  # channel -> samples handed off so far
+        self.blocks = {}
+        self.early_events = 0  # Events whose sample was already handed off
+        self.events = 0
+        self.energy = 0
+
+    def on_esp32_samples(self, voltages, first_index=None, t0=None, channel=0):
+        self.blocks.setdefault(channel, []).append((first_index, len(voltages)))
+        self.delivered[channel] = first_index + len(voltages)
+
+    def on_esp32_event(self, event, channel=0):
+        self.events += 1
+        if event.sample_index < self.delivered.get(channel, 0):
+            self.early_events += 1
+
+    def on_arduino_data(self, timestamp, voltage, metadata=None):
+        self.energy += 1
+
+
+def test_one_thread_serves_several_ports():
+    devices = [ESP32Simulator(sample_rate=2000, heart_rate_bpm=150, seed=k) for k in range(2)]
+    arduino = ArduinoSimulator(line_rate=50, chunk_ms=1.0)
+    sink = Sink()
+    engine = AsyncSerialEngine(sink)
+    readers = [engine.add_esp32_port(device.port) for device in devices]
+    arduino_reader = engine.add_arduino_port(arduino.port)
+    chunks = []
+
+    async def consume():
+        async for chunk in engine.blocks():
+            chunks.append(chunk)
+
+    for device in devices + [arduino]:
+        device.start()
+    engine.start()
+    try:
+        engine.run_coroutine(consume())
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline and min(sink.delivered.get(c, 0) for c in (0, 1)) < 2000:
+            time.sleep(0.05)
+        assert all(reader.connected for reader in readers + [arduino_reader])
+        assert arduino_reader.write_now(b"SYNC_FIRE\n")
+        time.sleep(0.1)
+    finally:
+        engine.stop()
+        for device in devices + [arduino]:
+            device.stop()
+
+    assert [reader.channel for reader in readers] == [0, 1]
+    for channel in (0, 1):
+        firsts, counts = np.array(sink.blocks[channel]).T
+        np.testing.assert_array_equal(firsts[1:], (firsts + counts)[:-1])
+        assert firsts[-1] + counts[-1] >= 2000
+    assert sink.events >= 2 and sink.early_events == 0
+    assert sink.energy > 0
+    assert chunks and {chunk.channel for chunk in chunks} == {0, 1}
+    assert "SYNC_FIRE" in [command for _, command in arduino.commands]
@@ -0,0 +1,97 @@
+import csv
+
+import numpy as np
+import pytest
+
+from visualizador.batch_analysis import (analyze, analyze_segment, count_discharges, parse_samples,
+                                         plan_segments, summarize)
+from visualizador.data_recorder import write_csv_row, write_ecg_block
+from visualizador.simulator import SyntheticECG
+
+RATE = 500
+SECONDS = 120
+BPM = 75.0
+
+
+def write_recording(path, seconds=SECONDS, lead_every_s=None, skip=None):
+    """An ecg_samples_*.csv as DataRecorder writes it; returns the true R sample indices"""
+    ecg = SyntheticECG(RATE, BPM, seed=8)
+    truth = []
+    with open(path, 'w', newline='') as f:
+        f.write("Muestra,Timestamp_ms,Voltaje_V,Derivacion\n")
+        for first in range(0, seconds * RATE, RATE):
+            voltages, r_indices = ecg.generate(RATE)
+            truth.extend(r_indices)
+            indices = np.arange(first, first + RATE)
+            leads = (indices // (lead_every_s * RATE)) % 2 if lead_every_s else 0
+            keep = slice(None) if skip is None or not skip[0] <= first < skip[1] else slice(0, 0)
+            write_ecg_block(f, first, (indices * 1000.0 / RATE)[keep], voltages[keep],
+                            leads[keep] if lead_every_s else 0)
+    return np.array(truth)
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    path = tmp_path_factory.mktemp("recordings") / "ecg_samples_20260101_000000.csv"
+    return str(path), write_recording(path)
+
+
+def test_parse_samples_vectorized_and_with_a_truncated_line():
+    data = b"0,0.000,1.20000,0\n1,0.500,1.30000,1\n2,1.000,1.4"
+    indices, voltages, leads = parse_samples(data)
+    np.testing.assert_array_equal(indices, [0, 1])
+    np.testing.assert_allclose(voltages, [1.2, 1.3])
+    np.testing.assert_array_equal(leads, [0, 1])
+
+    indices, voltages, leads = parse_samples(b"5,2.5,0.9\n6,3.0,1.0\n", columns=3)  # Before the lead column
+    np.testing.assert_array_equal(indices, [5, 6])
+    np.testing.assert_array_equal(leads, [0, 0])
+
+
+def test_probed_plan_covers_the_file(recording):
+    path, _ = recording
+    segments = plan_segments(path, segment_seconds=30)
+    assert segments[0].sample_rate == RATE
+    assert len(segments) in (4, 5)
+    assert all(a.end == b.start for a, b in zip(segments, segments[1:]))
+
+
+def test_segmented_analysis_matches_a_single_pass(recording):
+    path, truth = recording
+    whole = summarize(path, [analyze_segment(s) for s in plan_segments(path, segment_seconds=1e6)], RATE)
+    parts = summarize(path, [analyze_segment(s) for s in plan_segments(path, segment_seconds=25)], RATE)
+
+    assert parts.samples == whole.samples == SECONDS * RATE
+    assert parts.beats == whole.beats
+    assert abs(whole.beats - len(truth)) <= 3  # Beats during the detector's learning are missed
+    assert parts.heart_rate == pytest.approx(BPM, rel=0.03)
+    assert parts.sdnn_ms == pytest.approx(whole.sdnn_ms, rel=1e-6)
+    assert parts.missing_samples == 0 and parts.gaps == 0
+
+
+def test_pool_analysis_with_energy_file(recording, tmp_path):
+    path, _ = recording
+    energy = tmp_path / "ecg_data_20260101_000000.csv"
+    samples = tmp_path / "ecg_samples_20260101_000000.csv"
+    samples.write_bytes(open(path, 'rb').read())
+    with open(energy, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp_ms", "Vcap", "I", "E1", "E2", "E", "Estado"])
+        for k, estado in enumerate(["CARGA", "DESCARGA_F1", "DESCARGA_F2", "REPOSO", "DESCARGA_F1", "REPOSO"]):
+            write_csv_row(writer, f, k * 10, 1.0, 0.0, 0.5, 0.25, 1.0 + k, estado)
+
+    assert count_discharges(str(energy)) == (2, 3.0 + 5.0)
+    summaries, throughput = analyze([str(tmp_path)], workers=2, segment_seconds=40)
+    assert len(summaries) == 1 and throughput['segments'] >= 3
+    assert summaries[0].discharges == 2
+    assert summaries[0].samples == SECONDS * RATE
+
+
+def test_gaps_and_lead_changes_are_accounted(tmp_path):
+    path = tmp_path / "ecg_samples_gap.csv"
+    write_recording(path, seconds=60, lead_every_s=20, skip=(30 * RATE, 32 * RATE))
+    summary = summarize(str(path), [analyze_segment(s) for s in plan_segments(str(path), sample_rate=RATE)], RATE)
+    assert summary.missing_samples == 2 * RATE
+    assert summary.gaps == 1
+    # 75 beats, minus those in the 2 s gap and while each lead learns its own thresholds
+    assert 65 <= summary.beats <= 75
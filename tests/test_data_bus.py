@@ -0,0 +1,70 @@
+import threading
+
+from visualizador.data_bus import DataBus
+
+
+def test_every_subscriber_gets_every_item():
+    bus = DataBus(capacity=16)
+    first, second = bus.subscribe("a"), bus.subscribe("b")
+    for item in range(10):
+        bus.publish(item)
+    assert first.lag == second.lag == 10
+    assert first.poll() == list(range(10))
+    assert second.poll() == list(range(10))
+    assert first.lag == second.lag == 0
+
+
+def test_slow_subscriber_drops_only_its_own_oldest_items():
+    bus = DataBus(capacity=4)
+    fast, slow = bus.subscribe("fast"), bus.subscribe("slow")
+    received = []
+    for item in range(10):
+        bus.publish(item)
+        received += fast.poll()
+
+    assert received == list(range(10))
+    assert fast.dropped == 0
+    assert slow.lag == 10
+    assert slow.poll() == [6, 7, 8, 9]
+    assert slow.dropped == 6
+    assert slow.lag == 0
+    assert slow.stats() == {'name': "slow", 'lag': 0, 'dropped': 6, 'received': 4}
+
+
+def test_kinds_filter_still_advances_the_cursor():
+    bus = DataBus(capacity=16)
+    ints = bus.subscribe(kinds=[int])
+    for item in (1, "x", 2, "y"):
+        bus.publish(item)
+    assert ints.poll() == [1, 2]
+    assert ints.lag == 0
+
+
+def test_late_subscriber_starts_at_the_next_item():
+    bus = DataBus(capacity=16)
+    bus.publish("old")
+    late = bus.subscribe()
+    assert late.lag == 0
+    assert late.get(timeout=0.01) is None
+    bus.publish("new")
+    assert late.get(timeout=0.01) == "new"
+
+
+def test_blocked_get_wakes_up_on_publish_from_another_thread():
+    bus = DataBus(capacity=16)
+    subscription = bus.subscribe()
+    received = []
+    consumer = threading.Thread(target=lambda: received.append(subscription.get(timeout=2.0)))
+    consumer.start()
+    bus.publish("block")
+    consumer.join()
+    assert received == ["block"]
+
+
+def test_unsubscribed_consumer_is_not_woken():
+    bus = DataBus(capacity=16)
+    subscription = bus.subscribe()
+    subscription.close()
+    bus.publish("block")
+    assert not subscription.ready.is_set()
+    assert bus.stats() == []
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from visualizador.decimator import PolyphaseDecimator, choose_decimation
+
+
+def decimate_in_blocks(decimator, x, first_index=0, seed=0):
+    rng = np.random.default_rng(seed)
+    values, indices = [], []
+    pos = 0
+    while pos < len(x):
+        size = int(rng.integers(1, 50))
+        out, out_indices = decimator.process(x[pos:pos + size], first_index + pos)
+        values.append(out)
+        indices.append(out_indices)
+        pos += size
+    return np.concatenate(values), np.concatenate(indices)
+
+
+@pytest.fixture
+def samples():
+    return np.random.default_rng(3).normal(0, 1, 4000)
+
+
+@pytest.mark.parametrize("factor", [2, 5, 8])
+def test_blockwise_matches_one_shot(factor, samples):
+    one_shot, one_shot_indices = PolyphaseDecimator(factor).process(samples, 7)
+    blockwise, blockwise_indices = decimate_in_blocks(PolyphaseDecimator(factor), samples, 7)
+    np.testing.assert_array_equal(blockwise_indices, one_shot_indices)
+    np.testing.assert_allclose(blockwise, one_shot, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("factor", [3, 8])
+def test_matches_fir_filter_then_downsample(factor, samples):
+    decimator = PolyphaseDecimator(factor)
+    values, indices = decimator.process(samples, 0)
+
+    # Same FIR over the stream primed with the first sample, kept every factor samples
+    taps = decimator.taps[::-1]
+    primed = np.concatenate((np.full(len(taps) - 1, samples[0]), samples))
+    filtered = signal.lfilter(taps, 1.0, primed)[len(taps) - 1:]
+    np.testing.assert_allclose(values, filtered[::factor], atol=1e-12)
+    np.testing.assert_array_equal(indices, np.arange(0, len(samples), factor) - decimator.delay)
+
+
+def test_gap_restarts_like_a_new_decimator(samples):
+    decimator = PolyphaseDecimator(4)
+    decimator.process(samples[:1000], 0)
+    after_gap = decimator.process(samples[1000:], 5000)
+    fresh = PolyphaseDecimator(4).process(samples[1000:], 5000)
+    np.testing.assert_allclose(after_gap[0], fresh[0])
+    np.testing.assert_array_equal(after_gap[1], fresh[1])
+
+
+def test_choose_decimation():
+    assert choose_decimation(1000, 2000) == 1
+    assert choose_decimation(40000, 1000, points_per_pixel=2) == 20
+
+
+def test_tones_above_the_new_nyquist_are_suppressed():
+    rate, factor = 2000, 8
+    t = np.arange(8000) / rate
+    passband = np.sin(2 * np.pi * 10 * t)
+    alias = np.sin(2 * np.pi * 700 * t)  # Would fold onto 50 Hz at 250 samples/s
+    kept, _ = PolyphaseDecimator(factor).process(passband + alias, 0)
+    reference, _ = PolyphaseDecimator(factor).process(passband, 0)
+    settled = slice(50, None)
+    assert np.sqrt(np.mean((kept[settled] - reference[settled]) ** 2)) < 0.01
@@ -0,0 +1,62 @@
+import threading
+
+from visualizador.event_bus import EventBus
+from visualizador.events import LeadChangeEvent, RPeakEvent
+
+
+def test_every_subscriber_gets_every_event_in_order():
+    bus = EventBus()
+    first, second = bus.subscribe(), bus.subscribe()
+    events = [RPeakEvent(k * 100) for k in range(5)]
+    for k, event in enumerate(events):
+        bus.publish(event, 1000.0 + k)
+
+    expected = [(1000.0 + k, event) for k, event in enumerate(events)]
+    assert first.drain() == expected
+    assert second.drain() == expected
+    assert first.drain() == []
+    assert bus.published == 5
+
+
+def test_slow_subscriber_drops_its_oldest_events_only():
+    bus = EventBus()
+    slow, fast = bus.subscribe(maxlen=3), bus.subscribe()
+    for k in range(5):
+        bus.publish(RPeakEvent(k), float(k))
+        fast.drain()
+
+    assert [event.sample_index for _, event in slow.drain()] == [2, 3, 4]
+    assert slow.dropped == 2
+    assert fast.dropped == 0
+
+
+def test_unsubscribed_consumer_stops_receiving():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    bus.publish(LeadChangeEvent(0, 1, "DII"), 0.0)
+    bus.unsubscribe(subscription)
+    bus.publish(LeadChangeEvent(10, 2, "DIII"), 1.0)
+    assert len(subscription) == 1
+
+
+def test_concurrent_producers_lose_nothing():
+    bus = EventBus()
+    subscription = bus.subscribe(maxlen=10000)
+    received = []
+
+    def produce(offset):
+        for k in range(1000):
+            bus.publish(RPeakEvent(offset + k), 0.0)
+
+    producers = [threading.Thread(target=produce, args=(offset,)) for offset in (0, 10000, 20000)]
+    for thread in producers:
+        thread.start()
+    while any(thread.is_alive() for thread in producers):
+        received += subscription.drain()
+    received += subscription.drain()
+
+    indices = [event.sample_index for _, event in received]
+    assert sorted(indices) == list(range(1000)) + list(range(10000, 11000)) + list(range(20000, 21000))
+    for offset in (0, 10000, 20000):
+        own = [index for index in indices if offset <= index < offset + 1000]
+        assert own == sorted(own)  # Each producer's events keep their order
@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+
+from visualizador.adc_service import SampleBlock
+from visualizador.filters import BaselineEMA, bandpass_filter, notch_filter
+from visualizador.signal_processing_service import SignalProcessingService
+
+SAMPLE_RATE = 500
+
+
+def random_blocks(x, seed=0):
+    rng = np.random.default_rng(seed)
+    pos = 0
+    while pos < len(x):
+        size = int(rng.integers(1, 100))
+        yield x[pos:pos + size]
+        pos += size
+
+
+@pytest.fixture
+def signal():
+    t = np.arange(5000) / SAMPLE_RATE
+    noise = np.random.default_rng(2).normal(0, 0.05, len(t))
+    return 1.5 + 0.3 * np.sin(2 * np.pi * 1.2 * t) + 0.1 * np.sin(2 * np.pi * 50 * t) + noise
+
+
+@pytest.mark.parametrize("make", [
+    lambda: bandpass_filter(SAMPLE_RATE, 0.5, 40.0, 2),
+    lambda: notch_filter(SAMPLE_RATE, 50.0, 30.0),
+])
+def test_blockwise_matches_one_shot(make, signal):
+    one_shot = make().process(signal)
+    blockwise_filter = make()
+    blockwise = np.concatenate([blockwise_filter.process(block) for block in random_blocks(signal)])
+    np.testing.assert_allclose(blockwise, one_shot, rtol=0, atol=1e-12)
+
+
+def test_reset_restarts_from_steady_state(signal):
+    sos_filter = bandpass_filter(SAMPLE_RATE, 0.5, 40.0, 2)
+    first = sos_filter.process(signal)
+    sos_filter.reset()
+    np.testing.assert_allclose(sos_filter.process(signal), first)
+
+
+def test_baseline_block_matches_the_per_sample_recursion(signal):
+    per_sample = BaselineEMA(0.99)
+    expected = [per_sample.process_sample(v)[0] for v in signal]
+    blockwise_filter = BaselineEMA(0.99)
+    blockwise = np.concatenate([blockwise_filter.process(block) for block in random_blocks(signal)])
+    np.testing.assert_allclose(blockwise, expected, rtol=0, atol=1e-12)
+
+
+def tone_rms(x, freq):
+    t = np.arange(len(x)) / SAMPLE_RATE
+    return abs(np.mean(x * np.exp(-2j * np.pi * freq * t))) * 2
+
+
+def test_chain_removes_mains_and_baseline(signal):
+    service = SignalProcessingService(SAMPLE_RATE)
+    filtered = np.concatenate([service.filter_block(block)[0] for block in random_blocks(signal)])
+    settled = slice(2 * SAMPLE_RATE, None)
+    assert tone_rms(filtered[settled], 50.0) < 0.01 * tone_rms(signal[settled], 50.0)
+    assert abs(filtered[settled].mean()) < 0.01
+    assert service.samples_processed == len(signal)
+    assert set(service.stage_stats()) >= set(service.chain)
+
+
+class UISink:
+    def __init__(self):
+        self.blocks = []
+
+    def add_processed_block(self, block):
+        self.blocks.append(block)
+
+
+def test_worker_forwards_raw_and_filtered_blocks(signal):
+    service = SignalProcessingService(SAMPLE_RATE)
+    reference = SignalProcessingService(SAMPLE_RATE)
+    sink = UISink()
+    service.set_services(sink)
+    service.start()
+    try:
+        first = 0
+        for block in random_blocks(signal):
+            service.process_block(SampleBlock(0, block, first, "ESP32", {'port': 0}))
+            first += len(block)
+        deadline = time.monotonic() + 5.0
+        while sum(len(b.raw_voltage) for b in sink.blocks) < len(signal) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        service.stop()
+
+    assert service.dropped_blocks == 0
+    np.testing.assert_array_equal(np.concatenate([b.raw_voltage for b in sink.blocks]), signal)
+    np.testing.assert_allclose(np.concatenate([b.filtered_voltage for b in sink.blocks]),
+                               reference.filter_block(signal)[0], rtol=0, atol=1e-12)
+    assert sink.blocks[0].metadata['port'] == 0
+    assert set(sink.blocks[0].metadata['stage_ms']) == set(service.chain)
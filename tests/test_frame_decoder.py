@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from visualizador.block_frame import encode_block_frame
+from visualizador.frame_decoder import FrameDecoder, ADC_VREF, ADC_MAX_CODE
+
+FRAME_SAMPLES = 32
+
+
+def legacy_frame(code: int) -> bytes:
+    lsb, msb = code & 0xFF, code >> 8
+    return bytes([0xAA, lsb, msb, 0xAA ^ lsb ^ msb])
+
+
+def to_volts(codes):
+    return np.asarray(codes) * (ADC_VREF / ADC_MAX_CODE)
+
+
+def decode_in_chunks(decoder, stream: bytes, seed=0):
+    """Feed stream in random-sized reads, as the serial port delivers it"""
+    rng = np.random.default_rng(seed)
+    out = []
+    pos = 0
+    while pos < len(stream):
+        size = int(rng.integers(1, 40))
+        out.append(decoder.decode(stream[pos:pos + size]))
+        pos += size
+    return np.concatenate(out)
+
+
+def test_legacy_frames_split_across_reads():
+    codes = np.random.default_rng(1).integers(0, 4096, 640)
+    decoder = FrameDecoder("legacy")
+    voltages = decode_in_chunks(decoder, b"".join(legacy_frame(int(c)) for c in codes))
+    np.testing.assert_allclose(voltages, to_volts(codes))
+    assert decoder.valid_packets == len(codes)
+    assert decoder.invalid_packets == 0
+
+
+def test_legacy_bad_checksum_is_dropped_and_counted():
+    frames = [legacy_frame(c) for c in (100, 200, 300, 400)]
+    frames[2] = frames[2][:3] + bytes([frames[2][3] ^ 0x01])
+    decoder = FrameDecoder("legacy")
+    voltages = decode_in_chunks(decoder, b"".join(frames))
+    np.testing.assert_allclose(voltages, to_volts([100, 200, 400]))
+    assert decoder.invalid_packets == 1
+
+
+def test_legacy_resyncs_after_garbage():
+    stream = b"\x00\x13\xaa\x01" + legacy_frame(1234) + b"\xaa" + legacy_frame(42)
+    decoder = FrameDecoder("legacy")
+    voltages = decode_in_chunks(decoder, stream)
+    np.testing.assert_allclose(voltages, to_volts([1234, 42]))
+    assert decoder.invalid_packets == 2
+
+
+def test_decode_buffer_reports_frame_positions():
+    stream = np.frombuffer(legacy_frame(1) + b"\x07" + legacy_frame(2) + legacy_frame(3)[:2], dtype=np.uint8)
+    scan = FrameDecoder("legacy").decode_buffer(stream)
+    np.testing.assert_array_equal(scan.starts, [0, 5])
+    np.testing.assert_array_equal(scan.ends, [4, 9])
+    assert scan.consumed == 9  # The incomplete frame is kept
+
+
+@pytest.fixture
+def codes():
+    return np.random.default_rng(1).integers(0, 4096, 20 * FRAME_SAMPLES)
+
+
+def block_stream(codes, first_seq=0):
+    frames = codes.reshape(-1, FRAME_SAMPLES)
+    return [encode_block_frame(first_seq + k * FRAME_SAMPLES, frame) for k, frame in enumerate(frames)]
+
+
+def test_block_frames_split_across_reads(codes):
+    decoder = FrameDecoder("block")
+    voltages = decode_in_chunks(decoder, b"".join(block_stream(codes)))
+    np.testing.assert_allclose(voltages, to_volts(codes))
+    assert decoder.valid_packets == len(codes) // FRAME_SAMPLES
+    assert decoder.invalid_packets == 0
+    assert decoder.lost_samples == 0
+
+
+def test_block_crc_error_is_counted_and_gap_filled(codes):
+    frames = block_stream(codes)
+    bad = 5
+    frames[bad] = frames[bad][:-1] + bytes([frames[bad][-1] ^ 0xFF])
+    decoder = FrameDecoder("block")
+    voltages = decode_in_chunks(decoder, b"".join(frames))
+
+    assert decoder.invalid_packets == 1
+    assert decoder.lost_samples == FRAME_SAMPLES
+    # Sample indices stay in step: the lost frame is held at the last good value
+    expected = to_volts(codes).copy()
+    lost = slice(bad * FRAME_SAMPLES, (bad + 1) * FRAME_SAMPLES)
+    expected[lost] = expected[bad * FRAME_SAMPLES - 1]
+    np.testing.assert_allclose(voltages, expected)
+
+
+def test_block_sequence_gap_counts_lost_samples(codes):
+    frames = block_stream(codes)
+    del frames[3:5]
+    decoder = FrameDecoder("block")
+    voltages = decode_in_chunks(decoder, b"".join(frames))
+    assert decoder.lost_samples == 2 * FRAME_SAMPLES
+    assert decoder.invalid_packets == 0
+    assert len(voltages) == len(codes)
+
+
+def test_block_sequence_wraps_without_loss(codes):
+    decoder = FrameDecoder("block")
+    voltages = decode_in_chunks(decoder, b"".join(block_stream(codes, first_seq=0x10000 - 3 * FRAME_SAMPLES)))
+    assert decoder.lost_samples == 0
+    np.testing.assert_allclose(voltages, to_volts(codes))
+
+
+def test_auto_switches_to_block_protocol(codes):
+    decoder = FrameDecoder("auto")
+    voltages = decode_in_chunks(decoder, b"".join(block_stream(codes)))
+    assert decoder.active_protocol == "block"
+    np.testing.assert_allclose(voltages, to_volts(codes))
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+from visualizador.hrv import HeartRateStats
+from visualizador.config import HR_AVERAGE_BEATS
+
+RATE = 1000  # One sample per millisecond keeps the RR arithmetic readable
+
+
+def peaks_from(rr_ms, start=0):
+    return start + np.concatenate(([0], np.cumsum(rr_ms))).astype(np.int64)
+
+
+def reference(rr, window):
+    """Statistics of the last window RRs and the last window successive differences"""
+    diffs = np.diff(rr)[-window:]
+    rr = rr[-window:]
+    return {
+        'heart_rate': 60000.0 / rr[-HR_AVERAGE_BEATS:].mean(),
+        'mean_rr_ms': rr.mean(),
+        'sdnn_ms': rr.std(ddof=1),
+        'rmssd_ms': math.sqrt(np.mean(diffs ** 2)),
+        'pnn50': 100.0 * np.mean(np.abs(diffs) > 50),
+    }
+
+
+def test_rolling_window_matches_a_full_recomputation():
+    rr = np.random.default_rng(4).normal(800, 60, 1000).round()
+    stats = HeartRateStats(RATE, window_beats=50)
+    for peak in peaks_from(rr):
+        stats.add_peak(int(peak))
+
+    summary = stats.summary()
+    for name, value in reference(rr, 50).items():
+        assert getattr(summary, name) == pytest.approx(value, rel=1e-9), name
+    assert summary.intervals == 50
+    assert summary.beats == 1001
+
+
+def test_artifacts_are_rejected_and_break_the_successive_chain():
+    stats = HeartRateStats(RATE)
+    rr = [800, 810, 100, 820, 3000, 790, 800]  # An extra beat splits one RR; a missed one doubles another
+    for peak in peaks_from(rr):
+        stats.add_peak(int(peak))
+
+    assert stats.rejected == 2
+    summary = stats.summary()
+    assert summary.intervals == 5  # 800, 810, 820, 790, 800
+    # Successive differences only between contiguous valid RRs: 810-800, 800-790
+    assert summary.rmssd_ms == pytest.approx(math.sqrt((10 ** 2 + 10 ** 2) / 2))
+
+
+def test_empty_and_single_interval_summaries():
+    stats = HeartRateStats(RATE)
+    assert math.isnan(stats.summary().heart_rate)
+    stats.add_peak(0)
+    stats.add_peak(750)
+    summary = stats.summary()
+    assert summary.heart_rate == pytest.approx(80.0)
+    assert math.isnan(summary.sdnn_ms) and math.isnan(summary.rmssd_ms)
+
+    stats.add_peak(750)  # Same peak twice (e.g. firmware and host) is not an interval
+    assert stats.summary().intervals == 1
+
+    stats.reset()
+    assert stats.summary().beats == 0
@@ -0,0 +1,64 @@
+import numpy as np
+
+from visualizador.lead_history import LeadHistory
+
+LEADS = ["DI", "DII", "DIII"]
+
+
+def stream(history, first, n, block=40):
+    for start in range(first, first + n, block):
+        end = min(start + block, first + n)
+        history.extend(np.arange(start, end, dtype=np.float32), np.arange(start, end))
+
+
+def stored(history, lead_index):
+    return history.buffers[lead_index].latest()[1]
+
+
+def test_samples_are_split_at_the_lead_change_index():
+    history = LeadHistory(LEADS, capacity=1000)
+    history.lead_changed(130, 1)
+    history.lead_changed(250, 2)
+    stream(history, 0, 300)
+    np.testing.assert_array_equal(stored(history, 0), np.arange(130))
+    np.testing.assert_array_equal(stored(history, 1), np.arange(130, 250))
+    np.testing.assert_array_equal(stored(history, 2), np.arange(250, 300))
+
+
+def test_late_lead_change_moves_the_stored_tail():
+    history = LeadHistory(LEADS, capacity=1000)
+    stream(history, 0, 200)
+    history.lead_changed(170, 1)  # Reported after its samples were stored
+    stream(history, 200, 50)
+    np.testing.assert_array_equal(stored(history, 0), np.arange(170))
+    np.testing.assert_array_equal(stored(history, 1), np.arange(170, 250))
+    values, _ = history.buffers[1].latest()
+    np.testing.assert_array_equal(values, np.arange(170, 250))
+
+
+def test_each_lead_resumes_its_own_history():
+    history = LeadHistory(LEADS, capacity=1000)
+    history.lead_changed(100, 1)
+    history.lead_changed(200, 0)
+    stream(history, 0, 300)
+    np.testing.assert_array_equal(stored(history, 0), np.r_[0:100, 200:300])
+
+    history.show(1)
+    np.testing.assert_array_equal(history.current.latest()[1], np.arange(100, 200))
+    history.show(7)  # Unknown lead: keep showing the current one
+    assert history.shown == 1
+
+
+def test_decimated_history_follows_the_lead_boundaries():
+    history = LeadHistory(LEADS, capacity=2000)
+    history.set_decimation(4)
+    history.lead_changed(1000, 1)
+    stream(history, 0, 2000, block=64)
+    delay = history.decimators[0].delay  # Output indices are delay-corrected, so they start that much early
+    for lead_index, (first, last) in enumerate([(0, 1000), (1000, 2000)]):
+        values, indices = history.decimated[lead_index].latest()
+        assert np.all((indices >= first - delay) & (indices < last))
+        assert len(values) == (last - first) // 4
+    history.show(1)
+    values, indices = history.latest_display(400)
+    assert len(values) == 100 and indices[-1] < 2000
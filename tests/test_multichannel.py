@@ -0,0 +1,60 @@
+import numpy as np
+
+from visualizador.adc_service import ADCService
+from visualizador.events import ChannelEvent, LeadChangeEvent, RPeakEvent
+from visualizador.multichannel import ChannelMerger, MultiChannelBlock
+
+RATE = 1000
+
+
+def test_channels_are_aligned_on_time():
+    merger = ChannelMerger(2, sample_rate=RATE, buffer_seconds=1.0)
+    assert merger.add(0, 0, np.arange(10.0), 1000.0) is None  # Waiting for channel 1
+    # Channel 1 starts 3 samples later in time, with its own sample counter
+    block = merger.add(1, 500, np.arange(100.0, 110.0), 1003.0)
+    assert block.first_index == 0
+    assert block.samples.shape == (10, 2)
+    np.testing.assert_array_equal(block.samples[:, 0], np.arange(10.0))
+    assert np.all(np.isnan(block.samples[:3, 1]))
+    np.testing.assert_array_equal(block.samples[3:, 1], np.arange(100.0, 107.0))
+    np.testing.assert_allclose(block.timestamps, 1000.0 + np.arange(10))
+
+    block = merger.add(0, 10, np.arange(10.0, 20.0), 1010.0)
+    np.testing.assert_array_equal(block.samples[:, 1], [107.0, 108.0, 109.0])
+
+
+def test_lagging_channel_is_flushed_as_nan():
+    merger = ChannelMerger(2, sample_rate=RATE, buffer_seconds=0.1)  # 100-sample rings
+    merger.add(1, 0, np.zeros(1), 1000.0)
+    blocks = [merger.add(0, first, np.ones(50), 1000.0 + first) for first in range(0, 250, 50)]
+    flushed = [block for block in blocks if block is not None]
+    samples = np.concatenate([block.samples for block in flushed])
+    assert flushed[0].first_index == 0
+    assert len(samples) == 150  # Channel 0 never gets more than one ring ahead
+    np.testing.assert_array_equal(samples[:, 0], 1.0)
+    assert samples[0, 1] == 0.0 and np.all(np.isnan(samples[1:, 1]))
+
+
+def test_duplicate_samples_are_dropped():
+    merger = ChannelMerger(2, sample_rate=RATE, buffer_seconds=1.0)
+    merger.add(0, 0, np.arange(10.0), 1000.0)
+    merger.add(1, 0, np.arange(10.0), 1000.0)
+    merger.add(0, 5, np.arange(10.0), 1005.0)
+    assert merger.dropped_samples[0] == 5
+
+
+def test_other_channels_reach_the_buses_only():
+    adc_service = ADCService(esp32_ports=["/dev/null-a", "/dev/null-b"], arduino_port="/dev/null-arduino")
+    adc_service.sync_trigger.shots = -1  # Armed: a primary R peak would be queued
+    events = adc_service.event_bus.subscribe()
+    blocks = adc_service.data_bus.subscribe(kinds=(MultiChannelBlock,))
+    adc_service.on_esp32_samples(np.zeros(8), first_index=0, t0=1000, channel=0)
+    adc_service.on_esp32_samples(np.ones(8), first_index=0, t0=1000, channel=1)
+    adc_service.on_esp32_event(LeadChangeEvent(4, 2, "DIII"), channel=1)
+    adc_service.on_esp32_event(RPeakEvent(6), channel=1)
+
+    assert [block.samples.shape for block in blocks.poll()] == [(8, 2)]
+    assert [event for _, event in events.drain()] == [ChannelEvent(1, LeadChangeEvent(4, 2, "DIII")),
+                                                      ChannelEvent(1, RPeakEvent(6))]
+    assert adc_service.sample_count == 8  # Only the primary channel feeds the single-trace pipeline
+    assert adc_service.sync_trigger.pending.empty()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from visualizador.r_peak_detector import RPeakDetector, benchmark, LEARNING_SECONDS
+from visualizador.signal_processing_service import build_stage
+from visualizador.simulator import SyntheticECG
+from visualizador.config import FILTER_CHAIN
+
+RATE = 2000
+SECONDS = 30
+
+
+@pytest.fixture(scope="module")
+def filtered_ecg():
+    """Processing-chain output of a synthetic ECG and its true R sample indices"""
+    x, r_indices = SyntheticECG(RATE, 72.0, noise=0.005, seed=3).generate(SECONDS * RATE)
+    for stage in [build_stage(name, RATE) for name in FILTER_CHAIN]:
+        x = stage.process(x)
+    return x, np.array(r_indices)
+
+
+def detect(x, block_samples, first_index=0, detector=None):
+    detector = detector or RPeakDetector(RATE)
+    events = []
+    for start in range(0, len(x), block_samples):
+        events += detector.process(x[start:start + block_samples], first_index + start)
+    return events
+
+
+def test_synthetic_ecg_beats_are_all_found_on_time():
+    result = benchmark(RATE, seconds=SECONDS)
+    assert result['sensitivity'] >= 0.99
+    assert result['ppv'] >= 0.99
+    assert result['timing_error_ms'] < 10.0
+    assert result['latency_p99_ms'] < 150.0  # About the integration window plus the peak search
+
+
+def test_detections_do_not_depend_on_block_size(filtered_ecg):
+    x, _ = filtered_ecg
+    reference = detect(x, 50)
+    assert len(reference) > 20
+    # 333 ends learning inside a block; 10000 is split into MAX_CHUNK_SAMPLES chunks
+    for block_samples in (7, 333, 10000):
+        events = detect(x, block_samples)
+        assert [e.sample_index for e in events] == [e.sample_index for e in reference]
+
+
+def test_events_carry_the_detection_latency(filtered_ecg):
+    x, _ = filtered_ecg
+    for event in detect(x, 50):
+        newest = event.sample_index + event.latency_samples
+        assert event.source == "host"
+        assert event.latency_samples > 0
+        assert newest % 50 == 49  # Counted to the last sample of the block that revealed it
+
+
+def test_negative_qrs_is_detected_too(filtered_ecg):
+    x, truth = filtered_ecg
+    detected = np.array([e.sample_index for e in detect(-x, 50)])
+    scored = truth[truth >= (LEARNING_SECONDS + 0.5) * RATE]
+    nearest = np.abs(detected[:, None] - scored[None, :]).min(axis=0)
+    assert np.all(nearest <= 0.02 * RATE)
+
+
+def test_noise_alone_produces_no_beats():
+    noise = np.random.default_rng(0).normal(0, 0.005, SECONDS * RATE)
+    assert detect(noise, 50) == []
+
+
+def test_first_index_renumbers_the_events(filtered_ecg):
+    x, _ = filtered_ecg
+    plain = detect(x, 50)
+    shifted = detect(x, 50, first_index=1_000_000)
+    assert [e.sample_index - 1_000_000 for e in shifted] == [e.sample_index for e in plain]
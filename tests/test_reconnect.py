@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from visualizador.reconnect import ConnectionState, ReconnectSupervisor
+
+
+class FakeReader:
+    """Reader whose first connect() attempts fail with the given errors"""
+
+    def __init__(self, port, errors=()):
+        self.port = port
+        self.link = ConnectionState("TEST", port, sample_rate=1000, initial_delay=0.01, max_delay=0.04)
+        self.running = True
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def connect(self):
+        self.attempts += 1
+        if self.errors:
+            error = self.errors.pop(0)
+            if isinstance(error, OSError):
+                self.link.failed(error)  # Port errors are handled by the reader itself
+                return
+            raise error
+        self.link.established()
+
+
+def test_backoff_doubles_up_to_the_cap_and_resets_on_retry_now():
+    link = ConnectionState("TEST", "/dev/null", initial_delay=0.1, max_delay=0.5)
+    delays = []
+    for _ in range(5):
+        delays.append(link.delay)
+        link.failed(OSError("busy"))
+    assert delays == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5])
+    assert not link.attempt_due(time.monotonic())
+
+    link.retry_now()
+    assert link.delay == 0.1
+    assert link.attempt_due(time.monotonic())
+
+
+def test_reconnect_accounts_downtime_and_lost_samples():
+    link = ConnectionState("TEST", "/dev/null", sample_rate=2000)
+    link.established()
+    assert link.connected and link.reconnects == 0  # The first connection is not a reconnect
+
+    link.lost(OSError("unplugged"))
+    assert not link.connected and link.attempt_due(time.monotonic())
+    time.sleep(0.05)
+    link.established()
+    downtime, lost = link.history[-1]
+    assert link.reconnects == 1
+    assert downtime >= 0.05
+    assert lost == link.lost_samples == round(downtime * 2000)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_supervisor_retries_with_backoff_and_survives_unexpected_errors(tmp_path):
+    supervisor = ReconnectSupervisor(hotplug_dir=str(tmp_path), poll_ms=5)
+    reader = FakeReader("/dev/null", errors=[OSError("busy"), RuntimeError("driver bug"), OSError("busy")])
+    supervisor.register(reader)
+
+    assert wait_for(lambda: reader.link.connected)
+    assert reader.attempts == 4
+    assert supervisor.thread.is_alive()
+
+
+def test_supervisor_survives_an_error_outside_connect(tmp_path, monkeypatch):
+    supervisor = ReconnectSupervisor(hotplug_dir=str(tmp_path), poll_ms=5)
+    calls = []
+    original = supervisor._check_hotplug
+
+    def flaky_check(readers):
+        calls.append(len(readers))
+        if len(calls) == 1:
+            raise RuntimeError("listdir exploded")
+        original(readers)
+
+    monkeypatch.setattr(supervisor, "_check_hotplug", flaky_check)
+    reader = FakeReader("/dev/null")
+    supervisor.register(reader)
+    assert wait_for(lambda: reader.link.connected)
+    assert len(calls) >= 2
+
+
+def test_hotplug_skips_the_backoff(tmp_path):
+    port = tmp_path / "ttyTEST"
+    supervisor = ReconnectSupervisor(hotplug_dir=str(tmp_path), poll_ms=5)
+    reader = FakeReader(str(port), errors=[OSError("no such device")])
+    reader.link.max_delay = reader.link.delay = 60.0  # Only a hot-plug can bring the retry forward
+    supervisor.register(reader)
+    assert wait_for(lambda: reader.attempts == 1)
+    time.sleep(0.05)
+    assert not reader.link.connected
+
+    port.touch()
+    assert wait_for(lambda: reader.link.connected)
+    assert reader.attempts == 2
+
+
+def test_stopped_readers_are_not_reconnected(tmp_path):
+    supervisor = ReconnectSupervisor(hotplug_dir=str(tmp_path), poll_ms=5)
+    reader = FakeReader("/dev/null")
+    reader.running = False
+    supervisor.register(reader)
+    time.sleep(0.05)
+    assert reader.attempts == 0
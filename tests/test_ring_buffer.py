@@ -0,0 +1,121 @@
+import numpy as np
+
+from visualizador.ring_buffer import SampleRing, HEADER_WRITTEN, HEADER_WRITING
+
+
+def test_wraparound_keeps_order():
+    ring = SampleRing(8)
+    read = []
+    for first in range(0, 30, 3):
+        ring.write(np.arange(first, first + 3, dtype=np.float32), first)
+        read.append(ring.read())
+    samples = np.concatenate([block.samples for block in read])
+    indices = np.concatenate([block.indices for block in read])
+    np.testing.assert_array_equal(indices, np.arange(30))
+    np.testing.assert_array_equal(samples, np.arange(30))
+    assert ring.overflows == 0
+
+
+def test_overrun_drops_oldest_and_counts_them():
+    ring = SampleRing(8)
+    for first in range(0, 20, 5):
+        ring.write(np.arange(first, first + 5, dtype=np.float32), first)
+    assert ring.pending == 8
+
+    block = ring.read()
+    np.testing.assert_array_equal(block.indices, np.arange(12, 20))
+    assert ring.overflows == 12
+    assert ring.pending == 0
+
+
+def test_block_larger_than_ring_keeps_newest():
+    ring = SampleRing(8)
+    ring.write(np.arange(20, dtype=np.float32), 100)
+    block = ring.read()
+    np.testing.assert_array_equal(block.indices, np.arange(112, 120))
+    np.testing.assert_array_equal(block.samples, np.arange(12, 20))
+    assert ring.overflows == 12
+
+
+def test_partial_reads_leave_the_rest_pending():
+    ring = SampleRing(16, timestamps=True)
+    ring.write(np.arange(10, dtype=np.float32), 0, timestamps=5.0)
+    samples = np.empty(4, dtype=np.float32)
+    indices = np.empty(4, dtype=np.int64)
+    timestamps = np.empty(4)
+
+    assert ring.read_into(samples, indices, timestamps) == 4
+    np.testing.assert_array_equal(indices, np.arange(4))
+    np.testing.assert_array_equal(timestamps, 5.0)
+    assert ring.pending == 6
+    assert len(ring.read().samples) == 6
+    assert ring.overflows == 0
+
+
+class LappedOnCopy(np.ndarray):
+    """Output column whose first slice assignment runs a callback right after the copy"""
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        callback, self.callback = getattr(self, "callback", None), None
+        if callback:
+            callback()
+
+
+def start_write(ring, samples, first_index):
+    """The producer side of write() up to, but not including, the publish of HEADER_WRITTEN"""
+    head = ring.written
+    n = len(samples)
+    ring.header[HEADER_WRITING] = head + n
+    pos = (head + np.arange(n)) % ring.capacity
+    ring.samples[pos] = samples
+    ring.indices[pos] = np.arange(first_index, first_index + n)
+
+
+def read_while_lapped(ring, lap_samples, lap_first):
+    samples = np.empty(ring.capacity, dtype=np.float32).view(LappedOnCopy)
+    indices = np.empty(ring.capacity, dtype=np.int64)
+    samples.callback = lambda: start_write(ring, lap_samples, lap_first)
+    n = ring.read_into(samples, indices)
+    return np.asarray(samples[:n]), indices[:n]
+
+
+def test_unpublished_lapping_write_is_not_read_torn():
+    ring = SampleRing(8)
+    ring.write(np.arange(8, dtype=np.float32), 0)
+
+    # A 3-sample write starts after the samples column was copied but before the indices column
+    samples, indices = read_while_lapped(ring, np.arange(8, 11, dtype=np.float32), 8)
+    np.testing.assert_array_equal(indices, np.arange(3, 8))
+    np.testing.assert_array_equal(samples, indices)  # No overwritten slot survives
+    assert ring.overflows == 3
+
+    ring.header[HEADER_WRITTEN] = ring.header[HEADER_WRITING]  # The producer publishes
+    block = ring.read()
+    np.testing.assert_array_equal(block.indices, np.arange(8, 11))
+    np.testing.assert_array_equal(block.samples, block.indices)
+
+
+def test_full_lap_during_copy_returns_nothing():
+    ring = SampleRing(8)
+    ring.write(np.arange(8, dtype=np.float32), 0)
+    samples, indices = read_while_lapped(ring, np.arange(100, 108, dtype=np.float32), 100)
+    assert len(samples) == 0 and len(indices) == 0
+    assert ring.overflows == 8
+
+
+def test_write_inside_the_free_slots_keeps_the_read():
+    ring = SampleRing(16)
+    ring.write(np.arange(8, dtype=np.float32), 0)
+    samples, indices = read_while_lapped(ring, np.arange(8, 16, dtype=np.float32), 8)
+    np.testing.assert_array_equal(indices, np.arange(8))
+    np.testing.assert_array_equal(samples, indices)
+    assert ring.overflows == 0
+
+
+def test_read_stops_at_the_given_write_count():
+    ring = SampleRing(16)
+    ring.write(np.arange(10, dtype=np.float32), 0)
+    np.testing.assert_array_equal(ring.read(end=6).indices, np.arange(6))
+    assert len(ring.read(end=6).samples) == 0
+    np.testing.assert_array_equal(ring.read().indices, np.arange(6, 10))
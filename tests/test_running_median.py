@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from visualizador.running_median import IndexableSkiplist, MovingMedianBaseline, RunningMedian
+
+RATE = 500
+
+
+def test_skiplist_stays_sorted_under_inserts_and_removes():
+    rng = np.random.default_rng(6)
+    skiplist = IndexableSkiplist(64)
+    values = []
+    for value in rng.integers(0, 20, 500).tolist():  # Plenty of duplicates
+        skiplist.insert(value)
+        values.append(value)
+        if len(values) > 40:
+            old = values.pop(int(rng.integers(0, len(values))))
+            skiplist.remove(old)
+        assert [skiplist[i] for i in range(len(skiplist))] == sorted(values)
+    with pytest.raises(KeyError):
+        skiplist.remove(1000)
+
+
+@pytest.mark.parametrize("window", [1, 4, 51])
+def test_matches_the_median_of_the_window(window):
+    x = np.random.default_rng(7).normal(size=400)
+    median = RunningMedian(window)
+    got = [median.push(value) for value in x.tolist()]
+    # The upper median for even windows
+    expected = [np.sort(x[max(i + 1 - window, 0):i + 1])[min(i + 1, window) // 2] for i in range(len(x))]
+    np.testing.assert_array_equal(got, expected)
+
+
+def test_non_finite_values_repeat_the_last_one():
+    median = RunningMedian(3)
+    assert np.isnan(median.push(float('nan')))  # Nothing to repeat yet
+    median.push(1.0)
+    median.push(5.0)
+    assert median.push(float('nan')) == 5.0  # Window 1, 5, 5
+    assert median.push(float('inf')) == 5.0
+    assert median.push(0.0) == 5.0  # Window 5, 5, 0
+    assert median.push(0.0) == 0.0
+
+
+def ecg_like(seconds=10):
+    t = np.arange(seconds * RATE) / RATE
+    spikes = (np.mod(t, 0.8) < 0.04) * 1.5  # Narrow QRS-like pulses
+    drift = 0.5 * np.sin(2 * np.pi * 0.1 * t)
+    return spikes, drift
+
+
+def test_baseline_removes_slow_drift_and_keeps_the_pulses():
+    spikes, drift = ecg_like()
+    out = MovingMedianBaseline(RATE).process(spikes + drift)
+    settled = slice(2 * RATE, None)
+    flat = spikes[settled] == 0
+    # The causal windows lag the drift by about half their length (~0.4 s), so some is left
+    residual = out[settled][flat]
+    assert np.sqrt(np.mean(residual ** 2)) < 0.25 * np.sqrt(np.mean(drift ** 2))
+    assert np.min(out[settled][~flat]) > 1.3
+
+
+def test_blockwise_matches_one_shot():
+    spikes, drift = ecg_like(4)
+    x = spikes + drift
+    one_shot = MovingMedianBaseline(RATE).process(x)
+    stage = MovingMedianBaseline(RATE)
+    blocks = np.array_split(x, [17, 300, 301, 1200])
+    np.testing.assert_array_equal(np.concatenate([stage.process(block) for block in blocks]), one_shot)
+    stage.reset()
+    np.testing.assert_array_equal(stage.process(x), one_shot)
@@ -0,0 +1,36 @@
+import time
+
+import serial
+
+from visualizador.serial_io import ReadStats, read_chunk
+
+
+def loopback(timeout):
+    return serial.serial_for_url("loop://", timeout=timeout)
+
+
+def test_returns_on_timeout_with_what_arrived():
+    port = loopback(timeout=0.05)
+    port.write(b"abcde")
+    started = time.monotonic()
+    assert read_chunk(port, 64) == b"abcde"
+    assert time.monotonic() - started >= 0.04  # Waited for more, up to the latency target
+
+
+def test_returns_early_and_drains_the_backlog():
+    port = loopback(timeout=5.0)
+    payload = bytes(range(200))
+    port.write(payload)
+    started = time.monotonic()
+    assert read_chunk(port, 16) == payload  # One wakeup for everything buffered
+    assert time.monotonic() - started < 1.0
+
+
+def test_read_stats_rates():
+    stats = ReadStats()
+    stats.record(100)
+    stats.record(300)
+    snapshot = stats.snapshot()
+    assert snapshot['bytes_per_wakeup'] == 200
+    assert snapshot['wakeups_per_s'] > 0
+    assert stats.snapshot()['bytes_per_wakeup'] == 0.0  # Rates are since the previous snapshot
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from visualizador.signal_processing_service import SignalProcessingService
+
+RATE = 500
+
+
+@pytest.fixture
+def signal():
+    t = np.arange(3000) / RATE
+    return 1.0 + 0.2 * np.sin(2 * np.pi * 1.3 * t) + 0.05 * np.random.default_rng(5).normal(size=len(t))
+
+
+def process_in_blocks(service, x, block=70):
+    out = [service._process_leads(x[start:start + block], start)[0] for start in range(0, len(x), block)]
+    return np.concatenate(out)
+
+
+def test_each_lead_keeps_its_own_filter_state(signal):
+    service = SignalProcessingService(RATE)
+    service.lead_changed(1000, 1)
+    service.lead_changed(2000, 0)
+    filtered = process_in_blocks(service, signal)
+
+    # Lead 0 sees 0..1000 and then 2000..3000 as one continuous stream; lead 1 only 1000..2000
+    reference = SignalProcessingService(RATE)
+    lead0 = reference.filter_block(np.r_[signal[:1000], signal[2000:]])[0]
+    reference.lead_index = 1
+    lead1 = reference.filter_block(signal[1000:2000])[0]
+    np.testing.assert_allclose(filtered, np.r_[lead0[:1000], lead1, lead0[1000:]], rtol=0, atol=1e-12)
+    assert service.lead_index == 0
+
+
+def test_late_lead_change_applies_from_the_next_block(signal):
+    service = SignalProcessingService(RATE)
+    process_in_blocks(service, signal[:700])
+    service.lead_changed(650, 2)  # Those samples were already filtered with lead 0
+    segments = list(service._lead_segments(100, 700))
+    assert segments == [(0, 100)]
+    assert service.lead_index == 2
+
+
+def test_unknown_lead_is_ignored():
+    service = SignalProcessingService(RATE)
+    service.lead_changed(10, 99)
+    assert list(service._lead_segments(50, 0)) == [(0, 50)]
+    assert service.lead_index == 0
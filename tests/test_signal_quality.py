@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from visualizador.frame_decoder import ADC_VREF
+from visualizador.signal_quality import SignalQualityIndex
+from visualizador.simulator import SyntheticECG
+from visualizador.config import SQI_WINDOW_MS
+
+RATE = 500
+WINDOW = SQI_WINDOW_MS * RATE // 1000
+
+
+def ecg(seconds=12, seed=9):
+    return SyntheticECG(RATE, 70.0, seed=seed).generate(seconds * RATE)[0]
+
+
+def run(x, block=100, first_index=0, sqi=None):
+    sqi = sqi or SignalQualityIndex(RATE, lead_index=2)
+    events = []
+    for start in range(0, len(x), block):
+        events += sqi.process(x[start:start + block], first_index + start)
+    return sqi, events
+
+
+def issues_around(events, sample_index):
+    """Issues in force at sample_index (from the last event at or before it)"""
+    current = None
+    for event in events:
+        if event.sample_index <= sample_index:
+            current = event.issues
+    return current
+
+
+def test_clean_ecg_reports_once_that_it_is_usable():
+    sqi, events = run(ecg())
+    assert len(events) == 1
+    assert events[0].issues == () and events[0].lead_index == 2
+    assert events[0].sample_index == WINDOW - 1
+    assert events[0].noise_v < 0.02
+    assert sqi.poor == 0 and sqi.windows > 0
+
+
+@pytest.mark.parametrize("issue, corrupt", [
+    ("flatline", lambda x, part: np.full(part.stop - part.start, 1.2)),
+    ("clipping", lambda x, part: np.minimum(x[part] + 3.0, ADC_VREF)),
+    ("noise", lambda x, part: x[part] + np.random.default_rng(1).normal(0, 0.08, part.stop - part.start)),
+])
+def test_corrupted_stretch_is_flagged_and_cleared(issue, corrupt):
+    x = ecg()
+    part = slice(4 * RATE, 7 * RATE)
+    x[part] = corrupt(x, part)
+    sqi, events = run(x)
+
+    assert issue in issues_around(events, 7 * RATE - 1)
+    assert issues_around(events, 4 * RATE - 1) == ()
+    assert issues_around(events, len(x) - 1) == ()
+    assert sqi.flagged[issue] > 0
+    assert [e.issues for e in events][0] == ()
+
+
+def test_noise_estimate_is_the_added_rms():
+    x = ecg() + np.random.default_rng(2).normal(0, 0.05, 12 * RATE)
+    _, events = run(x)
+    noisy = [e for e in events if "noise" in e.issues]
+    assert noisy and noisy[0].noise_v == pytest.approx(0.05, rel=0.2)
+
+
+def test_baseline_jump_is_flagged():
+    x = ecg()
+    x[6 * RATE:] += 0.8
+    _, events = run(x)
+    flagged = [e for e in events if "baseline_jump" in e.issues]
+    assert flagged
+    assert 6 * RATE <= flagged[0].sample_index < 6 * RATE + WINDOW
+
+
+def test_events_do_not_depend_on_block_size():
+    x = ecg()
+    x[5 * RATE:6 * RATE] = 1.2
+    reference = run(x, block=100)[1]
+    for block in (7, 37, 5000):
+        assert run(x, block=block)[1] == reference
+
+
+def test_gap_restarts_the_windows():
+    x = ecg(4)
+    sqi = SignalQualityIndex(RATE)
+    sqi.process(x[:WINDOW - 10], 0)
+    x[WINDOW - 10:] = 1.2  # Flat after the gap only
+    events = sqi.process(x[WINDOW - 10:], 100000)
+    assert events[0].issues == ("flatline",)
+    assert events[0].sample_index == 100000 + WINDOW - 1
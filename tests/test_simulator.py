@@ -0,0 +1,80 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from visualizador.frame_decoder import FrameDecoder
+from visualizador.simulator import ArduinoSimulator, ESP32Simulator, SyntheticECG, encode_frames, _PtyDevice
+from visualizador.stream_demux import StreamDemultiplexer
+from visualizador.telemetry_parser import TelemetryLineParser
+
+
+def test_synthetic_ecg_does_not_depend_on_chunking():
+    whole, whole_r = SyntheticECG(1000, rr_jitter=0.0, noise=0.0).generate(5000)
+    ecg = SyntheticECG(1000, rr_jitter=0.0, noise=0.0)
+    parts = [ecg.generate(n) for n in (1, 999, 1700, 2300)]
+    np.testing.assert_allclose(np.concatenate([p[0] for p in parts]), whole)
+    np.testing.assert_array_equal(np.concatenate([p[1] for p in parts]), whole_r)
+    assert len(whole_r) == 6  # 72 bpm over 5 s
+    assert np.all(whole[whole_r] > whole.mean() + 0.5)
+
+
+def test_encoded_frames_decode_to_the_quantized_signal():
+    voltages = np.linspace(0.0, 3.3, 200)
+    decoded = FrameDecoder("legacy").decode(encode_frames(voltages).tobytes())
+    np.testing.assert_allclose(decoded, voltages, atol=3.3 / 4095)
+
+
+def read_for(device, seconds):
+    data = b""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            data += os.read(device.slave_fd, 65536)
+        except BlockingIOError:
+            time.sleep(0.005)
+    return data
+
+
+@pytest.mark.parametrize("protocol", ["legacy", "block"])
+def test_esp32_simulator_streams_markers_and_frames(protocol):
+    device = ESP32Simulator(sample_rate=2000, heart_rate_bpm=120, protocol=protocol, seed=1)
+    os.set_blocking(device.slave_fd, False)
+    device.start()
+    try:
+        data = read_for(device, 1.2)
+    finally:
+        device.stop()
+
+    demux = StreamDemultiplexer(FrameDecoder(protocol))
+    voltages, events = demux.feed(data)
+    assert len(voltages) >= 2000
+    assert demux.decoder.invalid_packets == 0
+    reported = [event.sample_index for event in events]
+    assert reported and reported == device.r_peaks_sent[:len(reported)]
+
+
+def test_esp32_simulator_answers_lead_commands():
+    device = ESP32Simulator(sample_rate=500)
+    device.on_command("LEAD_DII")
+    assert device.lead_index == 1
+    assert device.pending_markers == [b"LEAD_CHANGE:1,DII,0\n"]
+
+
+def test_arduino_simulator_lines_parse():
+    device = ArduinoSimulator(line_rate=100)
+    os.set_blocking(device.slave_fd, False)
+    device.start()
+    try:
+        data = read_for(device, 0.3)
+    finally:
+        device.stop()
+    rows = TelemetryLineParser().feed(data)
+    assert len(rows) >= 20
+    assert rows[0].estado == "CARGA"
+
+
+def test_device_base_is_abstract():
+    with pytest.raises(TypeError):
+        _PtyDevice(1.0)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from visualizador.block_frame import encode_block_frame
+from visualizador.events import LeadChangeEvent, RPeakEvent, DischargeEvent
+from visualizador.frame_decoder import FrameDecoder
+from visualizador.stream_demux import StreamDemultiplexer
+from tests.test_frame_decoder import legacy_frame
+
+
+def feed_in_chunks(demux, stream: bytes, size):
+    voltages, events = [], []
+    for pos in range(0, len(stream), size):
+        chunk_voltages, chunk_events = demux.feed(stream[pos:pos + size])
+        voltages.append(chunk_voltages)
+        events += chunk_events
+    return np.concatenate(voltages), events
+
+
+def interleaved_stream():
+    """30 samples with a lead change after sample 10 and an R peak after sample 20"""
+    frames = [legacy_frame(100 + i) for i in range(30)]
+    frames.insert(20, b"R_PEAK:20\n")
+    frames.insert(10, b"LEAD_CHANGE:1,II\n")
+    return b"".join(frames) + b"DISPARO: fase 1\n"
+
+
+def test_events_carry_the_index_of_the_next_sample():
+    for size in (1, 3, 7, 64, 1000):
+        demux = StreamDemultiplexer(FrameDecoder("legacy"))
+        voltages, events = feed_in_chunks(demux, interleaved_stream(), size)
+        assert len(voltages) == 30
+        assert events == [LeadChangeEvent(10, 1, "II"), RPeakEvent(20, source="esp32"), DischargeEvent(30, "DISPARO: fase 1")]
+        assert demux.decoder.invalid_packets == 0
+
+
+def test_non_event_lines_are_counted_and_skipped():
+    demux = StreamDemultiplexer(FrameDecoder("legacy"))
+    _, events = demux.feed(b"ESP32 listo\n" + legacy_frame(5) + b"LEAD_CHANGE:x,II\n")
+    assert events == []
+    assert demux.text_lines == 2
+
+
+def test_reset_drops_partial_lines():
+    demux = StreamDemultiplexer(FrameDecoder("legacy"))
+    demux.feed(b"R_PE")
+    demux.reset()
+    _, events = demux.feed(b"LEAD_CHANGE:2,III\n")
+    assert events == [LeadChangeEvent(0, 2, "III")]
+
+
+def block_stream_with_markers(first_seq=0):
+    """8 frames of 32 samples; markers go before the frame holding their sample, as the firmware sends them"""
+    codes = np.arange(256) % 4096
+    chunks = []
+    for k in range(8):
+        if k == 2:
+            chunks.append(f"LEAD_CHANGE:1,DII,{(first_seq + 70) % 65536}\n".encode())
+        if k == 5:
+            chunks.append(f"R_PEAK:{first_seq + 181}\n".encode())
+            chunks.append(b"DISPARO: fase 1\n")
+        chunks.append(encode_block_frame(first_seq + 32 * k, codes[32 * k:32 * (k + 1)]))
+    return b"".join(chunks)
+
+
+def test_block_markers_are_placed_at_their_device_sample():
+    for first_seq in (0, 65536 - 100):  # Also across the sequence counter wraparound
+        for size in (5, 64, 4000):
+            demux = StreamDemultiplexer(FrameDecoder("block"))
+            voltages, events = feed_in_chunks(demux, block_stream_with_markers(first_seq), size)
+            assert len(voltages) == 256
+            assert events == [LeadChangeEvent(70, 1, "DII"), RPeakEvent(181), DischargeEvent(160, "DISPARO: fase 1")]
+
+
+def test_block_markers_follow_gap_fill():
+    frames = [encode_block_frame(32 * k, np.zeros(32)) for k in range(4)]
+    stream = frames[0] + frames[2] + b"R_PEAK:100\n" + frames[3]  # Frame 1 lost: its samples are filled
+    demux = StreamDemultiplexer(FrameDecoder("block"))
+    voltages, events = demux.feed(stream)
+    assert len(voltages) == 128
+    assert events == [RPeakEvent(100)]
+
+
+def test_marker_after_the_last_frame_uses_the_previous_one():
+    demux = StreamDemultiplexer(FrameDecoder("block"))
+    demux.feed(encode_block_frame(1000, np.zeros(32)))
+    _, events = demux.feed(b"R_PEAK:1040\n")
+    assert events == [RPeakEvent(40)]
@@ -0,0 +1,122 @@
+import math
+import time
+
+import pytest
+
+from visualizador.config import SYNC_MAX_R_TO_FIRE_MS
+from visualizador.events import RPeakEvent
+from visualizador.sync_trigger import SyncTrigger
+
+DELAY_MS = 20
+
+
+class MsClock:
+    """Sample clock at 1 ksps whose sample index is milliseconds since `base_ms`"""
+
+    def __init__(self):
+        self.base_ms = time.time() * 1000.0
+
+    def time_of(self, index):
+        return self.base_ms + index
+
+    def index_at(self, ms_ago=0.0):
+        return int(time.time() * 1000.0 - ms_ago - self.base_ms)
+
+
+class FakeArduino:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.writes = []
+
+    def write_now(self, data):
+        self.writes.append((time.time() * 1000.0, data))
+        return self.ok
+
+
+class NoDirectWrite:
+    pass
+
+
+@pytest.fixture
+def trigger():
+    clock = MsClock()
+    arduino = FakeArduino()
+    sync = SyncTrigger(arduino, clock, sample_rate=1000, delay_samples=DELAY_MS, source="esp32")
+    sync.start()
+    yield sync, clock, arduino
+    sync.stop()
+
+
+def wait_for(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.002)
+    return predicate()
+
+
+def test_refuses_to_arm_with_host_r_peaks():
+    sync = SyncTrigger(FakeArduino(), MsClock(), sample_rate=1000, delay_samples=DELAY_MS, source="host")
+    assert not sync.on_time
+    assert "host" in sync.unavailable_reason
+    assert not sync.arm()
+    assert not sync.armed
+
+
+def test_refuses_to_arm_without_direct_port_writes():
+    sync = SyncTrigger(NoDirectWrite(), MsClock(), sample_rate=1000, delay_samples=DELAY_MS, source="esp32")
+    assert not sync.supported
+    assert not sync.arm()
+
+
+def test_fires_post_r_delay_after_the_r_peak_once_per_shot(trigger):
+    sync, clock, arduino = trigger
+    assert sync.unavailable_reason is None
+    assert sync.arm(1)
+    r_index = clock.index_at()
+    sync.on_r_peak(RPeakEvent(r_index))
+    sync.on_r_peak(RPeakEvent(r_index + 800))  # Next beat: the single shot is already spent
+    assert wait_for(lambda: sync.fired == 1)
+    time.sleep(0.05)
+
+    assert len(arduino.writes) == 1
+    assert arduino.writes[0][1] == b"SYNC_FIRE\n"
+    record = sync.history[0]
+    assert record.fired and record.r_index == r_index
+    assert DELAY_MS <= record.written_ms - record.r_time_ms < DELAY_MS + 5
+    assert not sync.armed
+
+
+def test_late_r_peak_is_skipped_and_the_trigger_stays_armed(trigger):
+    sync, clock, arduino = trigger
+    sync.arm(1)
+    sync.on_r_peak(RPeakEvent(clock.index_at(ms_ago=SYNC_MAX_R_TO_FIRE_MS + 10)))
+    assert wait_for(lambda: sync.skipped == 1)
+    assert arduino.writes == []
+    assert sync.armed
+    late = sync.history[-1]
+    assert not late.fired and math.isnan(late.written_ms)
+
+    sync.on_r_peak(RPeakEvent(clock.index_at()))
+    assert wait_for(lambda: sync.fired == 1)
+    assert len(arduino.writes) == 1
+    stats = sync.latency_stats()
+    assert stats['fired'] == 1 and stats['skipped'] == 1
+    assert DELAY_MS <= stats['r_to_command']['max'] < SYNC_MAX_R_TO_FIRE_MS
+
+
+def test_failed_write_is_counted_as_skipped(trigger):
+    sync, clock, arduino = trigger
+    arduino.ok = False
+    sync.arm(1)
+    sync.on_r_peak(RPeakEvent(clock.index_at()))
+    assert wait_for(lambda: sync.skipped == 1)
+    assert sync.fired == 0 and sync.armed
+
+
+def test_ignores_other_sources_and_disarmed_state(trigger):
+    sync, clock, arduino = trigger
+    sync.on_r_peak(RPeakEvent(clock.index_at()))  # Not armed
+    sync.arm(-1)
+    sync.on_r_peak(RPeakEvent(clock.index_at(), source="host"))
+    time.sleep(DELAY_MS * 3 / 1000.0)
+    assert arduino.writes == [] and sync.pending.empty()
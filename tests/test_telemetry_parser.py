@@ -0,0 +1,38 @@
+from visualizador.telemetry_parser import EnergyRow, TelemetryLineParser
+
+
+def row(t, vcap=120.5, estado="CARGANDO"):
+    return f"{t},{vcap},0.125,1.5,0.75,2.25,{estado}\n".encode()
+
+
+def test_lines_split_across_reads_are_parsed_in_batches():
+    stream = b"".join(row(t) for t in range(100))
+    parser = TelemetryLineParser()
+    rows = []
+    for pos in range(0, len(stream), 37):
+        rows += parser.feed(stream[pos:pos + 37])
+    assert [r.timestamp for r in rows] == list(range(100))
+    assert rows[0] == EnergyRow(0, 120.5, 0.125, 1.5, 0.75, 2.25, "CARGANDO")
+    assert parser.lines_parsed == 100
+    assert parser.lines_malformed == 0
+
+
+def test_malformed_lines_are_isolated():
+    parser = TelemetryLineParser()
+    rows = parser.feed(row(1) + b"2,abc,0,0,0,0,LISTO\n" + b"3,1,2\n" + b"Sistema listo\n" + row(4, estado="LISTO"))
+    assert [(r.timestamp, r.estado) for r in rows] == [(1, "CARGANDO"), (4, "LISTO")]
+    assert parser.lines_malformed == 2
+    assert parser.text_lines == 1
+
+
+def test_metadata_matches_on_arduino_data():
+    energia = EnergyRow(7, 100.0, 0.5, 1.0, 2.0, 3.0, "DESCARGA").metadata()['energia']
+    assert energia == {'vcap': 100.0, 'corriente': 0.5, 'e_f1': 1.0, 'e_f2': 2.0, 'e_total': 3.0,
+                       'estado': "DESCARGA"}
+
+
+def test_reset_drops_the_partial_line():
+    parser = TelemetryLineParser()
+    parser.feed(b"123,4")
+    parser.reset()
+    assert parser.feed(row(5)) == [EnergyRow(5, 120.5, 0.125, 1.5, 0.75, 2.25, "CARGANDO")]
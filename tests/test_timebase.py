@@ -0,0 +1,41 @@
+import numpy as np
+
+from visualizador.timebase import SampleClock
+
+RATE = 2000
+BLOCK = 32
+
+
+def feed(clock, blocks, start_ms=1000.0, ppm=0.0, seed=0):
+    """Blocks of a device whose clock is off by ppm, arriving 0-5 ms late; returns the true times"""
+    rng = np.random.default_rng(seed)
+    period = 1000.0 / RATE / (1 + ppm * 1e-6)
+    for k in range(blocks):
+        last = (k + 1) * BLOCK - 1
+        clock.timestamps(k * BLOCK, BLOCK, start_ms + last * period + rng.uniform(0, 5))
+    return lambda index: start_ms + np.asarray(index) * period
+
+
+def test_drift_is_estimated_and_timestamps_follow_device_time():
+    clock = SampleClock(RATE)
+    true_time = feed(clock, blocks=2000, ppm=300)
+    assert abs(clock.drift_ppm + 300) < 50  # A fast device means a shorter period
+    indices = np.arange(63000, 64000)
+    error = clock.time_of(indices) - true_time(indices)
+    assert np.all(np.abs(error) < 2.0)  # Arrival jitter is 5 ms
+    assert clock.resyncs == 0
+
+
+def test_timestamps_are_evenly_spaced_per_block():
+    clock = SampleClock(RATE)
+    stamps = clock.timestamps(0, BLOCK, 500.0)
+    np.testing.assert_allclose(np.diff(stamps), 1000.0 / RATE)
+    assert stamps[-1] == 500.0
+
+
+def test_stream_gap_reanchors_the_clock():
+    clock = SampleClock(RATE)
+    feed(clock, blocks=100)
+    clock.timestamps(100 * BLOCK, BLOCK, 1e6)  # Seconds later than the sample count implies
+    assert clock.resyncs == 1
+    assert clock.time_of(101 * BLOCK - 1) == 1e6
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from visualizador.event_bus import EventBus
+from visualizador.events import LeadChangeEvent, RPeakEvent, EnergyEvent, QualityEvent
+from visualizador.ui_service import UIService, ProcessedBlock, DRAIN_CHUNK_SAMPLES
+
+
+@pytest.fixture
+def ui():
+    service = UIService()
+    bus = EventBus()
+    service.subscribe_events(bus)
+    return service, bus
+
+
+def test_status_events_are_applied_on_the_next_drain(ui):
+    service, bus = ui
+    bus.publish(LeadChangeEvent(0, 2, "DIII"), 10.0)
+    bus.publish(QualityEvent(100, 2, ("noise",), 0.05), 20.0)
+    bus.publish(EnergyEvent(1234, 350.0, 0.0, 0.0, 0.0, 12.5, "CARGA"), 30.0)
+    bus.publish(RPeakEvent(150, source=service.r_peak_source), 40.0)
+    assert service.backlog['events'] == 4
+
+    service._process_incoming_data()
+    assert service.current_lead_index == 2
+    assert service.lead_quality[2] == ("noise",)
+    assert service.energia_carga_actual == 12.5
+    assert service.last_r_peak_time == 40.0
+    assert service.backlog['events'] == 0
+
+
+def test_discharge_is_timed_from_the_last_r_peak(ui):
+    service, bus = ui
+    bus.publish(RPeakEvent(2000, source=service.r_peak_source), 5000.0)
+    bus.publish(EnergyEvent(0, 0.0, 0.0, 1.5, 1.0, 2.5, "DESCARGA_F1"), 5020.0)
+    bus.publish(EnergyEvent(0, 0.0, 0.0, 1.5, 1.0, 2.5, "DESCARGA_F1"), 5030.0)  # Same discharge
+    service._process_incoming_data()
+
+    assert len(service.discharge_events) == 1
+    assert service.discharge_events[0][1:] == (5020.0, 20.0)
+    assert service.energia_total_ciclo == 2.5
+
+
+def test_r_peaks_of_the_other_source_do_not_feed_heart_rate(ui):
+    service, bus = ui
+    other = "esp32" if service.r_peak_source == "host" else "host"
+    for k in range(5):
+        bus.publish(RPeakEvent(k * 1600, source=other), float(k))
+    service._process_incoming_data()
+    assert service.hr_stats.beats == 0
+
+
+def push(service, first, n):
+    values = np.sin(np.arange(first, first + n) * 0.01).astype(np.float32)
+    service.add_processed_block(ProcessedBlock(0, values, first, timestamps=np.arange(first, first + n) * 0.5))
+    return values
+
+
+def test_drain_applies_the_gain_into_the_display_history(ui):
+    service, _ = ui
+    service.signal_gain = 2.5
+    values = np.concatenate([push(service, 0, 300), push(service, 300, 200)])
+    service._process_incoming_data()
+
+    shown, indices = service.display.latest()
+    np.testing.assert_array_equal(indices, np.arange(500))
+    np.testing.assert_allclose(shown, values * 2.5, rtol=1e-6)
+    assert service.sample_count == 499
+    assert service.backlog['samples'] == 0
+
+
+def test_spent_budget_leaves_the_rest_for_the_next_tick(ui):
+    service, _ = ui
+    total = 2 * DRAIN_CHUNK_SAMPLES + 100
+    assert total <= service.sample_ring.capacity
+    push(service, 0, total)
+
+    service._process_incoming_data(budget_ms=0)  # Out of time after the first chunk
+    assert len(service.display) == DRAIN_CHUNK_SAMPLES
+    assert service.backlog['samples'] == total - DRAIN_CHUNK_SAMPLES
+
+    service._process_incoming_data(budget_ms=1000)  # Room for every chunk even on a loaded machine
+    assert service.sample_count == total - 1
+    assert service.backlog == {'samples': 0, 'events': 0, 'dropped_samples': 0}
+    assert service.last_drain_ms > 0
+
+
+def test_ui_falling_a_ring_behind_counts_dropped_samples(ui):
+    service, _ = ui
+    capacity = service.sample_ring.capacity
+    for first in range(0, capacity + 1000, 1000):
+        push(service, first, 1000)
+    service._process_incoming_data(budget_ms=1000)
+    assert service.backlog['dropped_samples'] == 1000 * (capacity // 1000 + 1) - capacity
+    assert service.sample_count == 1000 * (capacity // 1000 + 1) - 1